@@ -42,16 +42,21 @@ from vis.tests import test_interval_indexer
 from vis.tests import test_frequency_experimenter
 from vis.tests import test_aggregator
 from vis.tests import test_barchart
-# from vis.tests import test_dendrogram
+from vis.tests import test_similarity
+try:  # SciPy is optional, so the dendrogram tests only run when it is installed
+    from vis.tests import test_dendrogram
+except ImportError:
+    test_dendrogram = None
 from vis.tests import test_offset
 from vis.tests import test_indexed_piece
+from vis.tests import test_analysis_store
 from vis.tests import test_aggregated_pieces
 from vis.tests import bwv2_integration_tests as bwv2
 from vis.tests import bwv603_integration_tests as bwv603
 # NB: The WorkflowManager is deprecated, though most of its tests still pass.
 # from vis.tests import test_workflow
-# from vis.tests import test_workflow_integration
-# from vis.tests import test_workflow_experiments
+from vis.tests import test_workflow_integration
+from vis.tests import test_workflow_experiments
 from vis.tests import test_fermata_indexer
 from vis.tests import test_over_bass
 from vis.tests import test_approach
@@ -64,6 +69,7 @@ THE_TESTS = (  # Indexer and Subclasses
              test_indexer.INDEXER_INIT_SUITE,
              test_indexer.INDEXER_1_PART_SUITE,
              test_indexer.INDEXER_MULTI_EVENT_SUITE,  # no tests run
+             test_indexer.BATCH_SUITE,
              test_fermata_indexer.FERMATA_INDEXER_SUITE,
              test_note_rest_indexer.NOTE_REST_INDEXER_SUITE,
              test_note_rest_indexer.MULTI_STOP_INDEXER_SUITE,
@@ -82,18 +88,27 @@ THE_TESTS = (  # Indexer and Subclasses
              test_over_bass.OVER_BASS_INDEXER_SUITE,
              test_approach.APPROACH_INDEXER_SUITE,
              test_contour.CONTOUR_INDEXER_SUITE,
+             test_contour.CONTOUR_INDEX_SUITE,
              test_active_voices.ACTIVE_VOICES_INDEXER_SUITE,
              test_windexer.WINDEXER_SUITE,
              # Experimenter and Subclasses
              test_frequency_experimenter.FREQUENCY_SUITE,
+             test_frequency_experimenter.FREQUENCY_SKETCHES_SUITE,
              test_aggregator.COLUMN_AGGREGATOR_SUITE,
              test_barchart.R_BAR_CHART_SUITE,
+             test_barchart.MATPLOTLIB_BAR_CHART_SUITE,
+             test_similarity.SIMILARITY_INDEX_SUITE,
              # test_dendrogram.DENDROGRAM_SUITE, # This test suite is commented out so that we can remove our SciPy dependency.
+             # NB: The other dendrogram suites are added below when SciPy is installed.
              # Importer, IndexedPiece, and AggregatedPieces
              test_aggregated_pieces.IMPORTER_SUITE,
              test_indexed_piece.INDEXED_PIECE_SUITE_A,
              test_indexed_piece.INDEXED_PIECE_PARTS_TITLES,
              test_indexed_piece.INDEXED_PIECE_SUITE_C,
+             test_indexed_piece.INDEXED_PIECE_GRAPH,
+             test_indexed_piece.INDEXED_PIECE_CACHE,
+             test_indexed_piece.INDEXED_PIECE_PROVENANCE,
+             test_analysis_store.ANALYSIS_STORE_SUITE,
              test_aggregated_pieces.AGGREGATED_PIECES_SUITE,
              # NB: Most of these WorkflowManager tests pass but they are commented out because the WorkflowManager is deprecated.
              # # WorkflowManager 
@@ -107,13 +122,20 @@ THE_TESTS = (  # Indexer and Subclasses
              # test_workflow.MAKE_LILYPOND,
              # test_workflow.AUX_METHODS,
              # test_workflow_experiments.INTERVALS,
+             test_workflow_experiments.INTERVAL_NGRAMS,
              # Integration Tests
              bwv2.ALL_VOICE_INTERVAL_NGRAMS,
              bwv603.ALL_VOICE_INTERVAL_NGRAMS,
              # NB: The integration tests below are commented out because the WorkflowManager is deprecated.
              # test_workflow_integration.INTERVALS_TESTS,
+             test_workflow_integration.LOAD_TESTS,
+             test_workflow_integration.LOAD_RESULTS_TESTS,
         )
 
+if test_dendrogram is not None:
+    THE_TESTS += (test_dendrogram.DENDROGRAM_PAIR_COMPARE_SUITE,
+                  test_dendrogram.DENDROGRAM_RENDERING_SUITE)
+
 
 if __name__ == '__main__':
     for each_test in THE_TESTS:
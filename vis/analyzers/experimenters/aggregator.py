@@ -146,6 +146,9 @@ class ColumnAggregator(experimenter.Experimenter):
 
     default_settings = {'column': None}
 
+    _BUFFER_SIZE = 2 ** 20
+    "The most entries of the stacked columns to hold before summing them, unless the sum is bigger."
+
     def __init__(self, index, settings=None):
         """
         **For the __init__() Method**
@@ -211,10 +214,54 @@ class ColumnAggregator(experimenter.Experimenter):
         if self._settings['column'] != 'all':
             aggregated = [df.select(lambda x: x != 'all', axis=1) for df in aggregated]
 
-        # concatenate the DataFrame together
-        aggregated = pandas.concat(aggregated, axis=1)
-
-        # calculate the sum
-        aggregated = aggregated.sum(axis=1, skipna=True)
+        # sum the columns without concatenating them into one wide DataFrame
+        columns = [df.iloc[:, i] for df in aggregated for i in range(len(df.columns))]
+        if not columns:
+            return pandas.DataFrame({'aggregator.ColumnAggregator': pandas.Series([])})
+        if all([col.index.equals(columns[0].index) for col in columns[1:]]):
+            aggregated = ColumnAggregator._sum_aligned(columns)
+        else:
+            aggregated = ColumnAggregator._sum_long(columns)
 
         return pandas.DataFrame({'aggregator.ColumnAggregator': aggregated})
+
+    @staticmethod
+    def _sum_aligned(columns):
+        """
+        Used internally by :meth:`run` to sum columns that all have the same index, row by row,
+        skipping NaN. Only one column is added at a time.
+        """
+        post = columns[0]
+        for col in columns[1:]:
+            post = post.add(col, fill_value=0)
+        return post
+
+    @staticmethod
+    def _sum_long(columns):
+        """
+        Used internally by :meth:`run` to sum columns with different indices, skipping NaN. The
+        columns are stacked end to end and summed with a group-by on their index. To keep the
+        memory used near the size of the sum, the columns are stacked only until they have more
+        entries than :attr:`_BUFFER_SIZE` or twice the length of the sum so far, and then summed
+        with it.
+        """
+        post = None
+        buffered = []
+        length = 0
+        for col in columns:
+            buffered.append(col.astype('float64'))
+            length += len(col)
+            if length > max(ColumnAggregator._BUFFER_SIZE, 2 * (0 if post is None else len(post))):
+                post = ColumnAggregator._collapse(post, buffered)
+                buffered = []
+                length = 0
+        if buffered:
+            post = ColumnAggregator._collapse(post, buffered)
+        return post
+
+    @staticmethod
+    def _collapse(post, buffered):
+        """Used internally by :meth:`_sum_long` to add some stacked columns to the sum so far."""
+        if post is not None:
+            buffered = [post] + buffered
+        return pandas.concat(buffered).groupby(level=0).sum()
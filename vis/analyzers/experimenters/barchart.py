@@ -25,19 +25,48 @@
 """
 .. codeauthor:: Christopher Antila <christopher@antila.ca>
 
-The experimenters in this module all generate bar charts. Currently the only class is
-:class:`RBarChart`, which uses ``Rscript`` to run a script in the R programming language.
+The experimenters in this module all generate bar charts. :class:`RBarChart` uses ``Rscript`` to
+run a script in the R programming language, and :class:`MatplotlibBarChart` draws the same chart
+with matplotlib, in the same process and without writing the data to disk first.
 """
 
 # pylint: disable=pointless-string-statement
 
 from os import path
 import subprocess
+import numpy
 import pandas
+import six
 import vis
 from vis.analyzers import experimenter
 
 
+def _labels(token, nr_pieces):
+    """
+    Used internally to choose the x-axis label and the title of a chart the way the R script does.
+
+    :param str token: The ``'token'`` setting of a bar chart experimenter.
+    :param nr_pieces: The ``'nr_pieces'`` setting of a bar chart experimenter.
+    :type nr_pieces: str or None
+
+    :returns: The x-axis label and the title.
+    :rtype: 2-tuple of str
+    """
+    if token.endswith('-gram'):
+        x_label = '{}-Gram'.format(token[:token.find('-gram')])
+    elif 'interval' == token.lower():
+        x_label = 'Interval'
+    else:
+        x_label = 'Object'
+    if nr_pieces is None:
+        title = '{} Frequency'.format(x_label)
+    elif '1' == nr_pieces:
+        title = '{} Frequency for One Piece'.format(x_label)
+    else:
+        title = '{} Frequency for {} Pieces'.format(x_label, nr_pieces)
+    return x_label + 's', title
+
+
 class RBarChart(experimenter.Experimenter):
     """
     Use ``Rscript`` to run a bar-chart-generating script in the R programming language.
@@ -169,3 +198,156 @@ class RBarChart(experimenter.Experimenter):
             raise RuntimeError(RBarChart._RSCRIPT_FAILED.format(cpe.output, cpe.returncode))
 
         return out_path
+
+
+class MatplotlibBarChart(experimenter.Experimenter):
+    """
+    Use matplotlib to draw the bar chart of :class:`RBarChart` without calling ``Rscript``. The
+    chart is drawn in this process on a figure that is not managed by ``pyplot``, so it needs no
+    display. Use :meth:`batch` to draw many charts, such as one per piece or one per voice pair,
+    with one figure.
+
+    The settings are the same as for :class:`RBarChart`, except the output types are those in
+    :const:`OUTPUT_TYPES`.
+    """
+
+    OUTPUT_TYPES = ('eps', 'ps', 'pdf', 'png', 'svg')
+    "The output types matplotlib can write without other libraries."
+
+    possible_settings = RBarChart.possible_settings
+    "As for :class:`RBarChart`."
+
+    default_settings = RBarChart.default_settings
+    "As for :class:`RBarChart`."
+
+    COLOUR = '#53869b'
+    "The colour of the bars."
+
+    _MISSING_SETTINGS = 'MatplotlibBarChart is missing a required setting.'
+    _INVALID_TYPE = 'Invalid output type: {}'
+
+    def __init__(self, index, settings=None):
+        """
+        :param index: The experimental results with which to make a bar chart. Either you must
+            provide the ``'column'`` setting or the results must be in the ``'freq'`` column. A
+            :class:`Series` is used as it is.
+        :type index: :class:`pandas.DataFrame` or :class:`pandas.Series`
+
+        :param dict settings: A dictionary with settings. You must include the ``'pathname'``
+            setting, while the others are optional.
+
+        :raises: :exc:`RuntimeError` if required settings are not present.
+        :raises: :exc:`RuntimeError` if given an invalid ``'type'`` setting.
+        """
+        self._settings = MatplotlibBarChart._check_settings(settings)
+        super(MatplotlibBarChart, self).__init__(index, None)
+
+    @staticmethod
+    def _check_settings(settings):
+        """Used internally to check the settings and fill in the defaults."""
+        if settings is None or 'pathname' not in settings:
+            raise RuntimeError(MatplotlibBarChart._MISSING_SETTINGS)
+        if 'type' in settings and settings['type'] not in MatplotlibBarChart.OUTPUT_TYPES:
+            raise RuntimeError(MatplotlibBarChart._INVALID_TYPE.format(settings['type']))
+        post = MatplotlibBarChart.default_settings.copy()
+        post.update(settings)
+        if post['nr_pieces'] is not None:
+            post['nr_pieces'] = str(post['nr_pieces'])
+        return post
+
+    @staticmethod
+    def _canvas():
+        """Used internally to make a figure and its canvas, importing matplotlib only when needed."""
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        figure = Figure(figsize=(7, 7))
+        return FigureCanvasAgg(figure)
+
+    @staticmethod
+    def _draw(canvas, data, settings, out_path):
+        """
+        Used internally to draw one chart on a canvas and save it.
+
+        :param canvas: The canvas to draw on. Anything already on its figure is cleared.
+        :type canvas: :class:`matplotlib.backends.backend_agg.FigureCanvasAgg`
+        :param data: The frequencies to draw.
+        :type data: :class:`pandas.Series`
+        :param dict settings: The settings of the chart.
+        :param str out_path: Where to save the chart.
+        """
+        data = data.dropna()
+        data = data.iloc[numpy.argsort(-data.values, kind='mergesort')]
+        x_label, title = _labels(settings['token'], settings['nr_pieces'])
+        figure = canvas.figure
+        figure.clf()
+        axes = figure.add_subplot(111)
+        positions = numpy.arange(len(data))
+        axes.bar(positions, data.values, width=0.9, align='center', color=MatplotlibBarChart.COLOUR,
+                 edgecolor=MatplotlibBarChart.COLOUR)
+        axes.set_xticks(positions)
+        axes.set_xticklabels([six.text_type(label) for label in data.index], rotation=90)
+        axes.set_xlim(-0.5, len(data) - 0.5)
+        axes.set_xlabel(x_label)
+        axes.set_ylabel('Frequency')
+        axes.set_title(title)
+        figure.tight_layout()
+        canvas.print_figure(out_path, format=settings['type'])
+
+    @staticmethod
+    def _select(index, settings):
+        """Used internally to choose the frequencies to draw from an index."""
+        if isinstance(index, pandas.Series):
+            return index
+        return index[settings['column']]
+
+    def run(self):
+        """
+        Produce the bar chart.
+
+        :returns: The pathname of the outputted file containing a bar chart.
+        :rtype: string
+        """
+        out_path = '{}.{}'.format(self._settings['pathname'], self._settings['type'])
+        MatplotlibBarChart._draw(MatplotlibBarChart._canvas(),
+                                 MatplotlibBarChart._select(self._index, self._settings),
+                                 self._settings, out_path)
+        return out_path
+
+    @classmethod
+    def batch(cls, indices, settings, keys=None):
+        """
+        Draw many bar charts with one figure. Each chart is saved as
+        ``'<pathname>-<key>.<type>'``.
+
+        :param indices: Either a list of experimental results, each of which is drawn as with
+            :meth:`run`, or one :class:`DataFrame`, each of whose columns is drawn.
+        :type indices: list of :class:`pandas.DataFrame` or :class:`pandas.Series`, or
+            :class:`pandas.DataFrame`
+        :param dict settings: The settings for all the charts, as for the constructor.
+        :param keys: What names each chart in its pathname. By default, the position in the list,
+            or the label of the column. The last level of a tuple label is used.
+        :type keys: list or None
+
+        :returns: The pathnames of the outputted files, in the order of ``indices``.
+        :rtype: list of str
+
+        :raises: :exc:`RuntimeError` if required settings are not present.
+        :raises: :exc:`RuntimeError` if given an invalid ``'type'`` setting.
+        """
+        settings = cls._check_settings(settings)
+        if isinstance(indices, pandas.DataFrame):
+            columns = list(indices.columns)
+            indices = [indices.iloc[:, i] for i in range(len(columns))]
+            if keys is None:
+                keys = [label[-1] if isinstance(label, tuple) else label for label in columns]
+        else:
+            indices = [cls._select(index, settings) for index in indices]
+            if keys is None:
+                keys = range(len(indices))
+        canvas = cls._canvas()
+        post = []
+        for key, data in zip(keys, indices):
+            out_path = '{}-{}.{}'.format(settings['pathname'], key, settings['type'])
+            cls._draw(canvas, data, settings, out_path)
+            post.append(out_path)
+        return post
@@ -27,11 +27,47 @@ these clusterings.
 # pylint: disable=pointless-string-statement
 from os import path
 import vis
+import numpy
 import pandas as pd
 from vis.analyzers import experimenter
 import subprocess
+from collections import OrderedDict
+from scipy import sparse
 from scipy.cluster.hierarchy import dendrogram, linkage
-import matplotlib.pyplot as plt
+
+
+def _condensed_overlap(profiles):
+    """
+    Used internally by :meth:`HierarchicalClusterer.pair_compare` to find how much of each pair of
+    analysis profiles is in common, i.e. the sum of the minimum of their proportions of every
+    observation. The pairs are in the order of a condensed distance matrix, like that of
+    :func:`scipy.spatial.distance.pdist`. Only the observations that a profile shares with the
+    later ones are visited, by taking the slices of a CSC copy of the matrix at the columns where
+    the profile is non-zero, so the work depends on the non-zero entries and not the vocabulary.
+
+    :param profiles: The normalized analysis profiles, one per row.
+    :type profiles: :class:`scipy.sparse.csr_matrix`
+    :returns: The overlap of each pair of profiles.
+    :rtype: :class:`numpy.ndarray`
+    """
+    num = profiles.shape[0]
+    by_column = profiles.tocsc()
+    post = numpy.empty(num * (num - 1) // 2)
+    position = 0
+    for j in range(num - 1):
+        cols = profiles.indices[profiles.indptr[j]:profiles.indptr[j + 1]]
+        vals = profiles.data[profiles.indptr[j]:profiles.indptr[j + 1]]
+        starts = by_column.indptr[cols]
+        lengths = by_column.indptr[cols + 1] - starts
+        # the positions in by_column.data of every entry in the columns of this profile
+        gather = numpy.repeat(starts - numpy.cumsum(lengths) + lengths, lengths) + numpy.arange(lengths.sum())
+        rows = by_column.indices[gather]
+        mins = numpy.minimum(by_column.data[gather], numpy.repeat(vals, lengths))
+        later = rows > j
+        post[position:position + num - j - 1] = numpy.bincount(rows[later] - j - 1, weights=mins[later],
+                                                               minlength=num - j - 1)
+        position += num - j - 1
+    return post
 
 
 class HierarchicalClusterer(experimenter.Experimenter):
@@ -56,6 +92,12 @@ class HierarchicalClusterer(experimenter.Experimenter):
     set to True. If neither of those two conditions obtain, dendrogram_settings['no_plot'] will
     automatically be set to False.
 
+    The clustering can be done without rendering anything with linkage_matrix(), or for many
+    combinations of weights and linkage types at once with linkages(), which compares the pieces
+    only once. Dendrograms that are saved but not shown interactively are drawn on matplotlib's
+    Agg canvas without pyplot, and render_batch() saves many of them with one figure. pyplot is
+    only imported for an interactive dendrogram.
+
     The 'graph_settings' consist of all other necessary settings to do cluster analysis and to
     produce a dendrogram. Each setting does the following:
 
@@ -193,16 +235,10 @@ class HierarchicalClusterer(experimenter.Experimenter):
         else:
             dendrogram_settings = None
         
-        if len(sers) != len(weights):
-            raise RuntimeWarning(HierarchicalClusterer._UNEQUAL_SERS_WEIGHTS)
-        if len(sers) > 1:
-            for lyst in sers[1:]:
-                if len(lyst) != len(sers[0]):
-                    raise RuntimeWarning(HierarchicalClusterer._UNEQUAL_ANALYSES)
-        if round(sum(weights), 3) != 1 or max(weights) > 1 or min(weights) < 0:
-            raise RuntimeWarning(HierarchicalClusterer._INVALID_WEIGHTS)
+        HierarchicalClusterer._check_weights(sers, weights)
         self._sers = sers
         self._weights = weights
+        self._distances = None
 
         self._graph_settings = HierarchicalClusterer.default_graph_settings.copy()
         if graph_settings is not None:
@@ -227,6 +263,21 @@ class HierarchicalClusterer(experimenter.Experimenter):
 
         # super(HierarchicalClusterer, self).__init__(sers, (1.0,), None, None) # What would this do and why doesn't it work?
     
+    @staticmethod
+    def _check_weights(sers, weights):
+        """
+        Used internally to make sure there is one weight per analysis metric, that the weights are
+        valid, and that every analysis metric has the same number of pieces.
+        """
+        if len(sers) != len(weights):
+            raise RuntimeWarning(HierarchicalClusterer._UNEQUAL_SERS_WEIGHTS)
+        if len(sers) > 1:
+            for lyst in sers[1:]:
+                if len(lyst) != len(sers[0]):
+                    raise RuntimeWarning(HierarchicalClusterer._UNEQUAL_ANALYSES)
+        if round(sum(weights), 3) != 1 or max(weights) > 1 or min(weights) < 0:
+            raise RuntimeWarning(HierarchicalClusterer._INVALID_WEIGHTS)
+
     def pair_compare(self):
         """
         Determines the dissimilarity of each analysis pairing and puts them in a "matrix" which is
@@ -255,23 +306,89 @@ class HierarchicalClusterer(experimenter.Experimenter):
         # Notes from discussion with Gabriel: normalize each observation for the total of that
         # observation in the pair. Then calculate distance in n-dimensional space with n =
         # number of types of observations.
+        return self._combine(self._weights).tolist()
+
+    def distances(self):
+        """
+        Find the dissimilarity of each pair of pieces on each analysis metric, before they are
+        weighted. The profiles are compared only the first time, so pair_compare(), linkages(),
+        and run() all share one computation.
+
+        :returns: One condensed matrix per analysis metric, like pair_compare(), of the percent
+            out of 1 that each pair of pieces does not have in common.
+        :rtype: list of :class:`numpy.ndarray`
+        """
+        if self._distances is None:
+            # get the percent out of 1 that each pair has in common for all observations
+            self._distances = [1 - _condensed_overlap(self._profiles(i)) for i in range(len(self._sers))]
+        return self._distances
+
+    def _combine(self, weights):
+        """
+        Used internally to weight and add up the dissimilarities of each analysis metric.
+        """
         numPieces = len(self._sers[0])
-        comparisons = int(numPieces*(numPieces-1)/2)
-        matrix = [0]*comparisons
-        for i in range(len(self._sers)): # The outermost loop is what allows multiple metrics to be mixed
-            position = 0
-            df = pd.concat(self._sers[i], axis=1, ignore_index=True) # put all the analysis profiles in this metric in a dataframe
-            df = df.replace(to_replace='NaN', value=0)
-            df = df.div(list(df.sum())) # make the df show the percent out of 1 that each analysis observation is of its piece
-            for j in df.columns[:-1]:
-                for k in df.columns[j+1:]:
-                    # get the percent out of 1 that each pair has in common for all observations
-                    similarity = sum(list(map(min, df.iloc[:, j], df.iloc[:, k])))
-                    # apply the weight assigned to this analysis metric and make percent out of 100
-                    matrix[position] += (1 - similarity) * self._weights[i] * 100
-                    position += 1 # keep track of which pair comparison we're going to next in case we need to come back for another metric
+        matrix = numpy.zeros(int(numPieces*(numPieces-1)/2))
+        for i, dissimilarity in enumerate(self.distances()): # This loop is what allows multiple metrics to be mixed
+            # apply the weight assigned to this analysis metric and make percent out of 100
+            matrix += dissimilarity * weights[i] * 100
         return matrix
 
+    def linkage_matrix(self):
+        """
+        Cluster the pieces, without rendering anything.
+
+        :returns: The linkage matrix of the pair_compare() dissimilarities, as made by
+            :func:`scipy.cluster.hierarchy.linkage` with the 'linkage_type' graph setting.
+        :rtype: :class:`numpy.ndarray`
+        """
+        return linkage(self.pair_compare(), self._graph_settings['linkage_type'])
+
+    def linkages(self, weights_list=None, linkage_types=None):
+        """
+        Cluster the pieces with many combinations of analysis metric weights and linkage types.
+        The pieces are compared once and the dissimilarities are reused for every combination.
+
+        :param weights_list: The weights to try, each like the 'weights' setting. The default is
+            the 'weights' setting. A weight of 0 leaves out its analysis metric.
+        :type weights_list: list of tuple of float
+        :param linkage_types: The linkage types to try, each like the 'linkage_type' graph
+            setting. The default is the 'linkage_type' graph setting.
+        :type linkage_types: list of str
+        :returns: The linkage matrix of every combination, keyed on the weights and the linkage
+            type, in the order given.
+        :rtype: :class:`collections.OrderedDict` of :class:`numpy.ndarray`
+        :raises: :exc:`RuntimeWarning` if some weights are not valid, as for the 'weights' setting.
+        """
+        if weights_list is None:
+            weights_list = [self._weights]
+        if linkage_types is None:
+            linkage_types = [self._graph_settings['linkage_type']]
+        post = OrderedDict()
+        for weights in weights_list:
+            HierarchicalClusterer._check_weights(self._sers, weights)
+            matrix = self._combine(weights).tolist()
+            for linkage_type in linkage_types:
+                post[(tuple(weights), linkage_type)] = linkage(matrix, linkage_type)
+        return post
+
+    def _profiles(self, i):
+        """
+        Used internally by pair_compare() to make the sparse matrix of the analysis profiles of
+        the ith analysis metric, with one row per piece and one column per observation in the
+        vocabulary shared by all the pieces. Each row shows the percent out of 1 that each
+        analysis observation is of its piece. Observations a piece doesn't have are not stored.
+        """
+        sers = self._sers[i]
+        cols, vocabulary = pd.factorize(numpy.concatenate([ser.index.values for ser in sers]))
+        rows = numpy.repeat(numpy.arange(len(sers)), [len(ser) for ser in sers])
+        counts = numpy.concatenate([ser.fillna(0).values.astype('float64') for ser in sers])
+        totals = numpy.bincount(rows, weights=counts, minlength=len(sers))
+        profiles = sparse.csr_matrix((counts / totals[rows], (rows, cols)),
+                                     shape=(len(sers), len(vocabulary)))
+        profiles.eliminate_zeros()
+        return profiles
+
     def run(self):
         """
         Used to execute the pair_compare() analysis and render a dendrogram to visualize the
@@ -279,33 +396,81 @@ class HierarchicalClusterer(experimenter.Experimenter):
         :returns: A dendrogram in the form of an interactive pylab window, and/or saved as a pdf or
         a png, and/or the data used to produce the dendrogram.
         """
-        if self._dendrogram_settings['labels'] is None: # If the user hasn't provided labels, generate number strings starting from 1.
-            self._dendrogram_settings['labels'] = []
-            for x in range(len(self._sers[0])):
-                self._dendrogram_settings['labels'].append(str(x+1))
+        self._set_labels()
         # linkage() organizes the dissimilarity matrix into a plotable structure.
-        linkage_matrix = linkage(self.pair_compare(), self._graph_settings['linkage_type'])
+        linkage_matrix = self.linkage_matrix()
         if self._graph_settings['return_data']:
-            d_data = dendrogram(linkage_matrix, **self._dendrogram_settings)
+            settings = self._dendrogram_settings.copy()
+            settings['no_plot'] = True
+            d_data = dendrogram(linkage_matrix, **settings)
             return d_data
         if not self._dendrogram_settings['no_plot']:
-            plt.figure('Dendrogram') 
-            d_data = dendrogram(linkage_matrix, **self._dendrogram_settings)
-            # Add connection annotations if the user asked for them
-            if self._graph_settings['label_connections']:
-                for i, d in zip(d_data['icoord'], d_data['dcoord']):
-                    x = 0.5 * sum(i[1:3])
-                    y = d[1]
-                    plt.plot(x, y, self._graph_settings['connection_string'])
-                    plt.annotate("%.3g" % y, (x, y), xytext=(0, -8), textcoords='offset points',
-                                 va='top', ha='center')
-            # Apply labels. If you want to omit a label, pass an empty string ''.
-            plt.xlabel(self._graph_settings['xlabel'])
-            plt.ylabel(self._graph_settings['ylabel'])
-            plt.title(self._graph_settings['title'])
-            # If the user provided a filepath, export as a .png (default) or .pdf.
-            if self._graph_settings['filename_and_type'] is not None:
-                plt.savefig(self._graph_settings['filename_and_type'])
-            # If the user wants an interactive matplotlib dendrogram, make it.
+            # If the user wants an interactive matplotlib dendrogram, it has to be made with pyplot.
             if self._graph_settings['interactive_dendrogram']:
-                plt.show()
\ No newline at end of file
+                import matplotlib.pyplot as plt
+                plt.figure('Dendrogram')
+                self._draw(linkage_matrix, plt.gca())
+                # If the user provided a filepath, export as a .png (default) or .pdf.
+                if self._graph_settings['filename_and_type'] is not None:
+                    plt.savefig(self._graph_settings['filename_and_type'])
+                plt.show()
+            # Otherwise draw and save it without a display.
+            else:
+                self.render_batch([linkage_matrix], [self._graph_settings['filename_and_type']])
+
+    def _set_labels(self):
+        """
+        Used internally to give the leaves of the dendrogram the number of their piece, starting
+        from 1, if the user hasn't provided labels.
+        """
+        if self._dendrogram_settings['labels'] is None:
+            self._dendrogram_settings['labels'] = []
+            for x in range(len(self._sers[0])):
+                self._dendrogram_settings['labels'].append(str(x+1))
+
+    def _draw(self, linkage_matrix, axes):
+        """
+        Used internally to draw a dendrogram and its labels on some matplotlib axes.
+        """
+        settings = self._dendrogram_settings.copy()
+        settings['no_plot'] = False
+        settings['ax'] = axes
+        d_data = dendrogram(linkage_matrix, **settings)
+        # Add connection annotations if the user asked for them
+        if self._graph_settings['label_connections']:
+            for i, d in zip(d_data['icoord'], d_data['dcoord']):
+                x = 0.5 * sum(i[1:3])
+                y = d[1]
+                axes.plot(x, y, self._graph_settings['connection_string'])
+                axes.annotate("%.3g" % y, (x, y), xytext=(0, -8), textcoords='offset points',
+                              va='top', ha='center')
+        # Apply labels. If you want to omit a label, pass an empty string ''.
+        axes.set_xlabel(self._graph_settings['xlabel'])
+        axes.set_ylabel(self._graph_settings['ylabel'])
+        axes.set_title(self._graph_settings['title'])
+        return d_data
+
+    def render_batch(self, linkage_matrices, filenames):
+        """
+        Save a dendrogram of each linkage matrix, like those from linkages(), with the graph and
+        dendrogram settings of this HierarchicalClusterer. The dendrograms are drawn one after the
+        other on the same figure with matplotlib's Agg canvas, so no display or pyplot is needed.
+
+        :param linkage_matrices: The clusterings to draw.
+        :type linkage_matrices: list of :class:`numpy.ndarray`
+        :param filenames: Where to save each dendrogram, ending in .pdf or .png. Files without
+            either type are saved as .png.
+        :type filenames: list of str
+        :returns: The data of each dendrogram, as from :func:`scipy.cluster.hierarchy.dendrogram`.
+        :rtype: list of dict
+        """
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        self._set_labels()
+        canvas = FigureCanvasAgg(Figure())
+        post = []
+        for linkage_matrix, filename in zip(linkage_matrices, filenames):
+            canvas.figure.clf()
+            post.append(self._draw(linkage_matrix, canvas.figure.add_subplot(111)))
+            canvas.print_figure(filename)
+        return post
\ No newline at end of file
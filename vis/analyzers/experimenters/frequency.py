@@ -30,11 +30,205 @@ Experimenters that deal with the frequencies (number of occurrences) of events.
 
 # pylint: disable=pointless-string-statement
 
+import hashlib
 import six
+import numpy
 import pandas
 from vis.analyzers import experimenter
 
 
+def _value_counts(series):
+    """
+    Used internally to count the occurrences of each object in a :class:`Series`, like its
+    ``value_counts()`` method but without the unused categories of a categorical column.
+    """
+    counts = series.value_counts()
+    if str(counts.index.dtype) == 'category':
+        # categorical columns count from their codes, but also report unused categories
+        counts = counts[counts > 0]
+        counts.index = counts.index.astype(object)
+    return counts
+
+
+def _sort_counts(counts):
+    """Used internally to put counts in order from the most to the least common, keeping ties in order."""
+    order = numpy.argsort(-counts.values, kind='mergesort')
+    return counts.iloc[order]
+
+
+class SpaceSaving(object):
+    """
+    Keep the approximate counts of the most common objects in a stream, with a bounded number of
+    counters, using the Space-Saving summary in its mergeable Misra-Gries form.
+
+    Whenever more than ``capacity`` objects are counted, the count of the ``capacity + 1``'th most
+    common object is subtracted from every counter and added to a "floor," and the counters that
+    reach zero are dropped. Any object counted more than ``total / (capacity + 1)`` times keeps its
+    counter. For every object, its counter (or zero) is at most its true count, and its counter plus
+    the floor, which is the Space-Saving estimate, is at least its true count.
+    """
+
+    def __init__(self, capacity):
+        """
+        :param int capacity: The most objects to keep counters for.
+        """
+        self.capacity = capacity
+        self.counts = pandas.Series([], dtype='int64')
+        self.floor = 0
+
+    def update(self, counts):
+        """
+        Count some more occurrences.
+
+        :param counts: The number of new occurrences of each object.
+        :type counts: :class:`pandas.Series` of int
+        """
+        self.counts = self.counts.add(counts, fill_value=0).astype('int64')
+        self._reduce()
+
+    def merge(self, other):
+        """
+        Add the counts of another summary, as though all its occurrences were counted by this one.
+
+        :param other: A summary with the same ``capacity``.
+        :type other: :class:`SpaceSaving`
+        """
+        self.counts = self.counts.add(other.counts, fill_value=0).astype('int64')
+        self.floor += other.floor
+        self._reduce()
+
+    def _reduce(self):
+        """Drop counters until there are at most ``capacity`` of them."""
+        if len(self.counts) > self.capacity:
+            cut = numpy.sort(self.counts.values)[-(self.capacity + 1)]
+            self.counts = self.counts[self.counts > cut] - cut
+            self.floor += cut
+
+    def estimates(self):
+        """
+        Get the Space-Saving estimates of the objects with counters, which are never less than
+        their true counts.
+
+        :returns: The estimated count of each object.
+        :rtype: :class:`pandas.Series` of int
+        """
+        return self.counts + self.floor
+
+
+class CountMin(object):
+    """
+    Keep the approximate counts of every object in a stream in a fixed amount of memory, with a
+    Count-Min sketch. Each object is counted in one cell of each row of a table, chosen with a
+    different hash function for each row, and its estimate is the smallest of its cells. The
+    estimates are never less than the true counts.
+    """
+
+    def __init__(self, width, depth=4, seed=0):
+        """
+        :param int width: The number of cells in each row. It is rounded up to a power of two.
+        :param int depth: The number of rows.
+        :param int seed: Chooses the hash functions. Sketches are mergeable only if they have the
+            same width, depth, and seed.
+        """
+        bits = max(1, int(numpy.ceil(numpy.log2(max(width, 2)))))
+        self.table = numpy.zeros((depth, 2 ** bits), dtype='int64')
+        state = numpy.random.RandomState(seed)
+        # multiply-shift hashing, with odd multipliers
+        self._mults = state.randint(0, 2 ** 31, (depth, 2)).astype('uint64')
+        self._mults = ((self._mults[:, 0] << numpy.uint64(32)) | self._mults[:, 1] | numpy.uint64(1))[:, None]
+        self._adds = state.randint(0, 2 ** 31, depth).astype('uint64')[:, None] << numpy.uint64(32)
+        self._shift = numpy.uint64(64 - bits)
+
+    def _cells(self, objects):
+        """
+        Find the cell of every object in every row. Each object is first hashed with the md5 of its
+        text, rather than with :func:`hash`, which Python 3 salts differently in every process, so
+        sketches made in different processes can still be merged. Then each row has its own
+        multiply-shift hash function, drawn with the seed.
+        """
+        digests = [hashlib.md5(six.text_type(obj).encode('utf-8')).digest()[:8] for obj in objects]
+        hashes = numpy.frombuffer(b''.join(digests), dtype='<u8').astype('uint64')
+        return ((self._mults * hashes + self._adds) >> self._shift).astype('int64')
+
+    def update(self, counts):
+        """
+        Count some more occurrences.
+
+        :param counts: The number of new occurrences of each object.
+        :type counts: :class:`pandas.Series` of int
+        """
+        cells = self._cells(counts.index)
+        for row in range(len(self.table)):
+            numpy.add.at(self.table[row], cells[row], counts.values)
+
+    def merge(self, other):
+        """
+        Add the counts of another sketch, as though all its occurrences were counted by this one.
+
+        :param other: A sketch with the same width, depth, and seed.
+        :type other: :class:`CountMin`
+        """
+        self.table += other.table
+
+    def estimates(self, objects):
+        """
+        Get the estimated counts of some objects, which are never less than their true counts.
+
+        :param objects: The objects to look up.
+        :type objects: sequence
+
+        :returns: The estimated count of each object.
+        :rtype: :class:`pandas.Series` of int
+        """
+        if len(objects) == 0:
+            return pandas.Series([], index=objects, dtype='int64')
+        cells = self._cells(objects)
+        return pandas.Series(self.table[numpy.arange(len(self.table))[:, None], cells].min(axis=0),
+                             index=objects)
+
+
+class _ExactCounter(object):
+    """Used internally to count exactly, merging the counts of each chunk."""
+
+    def __init__(self, settings):
+        self._counts = None
+
+    def update(self, counts):
+        if self._counts is None:
+            self._counts = counts
+        else:
+            self._counts = self._counts.add(counts, fill_value=0).astype('int64')
+
+    def result(self):
+        if self._counts is None:
+            return pandas.Series([], dtype='int64')
+        return _sort_counts(self._counts)
+
+
+class _SketchCounter(object):
+    """
+    Used internally to count approximately: the candidates are the objects kept by a
+    :class:`SpaceSaving` summary, and their counts are the smaller of its estimate and that of a
+    :class:`CountMin` sketch.
+    """
+
+    def __init__(self, settings):
+        capacity = settings['sketch_size']
+        if capacity is None:
+            capacity = max(1000, 10 * (settings['top_x'] or 0))
+        self._summary = SpaceSaving(capacity)
+        self._sketch = CountMin(4 * capacity)
+
+    def update(self, counts):
+        self._summary.update(counts)
+        self._sketch.update(counts)
+
+    def result(self):
+        estimates = self._summary.estimates()
+        estimates = numpy.minimum(estimates, self._sketch.estimates(estimates.index))
+        return _sort_counts(estimates)
+
+
 class FrequencyExperimenter(experimenter.Experimenter):
     """
     Calculate the number of occurrences of objects in an index.
@@ -43,15 +237,43 @@ class FrequencyExperimenter(experimenter.Experimenter):
     if you wanted to calculate the frequency of vertical intervals, you would specify
     ``'interval.IntervalIndexer'``. This would avoid counting, for example, the horizontal intervals
     if they were also present.
+
+    Use the ``'top_x'`` and ``'threshold'`` settings to keep only the most common objects. They are
+    applied to each column as it is counted, so the table of every object is never built. To count
+    many pieces together, like a corpus-wide table, use the ``'merge'`` setting. The counts are
+    exact by default, and the ``'chunk_size'`` setting limits how many rows are counted at a time.
+    With the ``'approximate'`` setting, the most common objects are found with a
+    :class:`SpaceSaving` summary and a :class:`CountMin` sketch of bounded size, so the memory used
+    does not grow with the number of different objects. Approximate counts may be a little higher
+    than the true counts, and objects near the cut-off may be missed or included wrongly.
     """
 
-    possible_settings = ['column']
+    possible_settings = ['column', 'top_x', 'threshold', 'merge', 'chunk_size', 'approximate',
+                         'sketch_size']
     """
     :keyword str 'column': The column name to use for counting frequency. The default is ``None``,
         which counts all columns. Use this to count only the frequency of one previous analyzer.
+    :keyword int 'top_x': Keep only this many of the most common objects in each column. The
+        default is ``None``, which keeps them all.
+    :keyword 'threshold': Keep only the objects that occur strictly more than this many times. The
+        default is ``None``. It is applied before ``'top_x'``, as in the
+        :class:`~vis.workflow.WorkflowManager`, so there may be fewer than ``'top_x'`` results.
+    :keyword bool 'merge': Count the columns of all the inputted DataFrames together, adding the
+        counts of the columns with the same label, and return a list with one DataFrame. The
+        default is ``False``, which counts each DataFrame separately.
+    :keyword int 'chunk_size': The most rows to count at a time. The default is ``None``, which
+        counts each column at once.
+    :keyword bool 'approximate': Count with sketches of bounded size instead of exactly. The
+        default is ``False``.
+    :keyword int 'sketch_size': The number of counters in the :class:`SpaceSaving` summary for
+        ``'approximate'`` counting. The default is ``None``, which uses ten times ``'top_x'``, or
+        1000 if that is smaller. The :class:`CountMin` sketch has four times as many cells per row.
     """
 
-    default_settings = {'column': None}
+    default_settings = {'column': None, 'top_x': None, 'threshold': None, 'merge': False,
+                        'chunk_size': None, 'approximate': False, 'sketch_size': None}
+
+    _BAD_SIZE = 'FrequencyExperimenter: the "{}" setting must be at least 1.'
 
     def __init__(self, index, settings=None):
         """
@@ -60,15 +282,57 @@ class FrequencyExperimenter(experimenter.Experimenter):
         :param settings: Optional dictionary with the settings described above in
             :const:`possible_settings`.
         :type settings: dict or NoneType
+
+        :raises: :exc:`RuntimeError` if ``'top_x'``, ``'chunk_size'``, or ``'sketch_size'`` is
+            less than 1.
         """
 
-        if settings is None or 'column' not in settings:
-            self._settings = {'column': FrequencyExperimenter.default_settings['column']}
-        else:
-            self._settings = {'column': settings['column']}
+        self._settings = FrequencyExperimenter.default_settings.copy()
+        if settings is not None:
+            self._settings.update({key: settings[key] for key in FrequencyExperimenter.possible_settings
+                                   if key in settings})
+        for key in ('top_x', 'chunk_size', 'sketch_size'):
+            if self._settings[key] is not None and self._settings[key] < 1:
+                raise RuntimeError(FrequencyExperimenter._BAD_SIZE.format(key))
 
         super(FrequencyExperimenter, self).__init__(index, None)
 
+    def _filter(self, counts):
+        """Apply the 'threshold' and 'top_x' settings to the sorted counts of one column."""
+        if self._settings['threshold'] is not None:
+            counts = counts[counts > self._settings['threshold']]
+        if self._settings['top_x'] is not None:
+            counts = counts.iloc[:self._settings['top_x']]
+        return counts
+
+    def _count(self, columns):
+        """
+        Count the objects in some columns together, in chunks of 'chunk_size' rows, exactly or
+        approximately as set, and apply the 'threshold' and 'top_x' settings.
+        """
+        if not self._settings['approximate'] and len(columns) == 1 and self._settings['chunk_size'] is None:
+            return self._filter(_value_counts(columns[0]))
+        counter = (_SketchCounter if self._settings['approximate'] else _ExactCounter)(self._settings)
+        chunk_size = self._settings['chunk_size']
+        for column in columns:
+            if chunk_size is None:
+                counter.update(_value_counts(column))
+            else:
+                for start in range(0, len(column), chunk_size):
+                    counter.update(_value_counts(column.iloc[start:start + chunk_size]))
+        return self._filter(counter.result())
+
+    @staticmethod
+    def _label(each_df):
+        """Make the MultiIndex of the results from the column labels of the counts."""
+        if len(each_df.columns) > 0 and isinstance(each_df.columns[0], tuple):
+            tuples = [('frequency.FrequencyExperimenter', label[1]) for label in each_df.columns]
+        else:
+            tuples = [('frequency.FrequencyExperimenter', label) for label in each_df.columns]
+        if not tuples:
+            return pandas.MultiIndex(levels=[[], []], labels=[[], []], names=['Experimenter', 'Parts'])
+        return pandas.MultiIndex.from_tuples(tuples, names=['Experimenter', 'Parts'])
+
     def run(self):
         """
         Run the :class:`FrequencyExperimenter`.
@@ -91,6 +355,11 @@ class FrequencyExperimenter(experimenter.Experimenter):
 
         freqs = frequency.FrequencyExperimenter(notes).run()
         print(freqs)
+
+        Count the 20 most common objects in all the pieces together, approximately:
+
+        freqs = frequency.FrequencyExperimenter(list_of_dfs, {'merge': True, 'top_x': 20,
+                                                              'approximate': True}).run()
         """
 
         # ensure we have a list of DatFrame
@@ -113,21 +382,22 @@ class FrequencyExperimenter(experimenter.Experimenter):
 
             uncounted = [df.select(select_func, axis=1) for df in uncounted]
 
-        # get the value_counts() on every Series
+        # with 'merge', count every column label in all the DataFrames together
+        if self._settings['merge']:
+            labels = []
+            for each_df in uncounted:
+                labels.extend([label for label in each_df.columns if label not in labels])
+            groups = [[(label, [each_df[label] for each_df in uncounted if label in each_df.columns])
+                       for label in labels]]
+        else:
+            groups = [[(label, [each_df[label]]) for label in each_df.columns] for each_df in uncounted]
+
+        # count every column, or group of columns
         counted = []
-        for each_df in uncounted:
-            each_df_results = {}
-            for col_name in each_df:
-                each_df_results[col_name] = each_df[col_name].value_counts()
-            each_df = pandas.DataFrame(each_df_results)
-            # make the MultiIndex and its labels
-            if isinstance(each_df.columns[0], tuple):
-                tuples = [('frequency.FrequencyExperimenter', label[1]) for label in each_df.columns]
-            else:
-                tuples = [('frequency.FrequencyExperimenter', label) for label in each_df.columns]
-            multiindex = pandas.MultiIndex.from_tuples(tuples, names=['Experimenter', 'Parts'])
+        for each_group in groups:
+            each_df = pandas.DataFrame({label: self._count(columns) for label, columns in each_group})
             # foist our MultiIndex onto the new results
-            each_df.columns = multiindex
+            each_df.columns = FrequencyExperimenter._label(each_df)
             counted.append(each_df)
 
         return counted
@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#--------------------------------------------------------------------------------------------------
+# Program Name:           vis
+# Program Description:    Helps analyze music with computers.
+#
+# Filename:               analyzers/experimenters/similarity.py
+# Purpose:                Find the pieces with the most similar analysis profiles.
+#
+# Copyright (C) 2016 Alexander Morgan
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#--------------------------------------------------------------------------------------------------
+"""
+.. codeauthor:: Alexander Morgan
+
+Find the pieces whose analysis profiles are most similar to a given one, without comparing it with
+every piece like the :class:`~vis.analyzers.experimenters.dendrogram.HierarchicalClusterer` does.
+
+The similarity of two analysis profiles is the same as in
+:meth:`~vis.analyzers.experimenters.dendrogram.HierarchicalClusterer.pair_compare`: the proportion
+of the observations the two pieces have in common, once each profile is normalized to sum to 1. So
+a similarity of ``0.8`` is a dissimilarity of 20 in the dendrogram.
+"""
+
+import hashlib
+import numpy
+import pandas
+import six
+
+
+def _normalize(profile):
+    """
+    Used internally to turn an analysis profile, like the results of the
+    :class:`~vis.analyzers.experimenters.frequency.FrequencyExperimenter` for one piece, into the
+    percent out of 1 that each observation is of the piece. Observations that don't occur are
+    dropped.
+    """
+    profile = profile.fillna(0)
+    profile = profile[profile > 0].astype('float64')
+    return profile / profile.sum()
+
+
+def overlap(profile1, profile2):
+    """
+    Find the proportion of their observations two analysis profiles have in common, i.e. the sum
+    of the minimum of their proportions of every observation.
+
+    :param profile1: The counts of each observation in one piece.
+    :type profile1: :class:`pandas.Series`
+    :param profile2: The counts of each observation in another piece.
+    :type profile2: :class:`pandas.Series`
+
+    :returns: The similarity, between 0.0 and 1.0.
+    :rtype: float
+    """
+    both = pandas.concat([_normalize(profile1), _normalize(profile2)], axis=1, join='inner')
+    return float(both.min(axis=1).sum())
+
+
+class SimilarityIndex(object):
+    """
+    Search many analysis profiles for those most similar to a given profile.
+
+    Each profile is summarized with a consistent weighted MinHash sketch, for which two profiles
+    get the same value of a hash with a probability that grows with their similarity. The hashes
+    are grouped in bands, and each band of each profile is filed in a bucket. A query only looks
+    at the profiles that share a bucket with it, and then ranks those by their exact similarity.
+    The results are approximate: a piece that is only slightly similar to the query may share no
+    bucket with it and be missed. More bands with fewer hashes each find more of those pieces, at
+    the cost of comparing more candidates.
+
+    Pieces may be added at any time; the buckets of the pieces already in the index don't change.
+
+    **Example:**
+
+    >>> from vis.models.indexed_piece import Importer
+    >>> from vis.analyzers.experimenters.similarity import SimilarityIndex
+    >>> pieces = Importer('path_to_directory')
+    >>> intervals = pieces.get_data('vertical_interval')
+    >>> profiles = pieces.get_data('frequency', data=intervals)
+    >>> index = SimilarityIndex.from_profiles([df.iloc[:, 0] for df in profiles])
+    >>> index.query(3, k=5)  # the five pieces most similar to the fourth one
+    """
+
+    _BAD_BANDS = 'SimilarityIndex: "bands" must divide "num_hashes" evenly.'
+    _DUPLICATE = 'SimilarityIndex: the piece {} is already in the index.'
+    _EMPTY = 'SimilarityIndex: the profile of a piece must have at least one observation.'
+    _MISSING = 'SimilarityIndex: the piece {} is not in the index.'
+
+    def __init__(self, num_hashes=64, bands=32, seed=0):
+        """
+        :param int num_hashes: The number of hashes in the sketch of each profile.
+        :param int bands: The number of groups the hashes are split into. Two profiles are
+            compared when all the hashes of any one band are the same.
+        :param int seed: Used to draw the random values of the hashes. Indices meant to be
+            compared must use the same seed.
+
+        :raises: :exc:`RuntimeError` if ``bands`` doesn't divide ``num_hashes``.
+        """
+        if bands < 1 or num_hashes % bands != 0:
+            raise RuntimeError(SimilarityIndex._BAD_BANDS)
+        self._num_hashes = num_hashes
+        self._bands = bands
+        self._seed = seed
+        self._vocabulary = {}  # the number of each observation
+        self._randoms = []  # the random values of the hashes, for each observation
+        self._profiles = {}  # the normalized profile of each piece, as observation numbers and weights
+        self._order = {}  # the position of each piece, in the order they were added
+        self._buckets = [{} for _ in range(bands)]  # the pieces in each bucket of each band
+
+    @classmethod
+    def from_profiles(cls, profiles, keys=None, **kwargs):
+        """
+        Build an index of many analysis profiles.
+
+        :param profiles: The counts of each observation in each piece.
+        :type profiles: list of :class:`pandas.Series`
+        :param keys: What identifies each piece in the results of :meth:`query`. By default, the
+            pieces are identified by their position in ``profiles``.
+        :type keys: list or None
+        :param kwargs: The settings passed on to the constructor.
+
+        :returns: The new index.
+        :rtype: :class:`SimilarityIndex`
+        """
+        if keys is None:
+            keys = range(len(profiles))
+        index = cls(**kwargs)
+        for key, profile in zip(keys, profiles):
+            index.add(key, profile)
+        return index
+
+    def __len__(self):
+        return len(self._order)
+
+    def __contains__(self, piece):
+        return piece in self._profiles
+
+    def _observations(self, labels, add=True):
+        """
+        Find the number of each observation, adding the new ones to the vocabulary. The random
+        values of an observation's hashes are drawn from a generator seeded with the observation
+        itself, so they don't depend on the order in which pieces are added. If ``add`` is
+        ``False``, the vocabulary is left as it is, and new observations get the number ``-1``.
+        """
+        post = numpy.empty(len(labels), dtype='int64')
+        for i, label in enumerate(labels):
+            if label not in self._vocabulary:
+                if not add:
+                    post[i] = -1
+                    continue
+                digest = hashlib.md5(six.text_type(label).encode('utf-8')).hexdigest()
+                state = numpy.random.RandomState([int(digest[:8], 16), self._seed])
+                self._randoms.append((state.gamma(2.0, 1.0, self._num_hashes),
+                                      state.gamma(2.0, 1.0, self._num_hashes),
+                                      state.uniform(0.0, 1.0, self._num_hashes)))
+                self._vocabulary[label] = len(self._randoms) - 1
+            post[i] = self._vocabulary[label]
+        return post
+
+    def _sketch(self, numbers, weights):
+        """
+        Make the consistent weighted MinHash sketch of a normalized profile, with Ioffe's
+        "improved consistent weighted sampling." Each hash is the number of an observation and a
+        step in its weight, and the same for two profiles with a probability equal to the sum of
+        their minimum weights divided by the sum of their maximum weights.
+        """
+        r_vals = numpy.array([self._randoms[num][0] for num in numbers])
+        c_vals = numpy.array([self._randoms[num][1] for num in numbers])
+        betas = numpy.array([self._randoms[num][2] for num in numbers])
+        logs = numpy.log(weights)[:, None]
+        steps = numpy.floor(logs / r_vals + betas)
+        y_vals = numpy.exp(r_vals * (steps - betas))
+        chosen = numpy.argmin(c_vals / (y_vals * numpy.exp(r_vals)), axis=0)
+        columns = numpy.arange(self._num_hashes)
+        return list(zip(numbers[chosen].tolist(), steps[chosen, columns].astype('int64').tolist()))
+
+    def _bucket_keys(self, sketch):
+        """Split a sketch into the keys of its bucket in each band."""
+        rows = self._num_hashes // self._bands
+        return [tuple(sketch[band * rows:(band + 1) * rows]) for band in range(self._bands)]
+
+    def _prepare(self, profile, add=True):
+        """
+        Turn an analysis profile into observation numbers and weights, sorted by number. If
+        ``add`` is ``False``, the observations that are not in the vocabulary are left out, after
+        the weights are normalized, since no piece in the index has them.
+        """
+        profile = _normalize(profile)
+        if len(profile) == 0:
+            raise RuntimeError(SimilarityIndex._EMPTY)
+        numbers = self._observations(profile.index, add)
+        known = numbers >= 0
+        numbers, weights = numbers[known], profile.values[known]
+        order = numpy.argsort(numbers)
+        return numbers[order], weights[order]
+
+    def add(self, piece, profile):
+        """
+        Add the analysis profile of a piece to the index.
+
+        :param piece: What identifies the piece in the results of :meth:`query`.
+        :type piece: object
+        :param profile: The counts of each observation in the piece, like the results of the
+            :class:`~vis.analyzers.experimenters.frequency.FrequencyExperimenter` for one voice
+            combination.
+        :type profile: :class:`pandas.Series`
+
+        :raises: :exc:`RuntimeError` if ``piece`` is already in the index.
+        :raises: :exc:`RuntimeError` if ``profile`` has no observations.
+        """
+        if piece in self._profiles:
+            raise RuntimeError(SimilarityIndex._DUPLICATE.format(piece))
+        numbers, weights = self._prepare(profile)
+        self._profiles[piece] = (numbers, weights)
+        self._order[piece] = len(self._order)
+        for band, key in enumerate(self._bucket_keys(self._sketch(numbers, weights))):
+            self._buckets[band].setdefault(key, []).append(piece)
+
+    def _similarity(self, numbers, weights, piece):
+        """The exact similarity of a prepared profile with that of a piece in the index."""
+        other_numbers, other_weights = self._profiles[piece]
+        common = numpy.intersect1d(numbers, other_numbers, assume_unique=True)
+        mine = weights[numpy.searchsorted(numbers, common)]
+        theirs = other_weights[numpy.searchsorted(other_numbers, common)]
+        return float(numpy.minimum(mine, theirs).sum())
+
+    def query(self, profile, k=10):
+        """
+        Find the pieces whose analysis profiles are most similar to ``profile``.
+
+        :param profile: Either the counts of each observation in a piece, or a piece already in
+            the index. The piece itself is left out of the results. Querying doesn't change the
+            index, so observations that no piece in the index has are ignored.
+        :type profile: :class:`pandas.Series` or object
+        :param k: The most pieces to return, or ``None`` for all the candidates.
+        :type k: int or None
+
+        :returns: One row per piece, with the ``'Similarity'`` and the ``'Piece'``, from most to
+            least similar. Pieces that are equally similar are in the order they were added.
+        :rtype: :class:`pandas.DataFrame`
+
+        :raises: :exc:`RuntimeError` if ``profile`` is not a :class:`~pandas.Series` and not in
+            the index.
+        """
+        columns = ['Similarity', 'Piece']
+        if isinstance(profile, pandas.Series):
+            itself = None
+            numbers, weights = self._prepare(profile, add=False)
+            if len(numbers) == 0:
+                return pandas.DataFrame(columns=columns)
+            sketch = self._sketch(numbers, weights)
+        elif profile in self._profiles:
+            itself = profile
+            numbers, weights = self._profiles[profile]
+            sketch = self._sketch(numbers, weights)
+        else:
+            raise RuntimeError(SimilarityIndex._MISSING.format(profile))
+        candidates = set()
+        for band, key in enumerate(self._bucket_keys(sketch)):
+            candidates.update(self._buckets[band].get(key, ()))
+        candidates.discard(itself)
+        candidates = sorted(candidates, key=self._order.get)
+        if not candidates:
+            return pandas.DataFrame(columns=columns)
+        similarities = numpy.array([self._similarity(numbers, weights, piece) for piece in candidates])
+        order = numpy.argsort(-similarities, kind='mergesort')
+        if k is not None:
+            order = order[:k]
+        return pandas.DataFrame({'Similarity': similarities[order],
+                                 'Piece': [candidates[i] for i in order]}, columns=columns)
@@ -31,6 +31,7 @@ The controllers that deal with indexing data from music21 Score objects.
 """
 
 import six
+import numpy
 import pandas
 from music21 import stream, converter
 import multiprocessing as mp
@@ -99,6 +100,22 @@ class Indexer(object):
     "Described in the :class:`~vis.analyzers.indexers.template.TemplateIndexer`."
     default_settings = {}
     "Described in the :class:`~vis.analyzers.indexers.template.TemplateIndexer`."
+    categorical = False
+    """
+    Whether :meth:`make_return` converts columns of strings to the ``category`` dtype. Indexers 
+    that keep the settings they are given also accept a ``'categorical'`` setting, which takes 
+    precedence over this attribute. Every indexer class has one category vocabulary shared by all 
+    its results, so the same string is stored only once however many pieces are indexed. The 
+    vocabularies are kept for the whole process: call :meth:`clear_vocabularies` between unrelated 
+    workflows to release them. A vocabulary that would grow past :attr:`vocabulary_limit` starts 
+    over.
+    """
+    vocabulary_limit = 2 ** 16
+    """
+    The most categories kept in the vocabulary of one indexer. When new strings would make a 
+    vocabulary longer, it is started over with the strings of the results being made, so results 
+    made before then keep their own categories.
+    """
     # self._score  # this will hold the input data
     # self._indexer_func  # this function will do the indexing
     # self._types  # if the input is a Score, this is a list of types we'll use for the index
@@ -110,6 +127,11 @@ class Indexer(object):
                        'pandas.Series': pandas.Series,
                        'pandas.DataFrame': pandas.DataFrame}
 
+    # The shared category vocabularies of every indexer, by indexer name. Each is a 2-tuple of the 
+    # list of categories and a dict from category to its code. Vocabularies grow until they reach 
+    # the vocabulary_limit or are cleared with clear_vocabularies().
+    _vocabularies = {}
+
     # Error messages
     _MAKE_RETURN_INDEX_ERR = 'Indexer.make_return(): arguments must have the same legnth.'
     _INIT_KEY_ERR = '{} has an incorrectly-set "required_score_type"'
@@ -188,6 +210,53 @@ class Indexer(object):
         else:
             self._settings = {}
 
+    @staticmethod
+    def clear_vocabularies():
+        """
+        Forget the category vocabularies of every indexer. Results made before still hold their 
+        categories, but :func:`shared_categories` no longer brings them up to date with results 
+        made afterwards, so call this between workflows whose results are not combined.
+        """
+        Indexer._vocabularies.clear()
+
+    @classmethod
+    def batch(cls, scores, settings=None, keys=None, stacked=False):
+        """
+        Run this indexer on many pieces at once. Indexers that can do so override 
+        :meth:`_batch` to stack the inputs of all the pieces and run their indexing once, which 
+        is much faster than calling :meth:`run` on each piece when there are many short pieces. 
+        The results are the same as those of :meth:`run`.
+
+        :param scores: The input of the indexer for each piece, as for ``score`` in 
+            :meth:`__init__`.
+        :type scores: list
+        :param settings: The settings for the indexer, used for every piece.
+        :type settings: dict or None
+        :param keys: The names of the pieces. Default is their position in ``scores``.
+        :type keys: list
+        :param bool stacked: Whether to return the results of all the pieces in one 
+            :class:`DataFrame`, where the first level of the index is the piece's key and the 
+            second is the offset. Default is ``False``.
+
+        :returns: The results of each piece, in the order of ``scores``, or one :class:`DataFrame` 
+            if ``stacked`` is ``True``.
+        :rtype: list of :class:`pandas.DataFrame` or :class:`pandas.DataFrame`
+        """
+        results = cls._batch(scores, settings)
+        if not stacked:
+            return results
+        if keys is None:
+            keys = list(range(len(results)))
+        return pandas.concat(results, keys=keys, names=['Piece', 'Offset'])
+
+    @classmethod
+    def _batch(cls, scores, settings=None):
+        """
+        Used by :meth:`batch` to find the results of each piece. This runs the indexer on every 
+        piece in turn; subclasses that can index many pieces at once override it.
+        """
+        return [cls(score, settings).run() for score in scores]
+
     def run(self):
         """
         Make a new index of the piece.
@@ -297,6 +366,16 @@ class Indexer(object):
 
         return post
 
+    def _name(self):
+        """
+        Used internally by :meth:`make_return` to find the name of the indexer, as stored in the
+        first level of the columns of its results.
+        """
+        # make the indexer's name using filename and classname (but not full class name)
+        my_mod = six.u(str(self.__module__))[six.u(str(self.__module__)).rfind('.') + 1:]
+        my_class = six.u(str(self.__class__))[six.u(str(self.__class__)).rfind('.'):-2]
+        return my_mod + my_class
+
     def make_return(self, labels, indices):
         """
         Prepare a properly-formatted :class:`DataFrame` as should be returned by any :class:`Indexer`
@@ -327,15 +406,80 @@ class Indexer(object):
             # multi_index because it ensures that even empty series will be included in the dataframe.
             ret = pandas.concat(indices, levels=labels, axis=1)
 
-        # make the indexer's name using filename and classname (but not full class name)
-        my_mod = six.u(str(self.__module__))[six.u(str(self.__module__)).rfind('.') + 1:]
-        my_class = six.u(str(self.__class__))[six.u(str(self.__class__)).rfind('.'):-2]
-        my_name = my_mod + my_class
+        my_name = self._name()
 
         # Apply the multi_index as the column labels.
         iterables = (my_name, labels)
         multi_index = pandas.MultiIndex.from_product(iterables, names = ('Indexer', 'Parts'))
         ret.columns = multi_index
 
+        if self._settings.get('categorical', self.categorical):
+            ret = _categorize(ret, my_name)
+
         return ret
 
+
+def _categorize(dframe, name):
+    """
+    Used internally by :meth:`Indexer.make_return` to convert the columns of strings in ``dframe``
+    to the ``category`` dtype, with the categories of the shared vocabulary called ``name``. Other
+    columns are returned unchanged.
+    """
+    if name not in Indexer._vocabularies:
+        Indexer._vocabularies[name] = ([], {})
+    vocab, lookup = Indexer._vocabularies[name]
+    # first find the strings of every column, so all columns get the categories of the vocabulary
+    factorized = {}
+    for i in range(len(dframe.columns)):
+        col = dframe.iloc[:, i]
+        if col.dtype != object:
+            continue
+        try:
+            codes, uniques = pandas.factorize(col.values)
+        except TypeError:  # unhashable objects like lists
+            continue
+        if not all([isinstance(val, six.string_types) for val in uniques]):
+            continue
+        factorized[i] = (codes, uniques)
+    new = set()
+    for codes, uniques in six.itervalues(factorized):
+        new.update([val for val in uniques if val not in lookup])
+    if len(vocab) + len(new) > Indexer.vocabulary_limit:  # start the vocabulary over
+        vocab, lookup = Indexer._vocabularies[name] = ([], {})
+    for codes, uniques in six.itervalues(factorized):
+        for val in uniques:
+            if val not in lookup:
+                lookup[val] = len(vocab)
+                vocab.append(val)
+    if factorized:
+        dframe = dframe.copy()
+        for i, (codes, uniques) in six.iteritems(factorized):
+            # codes of the vocabulary; -1 (for NaN) stays -1
+            vocab_codes = numpy.append(numpy.array([lookup[val] for val in uniques], dtype=numpy.int64), -1)
+            dframe.iloc[:, i] = pandas.Categorical.from_codes(vocab_codes[codes], categories=vocab)
+    return dframe
+
+
+def shared_categories(dframe):
+    """
+    Update the categorical columns made by :meth:`Indexer.make_return` to the current vocabulary
+    of their indexer. A vocabulary grows as new strings are found, so results made earlier have
+    fewer categories than those made later; updating them lets :func:`pandas.concat` keep the
+    ``category`` dtype when combining results of several pieces. Categories missing from the 
+    vocabulary, because it was cleared or started over, are kept after those of the vocabulary.
+
+    :param dframe: The results of one or more indexers.
+    :type dframe: :class:`pandas.DataFrame`
+
+    :returns: The same results, with the categories of every categorical column updated.
+    :rtype: :class:`pandas.DataFrame`
+    """
+    dframe = dframe.copy()
+    for i, label in enumerate(dframe.columns):
+        name = label[0] if isinstance(label, tuple) else label
+        if str(dframe.iloc[:, i].dtype) == 'category' and name in Indexer._vocabularies:
+            vocab, lookup = Indexer._vocabularies[name]
+            missing = [val for val in dframe.iloc[:, i].cat.categories if val not in lookup]
+            dframe.iloc[:, i] = dframe.iloc[:, i].cat.set_categories(vocab + missing)
+    return dframe
+
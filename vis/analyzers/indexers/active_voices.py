@@ -30,6 +30,7 @@
 """
 
 from vis.analyzers import indexer
+import numpy
 import pandas
 
 
@@ -45,6 +46,32 @@ def indexer1(x):
         return 1
 
 
+def voice_mask(score, attacked=False):
+    """
+    Find which voices are active at each offset, as a boolean 
+    :class:`DataFrame` with the same index and columns as ``score``. A 
+    voice is active where it has an event that is neither a rest nor 
+    ``NaN``, which is what :func:`indexer1` checks one cell at a time.
+
+    :param score: The :class:`NoteRestIndexer` results of a piece.
+    :type score: :class:`pandas.DataFrame`
+    :param attacked: When false, a voice stays active from its note 
+        until its next event, not just at the offset of the note.
+    :type attacked: boolean
+
+    :returns: ``True`` where a voice is active.
+    :rtype: :class:`pandas.DataFrame` of bool
+    """
+    if not attacked:
+        score = score.fillna(method='ffill')
+    mask = score.notnull() & (score != 'Rest')
+    # indexer1() counts any float as inactive, so numeric columns never are active
+    for x in range(len(score.columns)):
+        if score.iloc[:, x].dtype.kind == 'f':
+            mask.iloc[:, x] = False
+    return mask
+
+
 class ActiveVoicesIndexer(indexer.Indexer):
     """
     Indexer that counts the number of voices active at each offset. It 
@@ -70,6 +97,16 @@ class ActiveVoicesIndexer(indexer.Indexer):
     
     :type 'show_all':       boolean
 
+    :keyword 'bitmask':     When true, the results get a second column, 
+                            'Voice Mask', with an integer for each 
+                            offset where bit ``i`` is set if the ``i``th 
+                            voice is active. Unless 'show_all' is also 
+                            true, the offsets shown are then those where 
+                            the set of active voices changes, rather 
+                            than just their number. Defaults to false.
+    
+    :type 'bitmask':        boolean
+
     **Examples:**
 
     Prepare an indexed piece:
@@ -92,9 +129,9 @@ class ActiveVoicesIndexer(indexer.Indexer):
     """
 
     required_score_type = 'pandas.DataFrame'
-    possible_settings = ['attacked', 'show_all']
+    possible_settings = ['attacked', 'show_all', 'bitmask']
 
-    default_settings = {'attacked': False, 'show_all': False}
+    default_settings = {'attacked': False, 'show_all': False, 'bitmask': False}
 
     def __init__(self, score, settings=None):
         """
@@ -111,18 +148,27 @@ class ActiveVoicesIndexer(indexer.Indexer):
 
         super(ActiveVoicesIndexer, self).__init__(score, None)
 
-        if not self._settings['attacked']:
-            self._score = score.fillna(method='ffill')
-
     def run(self):
         """
         :returns: new index of the active voices in the piece.
         :rtype: :class:`pandas.DataFrame`
         """
-
-        post = self._score.applymap(indexer1)
-        most = post.sum(axis=1)
+        mask = voice_mask(self._score, self._settings['attacked']).values
+        most = pandas.Series(mask.sum(axis=1), index=self._score.index)
+
+        if not self._settings['bitmask']:
+            if not self._settings['show_all']:
+                most = most[most != most.shift(1)]
+            return self.make_return(('Active Voices',), (most,))
+
+        voices = mask.shape[1]
+        if voices < 63:
+            bits = mask.dot(numpy.left_shift(1, numpy.arange(voices, dtype='int64')))
+        else: # too many voices for an int64, so use python integers
+            bits = mask.astype(object).dot(numpy.array([1 << i for i in range(voices)], dtype=object))
+        bits = pandas.Series(bits, index=self._score.index)
         if not self._settings['show_all']:
-            most = most[most != most.shift(1)]
-
-        return self.make_return(('Active Voices',), (most,))
+            keep = bits != bits.shift(1)
+            most = most[keep]
+            bits = bits[keep]
+        return self.make_return(('Active Voices', 'Voice Mask'), (most, bits))
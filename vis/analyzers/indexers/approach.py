@@ -30,6 +30,7 @@
 """
 
 from vis.analyzers import indexer
+import numpy
 import pandas
 
 
@@ -119,7 +120,8 @@ class ApproachIndexer(indexer.Indexer):
         elif settings['length'] < 1:
             raise RuntimeError(self._LOW_LENGTH)
         elif 'voice' not in settings:
-            self._settings = settings
+            # copy so that the same settings can be used for many pieces
+            self._settings = settings.copy()
             self._settings['voice'] = 'all'
         elif(type(settings['voice']) is int 
             and settings['voice'] >= len(self.ferm.columns)):
@@ -137,37 +139,21 @@ class ApproachIndexer(indexer.Indexer):
         :rtype: :class:`pandas.DataFrame`
         """
 
-        endings = []
-        if self._settings['voice'] is 'all':
-            for part in self.ferm.columns:
-                endings.extend(self.ferm[
-                    self.ferm[part].notnull()].index.tolist())
+        if self._settings['voice'] == 'all':
+            has_fermata = self.ferm.notnull().any(axis=1).values
         else:
-            endings.extend(self.ferm[self.ferm[
-                str(self._settings['voice'])].notnull()].index.tolist())
-
-        endings = list(set(endings))
-        beginnings = []
-        indices = self.ferm.index.tolist()
-
-        for ind in endings:
-            beginnings.append(indices[
-                indices.index(ind)-self._settings['length']+1])
-
-        beginnings.sort()
-        endings.sort()
-        locations = list(zip(beginnings, endings))
-
-        approaches = []
+            has_fermata = self.ferm[str(self._settings['voice'])].notnull().values
 
-        for x in range(len(beginnings)):
-            my_approach = []
-            for place in self.fig.loc[locations[x][0]:locations[x][1]].index.tolist():
-                my_approach.extend(self.fig.loc[place].tolist())
-            approaches.append(my_approach)
+        # Find where each approach starts and ends in the offset index, and take each approach 
+        # as one block of rows. Approaches that would start before the piece start at its beginning.
+        offsets = self.ferm.index
+        endings = offsets.searchsorted(offsets[has_fermata])
+        beginnings = numpy.maximum(endings - self._settings['length'] + 1, 0)
+        figures = self.fig.values
+        approaches = [figures[b:e + 1].ravel().tolist() for b, e in zip(beginnings, endings)]
 
         result = pandas.DataFrame(
-            {'Approaches': pandas.Series(approaches, index=beginnings)})
+            {'Approaches': pandas.Series(approaches, index=offsets[beginnings])})
 
         return self.make_return(result.columns.values, 
             [result[name] for name in result.columns])
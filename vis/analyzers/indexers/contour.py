@@ -28,11 +28,22 @@
 .. todo:: Properly document the ``COM_matrix`` and ``compare`` 
     functions.
 
+Contours are computed from integer pitch heights with 
+:func:`pitch_heights` and :func:`cseg_array`. The :func:`COM_array` and 
+:func:`compare_arrays` functions are array-based versions of 
+:func:`COM_matrix` and :func:`compare` that work on many contours at 
+once.
+
 """
 
 from vis.analyzers import indexer
 import music21
+import numpy
 import pandas
+import six
+from numpy.lib.stride_tricks import as_strided
+
+_ps_memo = {}
 
 def COM_matrix(contour):
     """
@@ -58,27 +69,64 @@ def COM_matrix(contour):
 
     return com
 
+def pitch_heights(notes):
+    """
+    Map note names to integer heights, where equal heights mean equal 
+    pitches and a higher height means a higher pitch. Each distinct 
+    name is only turned into a music21 pitch once, and enharmonic 
+    spellings such as 'B#3' and 'C4' get the same height.
+
+    :param notes: The note names of a voice, without rests.
+    :type notes: list of str
+
+    :returns: The height of each note.
+    :rtype: :class:`numpy.ndarray` of int
+    """
+    codes, names = pandas.factorize(notes)
+    for name in names:
+        if name not in _ps_memo:
+            _ps_memo[name] = music21.pitch.Pitch(name).ps
+    _, heights = numpy.unique([_ps_memo[name] for name in names], return_inverse=True)
+    return heights[codes]
+
+def cseg_array(heights, length):
+    """
+    Compute the contour segment of every window of ``length`` 
+    consecutive notes at once. The windows are a strided view on 
+    ``heights`` so they are not copied, and each contour number is the 
+    dense rank of its note in the window (the number of distinct lower 
+    pitches), found with one sort per window.
+
+    :param heights: The heights of the notes in a voice, as returned 
+        by :func:`pitch_heights`.
+    :type heights: :class:`numpy.ndarray`
+    :param int length: The number of notes in each contour.
+
+    :returns: One row per window with its contour numbers. There are 
+        ``len(heights) - length + 1`` rows, or none if the voice has 
+        fewer than ``length`` notes.
+    :rtype: 2-dimensional :class:`numpy.ndarray` of int
+    """
+    heights = numpy.ascontiguousarray(heights)
+    count = len(heights) - length + 1
+    if count < 1:
+        return numpy.empty((0, length), dtype=int)
+    windows = as_strided(heights, shape=(count, length), strides=(heights.strides[0],) * 2)
+    order = numpy.argsort(windows, axis=1, kind='mergesort')
+    rows = numpy.arange(count)[:, None]
+    ordered = windows[rows, order]
+    dense = numpy.cumsum(numpy.hstack((numpy.zeros((count, 1), dtype=bool),
+                                       ordered[:, 1:] != ordered[:, :-1])), axis=1)
+    csegs = numpy.empty_like(dense)
+    csegs[rows, order] = dense
+    return csegs
+
 def getContour(notes):
     """
     Method used internally by the ``ContourIndexer`` class to convert 
     pitches into contour numbers.
     """
-
-    contour = list(map(music21.note.Note, notes))
-
-    cseg = [0] * len(contour)
-
-    for i in range(len(contour)):
-        notes = []
-
-        for x in range(len(contour)):
-            if ((music21.interval.getAbsoluteHigherNote(contour[i], contour[x]) == contour[i]) and 
-                (contour[i].nameWithOctave != contour[x].nameWithOctave) and 
-                (contour[x].nameWithOctave not in notes)):
-                notes.append(contour[x].nameWithOctave)
-                cseg[i] += 1
-
-    return str(cseg)
+    return str(cseg_array(pitch_heights(notes), len(notes))[0].tolist())
 
 def compare(contour1, contour2):
     """
@@ -97,6 +145,43 @@ def compare(contour1, contour2):
     
     return count / total
 
+def COM_array(csegs):
+    """
+    The array version of :func:`COM_matrix`. Element ``[i, x]`` is 
+    ``0`` where the contour numbers at ``i`` and ``x`` are equal, 
+    ``-1`` where the one at ``i`` is higher, and ``1`` where it is lower.
+
+    :param csegs: One contour, or one contour per row, such as the 
+        results of :func:`cseg_array`.
+    :type csegs: :class:`numpy.ndarray`
+
+    :returns: The comparison matrix of each contour.
+    :rtype: :class:`numpy.ndarray` of int8 with one more dimension than 
+        ``csegs``
+    """
+    csegs = numpy.asarray(csegs)
+    return numpy.sign(csegs[..., None, :] - csegs[..., :, None]).astype('int8')
+
+def compare_arrays(com1, com2):
+    """
+    The array version of :func:`compare`. The proportion of the pairs 
+    of notes with the same relation in both contours. Either argument 
+    may hold a stack of matrices, in which case one similarity is 
+    returned per matrix.
+
+    :param com1: Comparison matrices from :func:`COM_array`.
+    :type com1: :class:`numpy.ndarray`
+    :param com2: Comparison matrices from :func:`COM_array`.
+    :type com2: :class:`numpy.ndarray`
+
+    :returns: The similarities, between 0.0 and 1.0.
+    :rtype: float or :class:`numpy.ndarray` of float
+    """
+    com1 = numpy.asarray(com1)
+    l = com1.shape[-1]
+    count = (com1 == numpy.asarray(com2)).sum(axis=(-2, -1))
+    return (count - l) / float(l * (l - 1))
+
 
 class ContourIndexer(indexer.Indexer):
     """
@@ -186,31 +271,153 @@ class ContourIndexer(indexer.Indexer):
 
         for v, voice in enumerate(self.score.columns.values):
 
-            part = self.score[voice].tolist()
-            index = self.score.index.tolist()
-            new_index = []
-            voice_con = []
-            for x in range(len(part)-self.settings['length']+1):
-                cont = []
-
-                if part[x] == 'Rest' or type(part[x]) == float:
-                    pass
-                else:
-                    cont.append(part[x])
-                    y = 1
-                    while (len(cont) < self.settings['length']) and (x+y < len(part)):
-                        if part[x+y] == 'Rest' or type(part[x+y]) == float:
-                            pass
-                        else:
-                            cont.append(part[x+y])
-                        y+=1
-                if len(cont) == self.settings['length']:
-                    voice_con.append(getContour(cont))
-                    new_index.append(index[x])
-
-            voice = pandas.Series(voice_con, index=new_index, name=str(v))
+            part = self.score[voice]
+            notes = part[part.notnull() & (part != 'Rest')]
+            csegs = cseg_array(pitch_heights(notes.tolist()), self.settings['length'])
+            voice = pandas.Series([str(c) for c in csegs.tolist()],
+                                  index=notes.index[:len(csegs)], name=str(v))
             contours.append(voice)
 
         result = pandas.concat(contours, axis=1)
 
         return self.make_return(result.columns, [result[name] for name in result.columns])
+
+
+class ContourIndex(object):
+    """
+    Search the contours of many pieces for the ones most similar to a 
+    given contour, as measured by :func:`compare` on their comparison 
+    matrices.
+
+    Every window is filed in a bucket with the other windows that have 
+    the same contour segment. Since the number of distinct contours of 
+    a given length is small compared to the number of windows in a 
+    corpus, a query only compares the query contour with each bucket's 
+    contour (all at once with :func:`compare_arrays`), and then reads 
+    the passages out of the best buckets.
+
+    **Example:**
+
+    >>> from vis.models.indexed_piece import Importer
+    >>> pieces = Importer('path_to_directory')
+    >>> index = ContourIndex.from_pieces(pieces, 4)
+    >>> index.query('[0, 2, 1, 3]', n=20)
+    """
+
+    _WRONG_LENGTH = 'ContourIndex: this index holds contours of length {}, but the query has length {}.'
+
+    def __init__(self):
+        self._length = None
+        self._buckets = {}
+        self._keys = []
+        self._coms = None
+
+    @classmethod
+    def from_pieces(cls, pieces, length):
+        """
+        Build an index of the contours in all the pieces of an 
+        :class:`~vis.models.aggregated_pieces.AggregatedPieces`. The 
+        pieces are identified by their position in it.
+
+        :param pieces: The pieces to index.
+        :type pieces: :class:`~vis.models.aggregated_pieces.AggregatedPieces`
+        :param int length: The number of notes in each contour.
+
+        :returns: The new index.
+        :rtype: :class:`ContourIndex`
+        """
+        notes = pieces.get_data('noterest')
+        results = pieces.get_data('contour', data=notes, settings={'length': length})
+        index = cls()
+        for i, df in enumerate(results):
+            index.add(i, df)
+        return index
+
+    @staticmethod
+    def _canonical(contour):
+        """
+        Turn a contour given as a string like ``'[0, 2, 1]'`` or as a 
+        sequence of heights into its contour segment, as a tuple.
+        """
+        if isinstance(contour, six.string_types):
+            contour = [int(x) for x in contour.strip('[] ').split(',')]
+        contour = numpy.asarray(contour)
+        return tuple(cseg_array(contour, len(contour))[0].tolist())
+
+    def __len__(self):
+        return sum(len(v) for v in self._buckets.values())
+
+    def add(self, piece, contours):
+        """
+        Add the results of a :class:`ContourIndexer` to the index.
+
+        :param piece: What identifies the piece these results are from 
+            in the results of :meth:`query`.
+        :type piece: object
+        :param contours: The :class:`ContourIndexer` results of one piece.
+        :type contours: :class:`pandas.DataFrame`
+
+        :raises: :exc:`RuntimeError` if the contours have a different 
+            length than those already in the index.
+        """
+        for x in range(len(contours.columns)):
+            part = contours.iloc[:, x].dropna()
+            for offset, contour in zip(part.index, part):
+                key = ContourIndex._canonical(contour)
+                if self._length is None:
+                    self._length = len(key)
+                elif self._length != len(key):
+                    raise RuntimeError(ContourIndex._WRONG_LENGTH.format(self._length, len(key)))
+                if key not in self._buckets:
+                    self._buckets[key] = []
+                    self._keys.append(key)
+                    self._coms = None
+                self._buckets[key].append((piece, contours.columns[x][-1], offset))
+
+    def query(self, contour, n=10, threshold=None):
+        """
+        Find the passages with the contours most similar to ``contour``.
+
+        :param contour: The contour to look for, either as a string like 
+            those in the :class:`ContourIndexer` results or as a sequence 
+            of pitch heights.
+        :type contour: str or list of int
+        :param n: The most passages to return, or ``None`` for all of 
+            them. Passages in the same bucket are all equally similar, 
+            so they are returned in the order they were added.
+        :type n: int or None
+        :param threshold: If given, only passages with at least this 
+            similarity are returned.
+        :type threshold: float or None
+
+        :returns: One row per passage, with the ``'Similarity'``, 
+            ``'Contour'``, ``'Piece'``, ``'Part'``, and ``'Offset'``, 
+            from most to least similar.
+        :rtype: :class:`pandas.DataFrame`
+
+        :raises: :exc:`RuntimeError` if the length of ``contour`` does 
+            not match the index.
+        """
+        columns = ['Similarity', 'Contour', 'Piece', 'Part', 'Offset']
+        key = ContourIndex._canonical(contour)
+        if not self._keys:
+            return pandas.DataFrame(columns=columns)
+        if len(key) != self._length:
+            raise RuntimeError(ContourIndex._WRONG_LENGTH.format(self._length, len(key)))
+        if self._coms is None:
+            self._coms = COM_array(numpy.array(self._keys))
+        if self._length > 1:
+            similarities = compare_arrays(self._coms, COM_array(key))
+        else:
+            similarities = numpy.ones(len(self._keys))
+        rows = []
+        for i in numpy.argsort(-similarities, kind='mergesort'):
+            if threshold is not None and similarities[i] < threshold:
+                break
+            if n is not None and len(rows) >= n:
+                break
+            for piece, part, offset in self._buckets[self._keys[i]]:
+                rows.append((similarities[i], str(list(self._keys[i])), piece, part, offset))
+        if n is not None:
+            rows = rows[:n]
+        return pandas.DataFrame(rows, columns=columns)
@@ -1337,4 +1337,4 @@ class DissonanceIndexer(indexer.Indexer):
                 ret.iat[ndx, unknowns[1][x]] = _only_diss_w_diss
         '''
 
-        return ret
\ No newline at end of file
+        return self.make_return(ret.columns.get_level_values(1), ret)
\ No newline at end of file
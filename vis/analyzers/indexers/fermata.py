@@ -33,6 +33,8 @@ Index fermatas.
 """
 
 import six
+import numpy
+import pandas
 from music21 import expressions
 from vis.analyzers import indexer
 
@@ -83,7 +85,9 @@ class FermataIndexer(indexer.Indexer):
     def __init__(self, score, settings=None):
         """
         :param score: A dataframe of the note, rest, and chord objects 
-            in a piece.
+            in a piece, or a boolean dataframe of the same shape that is 
+            ``True`` where an event has a fermata, like the notation 
+            flags recorded by :class:`~vis.models.indexed_piece.IndexedPiece`.
         
         :type score: pandas Dataframe
         
@@ -100,5 +104,27 @@ class FermataIndexer(indexer.Indexer):
         self._types = ('Note', 'Rest', 'Chord')
         self._indexer_func = indexer_func
 
-    # NB: The noterest indexer inherits the run() method from indexer.py
+    def run(self):
+        """
+        Make a new index of the fermatas in the piece.
+
+        :returns: A :class:`DataFrame` with ``u'Fermata'`` where an event 
+            has a fermata, and NaN elsewhere.
+        :rtype: :class:`pandas.DataFrame`
+        """
+        if len(self._score.columns) == 0 or not all(self._score.dtypes == bool):
+            return super(FermataIndexer, self).run()
+        # The fermatas were already found, so this is just a lookup.
+        # Parts without fermatas stay float columns of NaN, like those of the object path.
+        result = pandas.DataFrame(numpy.nan, index=self._score.index, columns=self._score.columns)
+        for i in numpy.flatnonzero(self._score.values.any(axis=0)):
+            col = numpy.empty(len(self._score), dtype=object)
+            col.fill(numpy.nan)
+            col[self._score.iloc[:, i].values] = u'Fermata'
+            result.iloc[:, i] = col
+        if isinstance(self._score.columns, pandas.MultiIndex):
+            labels = self._score.columns.get_level_values(-1)
+        else:
+            labels = self._score.columns
+        return self.make_return(labels, result)
 
@@ -37,14 +37,56 @@ intervals in the same part.
 # disable "string statement has no effect"... it's for sphinx
 # pylint: disable=W0105
 
+import numpy
 import pandas
 from music21 import note, interval, pitch
 from vis.analyzers import indexer
 from itertools import combinations
 
-_names = ('Indexer', 'Parts')
 _memos = {}
 
+def _pair_kernel(uppers, lowers, indexer_func):
+    """
+    Used internally by the :meth:`IntervalIndexer._batch` methods to find the intervals of many 
+    pairs of notes at once. The pairs are given as arrays of the upper and lower notes, which are 
+    stacked so every distinct pair is given to ``indexer_func`` only once.
+
+    :param uppers: The upper notes of each array of pairs.
+    :type uppers: list of :class:`numpy.ndarray`
+    :param lowers: The lower notes, in arrays of the same lengths as ``uppers``.
+    :type lowers: list of :class:`numpy.ndarray`
+    :param function indexer_func: The function that finds the interval of a pair.
+
+    :returns: The intervals of each array of pairs.
+    :rtype: list of :class:`numpy.ndarray`
+    """
+    if len(uppers) == 0:
+        return []
+    lengths = [len(upper) for upper in uppers]
+    both = numpy.concatenate(uppers + lowers)
+    codes, uniques = pandas.factorize(both)
+    # code 0 is NaN, which pandas.factorize() gives the code -1
+    names = numpy.empty(len(uniques) + 1, dtype=object)
+    names[0] = numpy.nan
+    names[1:] = uniques
+    half = len(both) // 2
+    pairs = (codes[:half] + 1) * len(names) + (codes[half:] + 1)
+    distinct, inverse = numpy.unique(pairs, return_inverse=True)
+    found = numpy.empty(len(distinct), dtype=object)
+    found[:] = [indexer_func((names[pair // len(names)], names[pair % len(names)])) for pair in distinct]
+    return numpy.split(found[inverse], numpy.cumsum(lengths)[:-1])
+
+def _as_applied(dframe):
+    """
+    Used internally by the :meth:`IntervalIndexer._batch` methods to give the columns of 
+    ``dframe`` the dtypes that :meth:`~pandas.DataFrame.applymap` would, which makes columns 
+    without any intervals float columns of NaN.
+    """
+    for i in range(len(dframe.columns)):
+        if dframe.iloc[:, i].isnull().all():
+            dframe.iloc[:, i] = dframe.iloc[:, i].astype('float64')
+    return dframe
+
 def real_indexer_func(simultaneity, analysis_type):
     """
     Used internally by the :class:`IntervalIndexer` and 
@@ -495,8 +537,43 @@ class IntervalIndexer(indexer.Indexer):
         post = pandas.concat([pandas.Series(list(zip(df.iloc[:,0].values, df.iloc[:,1].values)), index=df.index) 
                               for df in combos], axis=1).applymap(self._indexer_func)
         labels = ['{},{}'.format(x, y) for x, y in combinations(self._score.columns.get_level_values(1), 2)]
-        post.columns = pandas.MultiIndex.from_product((('interval.IntervalIndexer',), labels), names=_names)
+        return self.make_return(labels, post)
 
+    @classmethod
+    def _batch(cls, scores, settings=None):
+        """
+        Used by :meth:`~vis.analyzers.indexer.Indexer.batch` to find the vertical intervals of 
+        many pieces at once. The note pairs of every voice pair in every piece are stacked, and 
+        the interval of each distinct pair is found once.
+        """
+        indexers = [cls(score, settings) for score in scores]
+        uppers = []
+        lowers = []
+        layouts = []
+        for ind in indexers:
+            filled = ind._score.fillna(method='ffill').values
+            pairs = list(combinations(range(filled.shape[1]), 2))
+            if len(pairs) == 0 or filled.shape[0] == 0:
+                layouts.append(None)  # not a case for batching, so run() handles it
+                continue
+            layouts.append(len(pairs))
+            uppers.extend([filled[:, x].astype(object) for x, _ in pairs])
+            lowers.extend([filled[:, y].astype(object) for _, y in pairs])
+        try:
+            found = _pair_kernel(uppers, lowers, indexers[0]._indexer_func) if uppers else []
+        except TypeError:  # unhashable input, like lists
+            return super(IntervalIndexer, cls)._batch(scores, settings)
+        post = []
+        start = 0
+        for ind, layout in zip(indexers, layouts):
+            if layout is None:
+                post.append(ind.run())
+                continue
+            result = pandas.DataFrame(dict(enumerate(found[start:start + layout])),
+                                      index=ind._score.index, columns=range(layout))
+            start += layout
+            labels = ['{},{}'.format(x, y) for x, y in combinations(ind._score.columns.get_level_values(1), 2)]
+            post.append(ind.make_return(labels, _as_applied(result)))
         return post
 
 
@@ -593,9 +670,42 @@ class HorizontalIntervalIndexer(IntervalIndexer):
                 for x in post]
         post = pandas.concat(post, axis=1).applymap(self._indexer_func)
         part_labels = self._score.columns.get_level_values(1)
-        post.columns = pandas.MultiIndex.from_product((('interval.HorizontalIntervalIndexer',),
-                                                       part_labels), names=_names)
+        return self.make_return(part_labels, post)
 
+    @classmethod
+    def _batch(cls, scores, settings=None):
+        """
+        Used by :meth:`~vis.analyzers.indexer.Indexer.batch` to find the horizontal intervals of 
+        many pieces at once. The pairs of consecutive notes of every part in every piece are 
+        stacked, and the interval of each distinct pair is found once.
+        """
+        indexers = [cls(score, settings) for score in scores]
+        uppers = []
+        lowers = []
+        indices = []
+        for ind in indexers:
+            if len(ind._score.columns) == 0:
+                continue
+            for x in range(len(ind._score.columns)):
+                part = ind._score.iloc[:, x].dropna()
+                uppers.append(part.values[1:].astype(object))
+                lowers.append(part.values[:-1].astype(object))
+                indices.append(part.index[:-1] if ind._settings['horiz_attach_before'] else part.index[1:])
+        try:
+            found = _pair_kernel(uppers, lowers, indexers[0]._indexer_func) if uppers else []
+        except TypeError:  # unhashable input, like lists
+            return super(HorizontalIntervalIndexer, cls)._batch(scores, settings)
+        post = []
+        start = 0
+        for ind in indexers:
+            width = len(ind._score.columns)
+            if width == 0:
+                post.append(ind.run())
+                continue
+            result = pandas.concat([pandas.Series(found[start + x], index=indices[start + x])
+                                    for x in range(width)], axis=1)
+            start += width
+            post.append(ind.make_return(ind._score.columns.get_level_values(1), _as_applied(result)))
         return post
 
 
@@ -632,5 +742,23 @@ class IntervalReindexer(HorizontalIntervalIndexer):
 
         self._indexer_func = indexer_func
 
+    @classmethod
+    def _batch(cls, scores, settings=None):
+        """
+        Used by :meth:`~vis.analyzers.indexer.Indexer.batch`. Reindexing does not stack, so this 
+        runs on every piece in turn.
+        """
+        return indexer.Indexer._batch.__func__(cls, scores, settings)
+
+    def _name(self):
+        """
+        The results keep the name of the indexer whose results are reindexed, so they are labelled
+        and categorized like the results of that indexer with the same settings.
+        """
+        if len(self._score.columns) > 0:
+            return self._score.columns.get_level_values(0)[0]
+        return super(IntervalReindexer, self)._name()
+
     def run(self):
-        return self._score.applymap(self._indexer_func)
+        return self.make_return(self._score.columns.get_level_values(1),
+                                self._score.applymap(self._indexer_func))
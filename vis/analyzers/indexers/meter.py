@@ -36,10 +36,25 @@ Indexers for metric concerns.
 # effect with Sphinx!
 # pylint: disable=W0105
 
+from fractions import Fraction
+import numpy
 import pandas
 from vis.analyzers import indexer
 
 
+def _to_fraction(offset):
+    """
+    Used internally by :class:`DurationIndexer` to make an exact
+    :class:`~fractions.Fraction` of an offset. Fractions are kept as
+    they are. Floats are rounded to the nearest fraction with a
+    denominator of at most 65535, like music21 does with offsets, so
+    that the float of a triplet gives 1/3 and not its binary expansion.
+    """
+    if isinstance(offset, Fraction):
+        return offset
+    return Fraction(offset).limit_denominator(65535)
+
+
 def beatstrength_ind_func(event):
     """
     Used internally by :class:`NoteBeatStrengthIndexer`. Convert
@@ -129,26 +144,59 @@ class DurationIndexer(indexer.Indexer):
         objects. Also unlike most other indexers, this indexer does not have 
         an indexer func.
 
+    :keyword 'dtype': The type of the durations returned. The default, 
+        ``'float64'``, returns ordinary floats. ``'float32'`` halves the 
+        memory used by the results, which helps when keeping durations 
+        for large corpora. ``'fraction'`` returns exact 
+        :class:`fractions.Fraction` objects, so tuplet durations like 
+        1/3 are not rounded.
+    
+    :type 'dtype': str
+
     **Example:**
     
     >>> from vis.models.indexed_piece import Importer
     >>> ip = Importer('pathnameToScore.xml')
     >>> ip.get_data('duration')
+
+    Get exact durations:
+
+    >>> ip.get_data('duration', settings={'dtype': 'fraction'})
     
     """
 
     required_score_type = 'pandas.DataFrame'
+    possible_settings = ['dtype']
+    default_settings = {'dtype': 'float64'}
+
+    _BAD_DTYPE = 'DurationIndexer: "dtype" must be one of "float64", "float32", or "fraction".'
 
-    def __init__(self, score, part_streams):
+    def __init__(self, score, part_streams, settings=None):
         """
         :param score: A :class:`pandas.DataFrame` of the note, rest, and 
             chord objects in a piece.
     
         :type score: :class:`pandas.DataFrame`
 
+        :param part_streams: The part streams of the piece, one per 
+            column of ``score``. Their ``highestTime`` is where the 
+            last event in each part ends.
+
+        :type part_streams: list of :class:`music21.stream.Part`
+
+        :param settings: The only possible setting is 'dtype'.
+
+        :type settings: dict or None
+
         :raises: :exc:`RuntimeError` if ``score`` is the wrong type.
+        :raises: :exc:`RuntimeError` if the 'dtype' setting is invalid.
         
         """
+        self._settings = DurationIndexer.default_settings.copy()
+        if settings is not None:
+            self._settings.update(settings)
+        if self._settings['dtype'] not in ('float64', 'float32', 'fraction'):
+            raise RuntimeError(DurationIndexer._BAD_DTYPE)
 
         super(DurationIndexer, self).__init__(score, None)
         self._types = ('Note', 'Rest', 'Chord')
@@ -158,9 +206,17 @@ class DurationIndexer(indexer.Indexer):
         """
         Make a new index of the piece.
 
+        All the parts are processed at once. For every event, the offset 
+        of the next event in the same part is found with a reversed 
+        running minimum over the row positions of the events, so the 
+        durations are the difference between that offset and the 
+        event's own offset. The last event in each part lasts until the 
+        ``highestTime`` of its part stream.
+
         :returns: The new indices of the durations of each note or rest 
-            event in a score. Note that each item is a float, rather 
-            than the usual basestring.
+            event in a score. Note that each item is a float (or a 
+            :class:`~fractions.Fraction`, depending on the 'dtype' 
+            setting), rather than the usual basestring.
         
         :rtype: :class:`pandas.DataFrame`
         
@@ -168,12 +224,30 @@ class DurationIndexer(indexer.Indexer):
         if len(self._score) == 0: # if there are no notes or rests
             result = self._score.copy()
         else:
-            durations = []
-            for part in range(len(self._score.columns)):
-                indx = self._score.iloc[:, part].dropna().index
-                new = indx.insert(len(indx), self._part_streams[part].highestTime)
-                durations.append(pandas.Series((new[1:] - indx), index=indx))
-            result = pandas.concat(durations, axis=1)
+            events = self._score.notnull().values
+            rows = len(events)
+            # The row of each event, or ``rows`` where a part has no event.
+            positions = numpy.where(events, numpy.arange(rows)[:, None], rows)
+            # The row of the next event in the same part, found by a running minimum from the end.
+            nxt = numpy.empty_like(positions)
+            nxt[-1] = rows
+            nxt[:-1] = numpy.minimum.accumulate(positions[:0:-1], axis=0)[::-1]
+            ends = [self._part_streams[part].highestTime for part in range(len(self._score.columns))]
+            if self._settings['dtype'] == 'fraction':
+                offsets = numpy.array([_to_fraction(x) for x in self._score.index], dtype=object)
+                ends = numpy.array([_to_fraction(x) for x in ends], dtype=object)
+            else:
+                offsets = numpy.asarray(self._score.index, dtype='float64')
+                ends = numpy.asarray(ends, dtype='float64')
+            # Parts with no later event end at their highestTime.
+            nxt_offsets = numpy.where(nxt == rows, ends[None, :], numpy.append(offsets, offsets[-1])[nxt])
+            durs = nxt_offsets - offsets[:, None]
+            if self._settings['dtype'] == 'fraction':
+                durs[~events] = float('nan')
+            else:
+                durs = numpy.where(events, durs, numpy.nan).astype(self._settings['dtype'])
+            result = pandas.DataFrame(durs, index=self._score.index)
+            result = result[events.any(axis=1)]
         return self.make_return(self._score.columns.get_level_values(1), result)
 
 # The MeasureIndexer is still experimental
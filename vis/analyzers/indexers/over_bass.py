@@ -30,6 +30,8 @@
 """
 
 from vis.analyzers import indexer
+import hashlib
+import numpy
 import pandas
 
 
@@ -56,6 +58,24 @@ class OverBassIndexer(indexer.Indexer):
     
     :type 'type': str
 
+    :keyword 'output': How the results are given. The default, 
+        ``'string'``, gives one column where each value is the string 
+        of a tuple of the horizontal event and the intervals above it, 
+        like ``"('P4', 'M3', 'P5')"``. With ``'columns'``, there is one 
+        column for the horizontal event and one for each interval, with 
+        a categorical dtype, so the results can be counted and filtered 
+        without parsing strings.
+    
+    :type 'output': str
+
+    :keyword 'combined key': With the ``'columns'`` output, also add a 
+        ``'Key'`` column with a 64-bit hash of each row. The hash is 
+        computed from the same string as the ``'string'`` output, so it 
+        is the same for the same intervals in every piece. Defaults to 
+        ``False``.
+    
+    :type 'combined key': boolean
+
     **Example:**
 
     >>> from vis.models.indexed_piece import Importer
@@ -76,17 +96,24 @@ class OverBassIndexer(indexer.Indexer):
             ip.get_data('vertical_interval')]
     >>> ob_setts = {'type': 'intervals'}
     >>> ip.get_data('over_bass', data=input_dfs, settings=ob_setts)
+
+    To get one categorical column per interval instead of strings:
+
+    >>> ob_setts = {'type': 'intervals', 'output': 'columns', 'combined key': True}
+    >>> ip.get_data('over_bass', data=input_dfs, settings=ob_setts)
     
     """
 
     required_score_type = 'pandas.DataFrame'
-    possible_settings = ['horizontal', 'type']
+    possible_settings = ['horizontal', 'type', 'output', 'combined key']
 
     _WRONG_HORIZ = ('horizontal setting must be a voice present in' + 
         ' the piece')
     
     _WRONG_TYPE = 'Type given is not found'
 
+    _WRONG_OUTPUT = 'output setting must be "string" or "columns"'
+
     def __init__(self, score, settings=None):
         """
         :param score: The intervals and horizontal events to be used to 
@@ -104,6 +131,9 @@ class OverBassIndexer(indexer.Indexer):
         
         :raises: :exc:`RuntimeError` if the optional setting 
             ``horizontal`` indicates a voice that does not exist
+
+        :raises: :exc:`RuntimeError` if the optional setting ``output`` 
+            is not valid
         
         """
         self._score = pandas.concat(score, axis=1)
@@ -128,6 +158,9 @@ class OverBassIndexer(indexer.Indexer):
 
         self.horizontal_voice = self._settings['horizontal']
 
+        if self._settings.get('output', 'string') not in ('string', 'columns'):
+            raise RuntimeError(self._WRONG_OUTPUT)
+
         self.vert_score = self._score['interval.IntervalIndexer']
 
         super(OverBassIndexer, self).__init__(score, None)
@@ -147,9 +180,12 @@ class OverBassIndexer(indexer.Indexer):
         intervals.append(results.tolist())
 
         for pair in list(self.vert_score.columns.values):
-            if str(self.horizontal_voice) in pair:
+            if str(self.horizontal_voice) in pair.split(','):
                 pairs.append(pair)
 
+        if self._settings.get('output', 'string') == 'columns':
+            return self._run_columns(results, pairs)
+
         for pair in pairs:
             intervals.append(self.vert_score[pair].tolist())
 
@@ -161,3 +197,45 @@ class OverBassIndexer(indexer.Indexer):
 
         return self.make_return(result.columns.values, [result[name] 
             for name in result.columns])
+
+    def _run_columns(self, horizontal, pairs):
+        """
+        Used by :meth:`run` for the ``'columns'`` output. Each column is 
+        made categorical, and the optional combined key is only hashed 
+        once per distinct combination of intervals.
+        """
+        labels = [str(self.horizontal_voice)] + pairs
+        columns = [horizontal.astype('category')]
+        columns.extend(self.vert_score[pair].reindex(self.horiz_score.index).astype('category')
+                       for pair in pairs)
+
+        if self._settings.get('combined key', False):
+            codes = numpy.column_stack([col.cat.codes.values for col in columns])
+            uniques, inverse = _unique_rows(codes)
+            keys = []
+            for row in uniques:
+                name = str(tuple(col.cat.categories[c] if c >= 0 else float('nan')
+                                 for col, c in zip(columns, row)))
+                keys.append(numpy.frombuffer(hashlib.md5(name.encode('utf-8')).digest()[:8],
+                                             dtype='<i8')[0])
+            columns.append(pandas.Series(numpy.array(keys, dtype='int64')[inverse],
+                                         index=self.horiz_score.index))
+            labels.append('Key')
+
+        return self.make_return(labels, columns)
+
+
+def _unique_rows(codes):
+    """
+    Find the distinct rows of a 2-dimensional integer array.
+
+    :returns: The distinct rows and, for every row of ``codes``, the 
+        position of its distinct row.
+    :rtype: 2-tuple of :class:`numpy.ndarray`
+    """
+    if len(codes) == 0:
+        return codes, numpy.zeros(0, dtype=int)
+    codes = numpy.ascontiguousarray(codes)
+    as_void = codes.view(numpy.dtype((numpy.void, codes.dtype.itemsize * codes.shape[1]))).ravel()
+    _, first, inverse = numpy.unique(as_void, return_index=True, return_inverse=True)
+    return codes[first], inverse
@@ -29,7 +29,107 @@
 """
 
 from vis.analyzers import indexer
+from vis.analyzers.indexers.active_voices import voice_mask
+import numpy
 import pandas
+from numpy.lib.stride_tricks import as_strided
+
+
+class Windows(object):
+    """
+    Lazy windows over the rows of a :class:`DataFrame`, as returned by 
+    the :class:`Windexer` when its 'mode' setting is ``'lazy'``. No 
+    window is copied until it is asked for, and the windowed 
+    aggregations are computed with cumulative sums over the whole 
+    :class:`DataFrame` at once.
+
+    **Example:**
+
+    >>> notes = ip.get_data('noterest')
+    >>> windows = ip.get_data('windexer', data=notes, settings={'window_size': 8, 'mode': 'lazy'})
+    >>> windows[3]  # the fourth window, as a DataFrame
+    >>> windows.counts()  # number of events per window in each part
+    >>> windows.active_voices()  # number of parts sounding in each window
+    """
+
+    def __init__(self, score, window_size):
+        """
+        :param score: The results to make windows of.
+        :type score: :class:`pandas.DataFrame`
+        :param int window_size: The number of rows in each window.
+        """
+        self._score = score
+        self.window_size = window_size
+        # the index value of the first row of each window
+        self.index = score.index[:len(self)]
+
+    def __len__(self):
+        return max(len(self._score) - self.window_size + 1, 0)
+
+    def __getitem__(self, i):
+        """
+        Get one window as a :class:`DataFrame`.
+        """
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('window index out of range')
+        return self._score.iloc[i:i + self.window_size]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def values(self):
+        """
+        A read-only strided view of the windows with the shape 
+        ``(windows, window_size, columns)``. The rows of the windowed 
+        :class:`DataFrame` are not copied once per window.
+        """
+        vals = numpy.ascontiguousarray(self._score.values)
+        view = as_strided(vals, shape=(len(self), self.window_size, vals.shape[1]),
+                          strides=(vals.strides[0],) + vals.strides)
+        view.flags.writeable = False
+        return view
+
+    def _rolling_sum(self, mask):
+        """
+        Sum a boolean mask over every window with one cumulative sum.
+        """
+        totals = numpy.vstack((numpy.zeros((1, mask.shape[1]), dtype=int), mask.cumsum(axis=0)))
+        return totals[self.window_size:] - totals[:len(self)]
+
+    def counts(self):
+        """
+        Count the events (the values that are not ``NaN``) in each 
+        column of each window.
+
+        :returns: The counts, with the same columns as the windowed 
+            :class:`DataFrame` and one row per window.
+        :rtype: :class:`pandas.DataFrame`
+        """
+        return pandas.DataFrame(self._rolling_sum(self._score.notnull().values),
+                                index=self.index, columns=self._score.columns)
+
+    def active_voices(self, attacked=False):
+        """
+        Count the voices that sound a note in each window, in the same 
+        way as the :class:`~vis.analyzers.indexers.active_voices.ActiveVoicesIndexer` 
+        counts them at each offset, with 
+        :func:`~vis.analyzers.indexers.active_voices.voice_mask`.
+
+        :param attacked: When true, a voice is only counted if it 
+            attacks a note in the window, rather than if one is sounding.
+        :type attacked: boolean
+
+        :returns: The number of active voices in each window.
+        :rtype: :class:`pandas.Series`
+        """
+        sounding = voice_mask(self._score, attacked).values
+        return pandas.Series((self._rolling_sum(sounding) > 0).sum(axis=1),
+                             index=self.index, name='Active Voices')
+
 
 class Windexer(indexer.Indexer):
     """
@@ -41,6 +141,16 @@ class Windexer(indexer.Indexer):
 
     :type 'window_size': integer
 
+    :keyword 'mode': How the windows are returned. With ``'concat'``, 
+        the default, the windows are copied one after the other into a 
+        single :class:`DataFrame`. ``'multiindex'`` returns the same 
+        rows with a :class:`~pandas.MultiIndex` of the window number 
+        and the original index. ``'lazy'`` returns a :class:`Windows` 
+        object that does not copy the windows and can count events and 
+        active voices per window directly.
+
+    :type 'mode': str
+
     **Example:**
 
     Prepare an indexed piece:
@@ -58,11 +168,12 @@ class Windexer(indexer.Indexer):
     """
 
     required_score_type = 'pandas.DataFrame'
-    possible_settings = ['window_size']
+    possible_settings = ['window_size', 'mode']
 
-    default_settings = {'window_size': 4}
+    default_settings = {'window_size': 4, 'mode': 'concat'}
 
     _BIG_WINDOW = 'Window size is too large'
+    _BAD_MODE = 'Windexer: "mode" must be one of "concat", "multiindex", or "lazy".'
 
     def __init__(self, score, settings=None):
         """
@@ -70,7 +181,8 @@ class Windexer(indexer.Indexer):
         
         :type score: :class:`pandas.DataFrame`
         
-        :param settings: The only possible setting is 'window_size'
+        :param settings: The possible settings are 'window_size' and 
+            'mode'.
         
         :type settings: dict or None
         
@@ -79,43 +191,43 @@ class Windexer(indexer.Indexer):
         
         :raises: :exc:`RuntimeError` if the given window size is too big
         
+        :raises: :exc:`RuntimeError` if the given mode is not valid
+        
         """
 
         self._score = score
 
-        if settings is None:
-            self._settings = Windexer.default_settings
-        elif settings['window_size'] > len(score):
+        self._settings = Windexer.default_settings.copy()
+        if settings is not None:
+            self._settings.update(settings)
+        if self._settings['window_size'] > len(score):
             raise RuntimeError(self._BIG_WINDOW)
-        else:
-            self._settings = settings
+        if self._settings['mode'] not in ('concat', 'multiindex', 'lazy'):
+            raise RuntimeError(self._BAD_MODE)
 
         super(Windexer, self).__init__(score, None)
 
     def run(self):
         """
-        Make a new windowed index of the indexer results.
+        Make a new windowed index of the indexer results. All the 
+        windows are taken from the input in one step.
         
-        :returns: The new windowed DataFrame.
+        :returns: The new windowed DataFrame, or the lazy windows if the 
+            'mode' setting is ``'lazy'``.
         
-        :rtype: :class:`pandas.DataFrame`
+        :rtype: :class:`pandas.DataFrame` or :class:`Windows`
         
         """
-
-        x = 0
-        l = self._settings['window_size'] - 1
-
-        indices = self._score.index.tolist()
-        windowed = pandas.DataFrame(self._score[indices[x]:indices[l]])
-
-        x += 1
-        l += 1
-        
-        while l < len(indices):
-
-            temp = pandas.DataFrame(self._score[indices[x]:indices[l]])
-            windowed = pandas.concat([windowed, temp])
-            x += 1
-            l += 1
+        size = self._settings['window_size']
+        if self._settings['mode'] == 'lazy':
+            return Windows(self._score, size)
+
+        count = len(self._score) - size + 1
+        rows = (numpy.arange(count)[:, None] + numpy.arange(size)[None, :]).ravel()
+        windowed = self._score.iloc[rows]
+        if self._settings['mode'] == 'multiindex':
+            windowed.index = pandas.MultiIndex.from_arrays(
+                [numpy.repeat(numpy.arange(count), size), windowed.index],
+                names=('Window', self._score.index.name))
 
         return windowed
@@ -106,6 +106,7 @@ received {}. Please choose from one of the following: {}.'
         self._mkd = mkd({# Experimenters that can combine results from multiple pieces:
                         ('aggregator', 'aggregator.ColumnAggregator', aggregator.ColumnAggregator): aggregator.ColumnAggregator,
                         ('bar_chart', 'barchart.RBarChart', barchart.RBarChart): barchart.RBarChart,
+                        ('matplotlib_bar_chart', 'barchart.MatplotlibBarChart', barchart.MatplotlibBarChart): barchart.MatplotlibBarChart,
                         ('frequency', 'frequency.FrequencyExperimenter', frequency.FrequencyExperimenter): frequency.FrequencyExperimenter})
         # Only include dendrogram experimenter if scipy and matplotlib were installed
         try:
@@ -0,0 +1,375 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#--------------------------------------------------------------------------------------------------
+# Program Name:           vis
+# Program Description:    Helps analyze music with computers.
+#
+# Filename:               models/analysis_store.py
+# Purpose:                Hold the cached analyses of IndexedPieces within a memory budget.
+#
+# Copyright (C) 2016 Alexander Morgan
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#--------------------------------------------------------------------------------------------------
+"""
+.. codeauthor:: Alexander Morgan
+
+The store that holds the cached analyses of an :class:`~vis.models.indexed_piece.IndexedPiece`.
+
+An :class:`AnalysisStore` behaves like the ``dict`` it replaces, but all the stores in a process
+share one memory budget. When the analyses held in memory exceed the budget, the analyses that are
+cheapest to recompute are evicted first, and the least recently used among those that cost the
+same. The stores also hold the results that
+:meth:`~vis.models.indexed_piece.IndexedPiece.get_data` keeps in its result cache, which have a
+budget of their own, and :meth:`~vis.models.indexed_piece.IndexedPiece.get_data` enforces both
+budgets after every request. Evicted dataframes of strings and numbers are spilled to disk and read back when they are
+needed again; other analyses, like the dataframes of music21 objects, are dropped and recomputed. Only
+the process that spilled an analysis deletes its file, so worker processes forked from it can read
+the analysis back without taking it away from their parent.
+
+**Example:**
+
+>>> from vis.models.analysis_store import AnalysisStore, usage
+>>> AnalysisStore.budget = 500 * 1024 * 1024  # bytes for all pieces
+>>> usage()  # what every piece holds, in memory and on disk
+"""
+
+import os
+import tempfile
+import threading
+import uuid
+import weakref
+import six
+import pandas
+from itertools import count
+
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
+
+
+def _size(value):
+    """
+    Used internally to estimate the memory used by an analysis, in bytes. Dataframes and series
+    are measured with their ``memory_usage()`` method, and lists and dicts of them are added up.
+    Anything else counts as zero bytes.
+    """
+    if isinstance(value, pandas.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pandas.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, dict):
+        return sum([_size(each) for each in six.itervalues(value)])
+    if isinstance(value, (list, tuple)):
+        return sum([_size(each) for each in value])
+    return 0
+
+
+def _spillable(value):
+    """
+    Used internally to know whether an analysis can be spilled to disk. These are the dataframes
+    and series that hold only strings, numbers, and tuples of them, which pickle quickly. Others,
+    like those of music21 objects, cannot.
+    """
+    if isinstance(value, pandas.Series):
+        value = value.to_frame()
+    if not isinstance(value, pandas.DataFrame):
+        return False
+    for i in range(len(value.columns)):
+        col = value.iloc[:, i]
+        if col.dtype != object:
+            continue
+        if not all([isinstance(val, six.string_types + (float, int, tuple)) for val in col.dropna().unique()]):
+            return False
+    return True
+
+
+def _remove_spilled(pathname):
+    """
+    Used internally to delete the file of a spilled analysis, but only in the process that spilled
+    it. Worker processes forked from that process share its stores and their files, so they must
+    leave them for the parent.
+    """
+    if os.path.basename(pathname).startswith('{}-'.format(os.getpid())):
+        try:
+            os.remove(pathname)
+        except OSError:
+            pass
+
+
+class AnalysisStore(MutableMapping):
+    """
+    Hold the cached analyses of one :class:`~vis.models.indexed_piece.IndexedPiece` within the
+    memory budget shared by all the stores in the process.
+    """
+
+    budget = None
+    """
+    The most memory, in bytes, used by the analyses held in memory by all the stores in the
+    process, or ``None`` for no limit.
+    """
+
+    costs = {'m21_objs': 3, 'm21_flags': 3, 'm21_nrc_objs': 3, 'm21_nrc_flags': 3,
+             'm21_nrc_objs_no_tied': 3, 'm21_measure_objs': 2,
+             'noterest': 1, 'multistop': 1, 'measure': 1, 'time_signature': 1, 'fermata': 1,
+             'active_voices': 1, 'beat_strength': 3, 'duration': 2, 'vertical_interval': 3,
+             'horizontal_interval': 3, 'dissonance': 10}
+    """
+    How costly each analysis is to compute again, relative to the others. Analyses with a lower
+    cost are evicted first. Analyses that are not listed cost 1.
+    """
+
+    results_budget = 256 * 1024 * 1024
+    """
+    The most memory, in bytes, used by the results of
+    :meth:`~vis.models.indexed_piece.IndexedPiece.get_data` held in memory by all the stores in the
+    process, or ``None`` for no limit. The least recently used results are dropped first when it is
+    full. Results also count against :attr:`budget`.
+    """
+
+    pinned = ('part_streams',)
+    "Analyses that are never evicted, because they cannot be computed again."
+
+    spill_dir = None
+    """
+    The directory where evicted analyses are spilled. If ``None``, a temporary directory is made
+    the first time it is needed.
+    """
+
+    # All the stores in the process, for the shared budget.
+    _stores = weakref.WeakSet()
+    # Orders the uses of analyses, for the least recently used eviction.
+    _clock = count()
+    # Guards the stores, since IndexedPiece may compute analyses in several threads.
+    _lock = threading.RLock()
+
+    def __init__(self, name=''):
+        """
+        :param str name: The name of the piece whose analyses are held, for :func:`usage`.
+        """
+        super(AnalysisStore, self).__init__()
+        self.name = name
+        self._memory = {}  # analyses held in memory
+        self._sizes = {}  # bytes used by those analyses
+        self._used = {}  # the clock tick of their last use
+        self._spilled = {}  # the pathnames of the analyses spilled to disk
+        self._results = set()  # the keys of the results of get_data()
+        with AnalysisStore._lock:
+            AnalysisStore._stores.add(self)
+
+    def __getitem__(self, key):
+        with AnalysisStore._lock:
+            if key in self._memory:
+                self._used[key] = next(AnalysisStore._clock)
+                return self._memory[key]
+            if key in self._spilled:
+                pathname = self._spilled.pop(key)
+                value = pandas.read_pickle(pathname)
+                _remove_spilled(pathname)
+                result = key in self._results
+                self[key] = value
+                if result:
+                    self._results.add(key)
+                return value
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        with AnalysisStore._lock:
+            self._discard(key)
+            self._memory[key] = value
+            self._sizes[key] = _size(value)
+            self._used[key] = next(AnalysisStore._clock)
+
+    def __delitem__(self, key):
+        with AnalysisStore._lock:
+            if key not in self._memory and key not in self._spilled:
+                raise KeyError(key)
+            self._discard(key)
+
+    def __contains__(self, key):
+        return key in self._memory or key in self._spilled
+
+    def __iter__(self):
+        return iter(list(self._memory) + list(self._spilled))
+
+    def __len__(self):
+        return len(self._memory) + len(self._spilled)
+
+    def __del__(self):
+        for pathname in six.itervalues(self._spilled):
+            _remove_spilled(pathname)
+
+    # Stores are equal only to themselves, so they can be kept in the set of all stores.
+    def __eq__(self, other):
+        return self is other
+
+    def __ne__(self, other):
+        return self is not other
+
+    __hash__ = object.__hash__
+
+    def __getstate__(self):
+        """Spilled analyses are read back so a pickled store holds all of them."""
+        state = self.__dict__.copy()
+        state['_memory'] = dict(self.items())
+        state['_sizes'] = {key: _size(value) for key, value in six.iteritems(state['_memory'])}
+        state['_used'] = {key: self._used.get(key, 0) for key in state['_memory']}
+        state['_spilled'] = {}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__dict__.setdefault('_results', set())  # stores pickled before results were held
+        with AnalysisStore._lock:
+            AnalysisStore._stores.add(self)
+
+    def _discard(self, key):
+        """Forget an analysis, wherever it is held."""
+        self._memory.pop(key, None)
+        self._sizes.pop(key, None)
+        self._used.pop(key, None)
+        self._results.discard(key)
+        if key in self._spilled:
+            _remove_spilled(self._spilled.pop(key))
+
+    def set_result(self, key, value):
+        """
+        Store a result of :meth:`~vis.models.indexed_piece.IndexedPiece.get_data`, which counts
+        against :attr:`results_budget` as well as :attr:`budget`.
+
+        :param str key: The name of the result in this store.
+        :param value: The result.
+        :returns: Whether the result was stored. It is not if it alone is over
+            :attr:`results_budget`.
+        :rtype: bool
+        """
+        size = _size(value)
+        if AnalysisStore.results_budget is not None and size > AnalysisStore.results_budget:
+            return False
+        with AnalysisStore._lock:
+            self[key] = value
+            self._results.add(key)
+        return True
+
+    def resident(self):
+        """
+        Get the analyses held in memory, without reading back those spilled to disk.
+
+        :returns: The analyses held in memory, by name.
+        :rtype: dict
+        """
+        return dict(self._memory)
+
+    def memory_usage(self):
+        """
+        Report the analyses in this store and where they are held.
+
+        :returns: One row per analysis, with its size in bytes (``'Bytes'``), whether it is in
+            ``'memory'`` or on ``'disk'`` (``'Location'``), and its eviction ``'Cost'``.
+        :rtype: :class:`pandas.DataFrame`
+        """
+        keys = sorted(self._memory) + sorted(self._spilled)
+        sizes = [self._sizes[key] if key in self._memory else os.path.getsize(self._spilled[key])
+                 for key in keys]
+        locations = ['memory' if key in self._memory else 'disk' for key in keys]
+        costs = [AnalysisStore.costs.get(key, 1) for key in keys]
+        return pandas.DataFrame({'Bytes': sizes, 'Location': locations, 'Cost': costs},
+                                index=keys, columns=['Bytes', 'Location', 'Cost'])
+
+    def _evict(self, key):
+        """Spill an analysis to disk if possible, otherwise drop it."""
+        value = self._memory.pop(key)
+        del self._sizes[key]
+        del self._used[key]
+        if _spillable(value):
+            # the name records the process that spilled it, which is the only one to delete it
+            pathname = os.path.join(AnalysisStore._get_spill_dir(),
+                                    '{}-{}.pickle'.format(os.getpid(), uuid.uuid4().hex))
+            value.to_pickle(pathname)
+            self._spilled[key] = pathname
+        else:
+            self._results.discard(key)
+
+    @staticmethod
+    def _get_spill_dir():
+        """Find or make the directory where analyses are spilled."""
+        if AnalysisStore.spill_dir is None:
+            AnalysisStore.spill_dir = tempfile.mkdtemp(prefix='vis-')
+        elif not os.path.isdir(AnalysisStore.spill_dir):
+            os.makedirs(AnalysisStore.spill_dir)
+        return AnalysisStore.spill_dir
+
+    @staticmethod
+    def total():
+        """
+        Find the memory used by the analyses held in memory by all the stores in the process.
+
+        :returns: The memory used, in bytes.
+        :rtype: int
+        """
+        with AnalysisStore._lock:
+            return sum([sum(six.itervalues(store._sizes)) for store in list(AnalysisStore._stores)])
+
+    @staticmethod
+    def enforce_budget():
+        """
+        Evict analyses from all the stores until the memory they use is within the budget. The
+        cheapest to recompute are evicted first, then the least recently used. Before that, the
+        least recently used results of :meth:`~vis.models.indexed_piece.IndexedPiece.get_data` are
+        dropped until they are within :attr:`results_budget`.
+
+        The budget is not enforced while analyses are stored, since an analysis may be needed
+        right after its inputs are stored. :meth:`~vis.models.indexed_piece.IndexedPiece.get_data`
+        calls this method once it has its results.
+        """
+        with AnalysisStore._lock:
+            if AnalysisStore.results_budget is not None:
+                results = [(store._used[key], id(store), key, store)
+                           for store in list(AnalysisStore._stores) for key in store._results
+                           if key in store._memory]
+                excess = sum([store._sizes[key] for _, _, key, store in results]) - AnalysisStore.results_budget
+                for _, _, key, store in sorted(results, key=lambda res: res[:2]):
+                    if excess <= 0:
+                        break
+                    excess -= store._sizes[key]
+                    store._discard(key)
+            if AnalysisStore.budget is None:
+                return
+            excess = AnalysisStore.total() - AnalysisStore.budget
+            if excess <= 0:
+                return
+            candidates = [(AnalysisStore.costs.get(key, 1), store._used[key], id(store), key, store)
+                          for store in list(AnalysisStore._stores) for key in store._memory
+                          if key not in AnalysisStore.pinned]
+            for _, _, _, key, store in sorted(candidates, key=lambda cand: cand[:3]):
+                if excess <= 0:
+                    break
+                excess -= store._sizes[key]
+                store._evict(key)
+
+def usage():
+    """
+    Report the analyses held by all the stores in the process, like :meth:`AnalysisStore.memory_usage`.
+
+    :returns: One row per analysis, indexed on the name of the piece and of the analysis.
+    :rtype: :class:`pandas.DataFrame`
+    """
+    with AnalysisStore._lock:
+        stores = [store for store in list(AnalysisStore._stores) if len(store) > 0]
+        if not stores:
+            return pandas.DataFrame(columns=['Bytes', 'Location', 'Cost'])
+        return pandas.concat([store.memory_usage() for store in stores],
+                             keys=[store.name for store in stores], names=['Piece', 'Analysis'])
+
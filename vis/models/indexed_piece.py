@@ -32,6 +32,7 @@ This model represents an indexed and analyzed piece of music.
 # Imports
 import os
 import six
+import hashlib
 import requests
 import warnings
 import json
@@ -40,14 +41,16 @@ import music21.chord as chord
 import pandas
 import numpy
 from six.moves import range, xrange  # pylint: disable=import-error,redefined-builtin
-from music21 import converter, stream, analysis
+from music21 import converter, stream, analysis, expressions
 from vis.models.aggregated_pieces import AggregatedPieces
+from vis.models.analysis_store import AnalysisStore
 from vis.analyzers.experimenter import Experimenter
 from vis.analyzers.experimenters import aggregator, barchart, frequency
-from vis.analyzers.indexer import Indexer
+from vis.analyzers.indexer import Indexer, _categorize
 from vis.analyzers.indexers import noterest, approach, meter, interval, dissonance, fermata, offset, repeat, active_voices, offset, over_bass, contour, ngram, windexer
 from multi_key_dict import multi_key_dict as mkd
-from collections import Counter
+from multiprocessing.pool import ThreadPool
+from collections import Counter, OrderedDict
 
 # Error message when importing doesn't work because of unknown file type
 _UNKNOWN_INPUT = 'This file type was not recognized. The file is probably not \
@@ -56,7 +59,12 @@ a score in symbolic notation.'
 _UNKNOWN_PIECE_TITLE = 'Unknown Piece'
 # Types for noterest indexing
 _noterest_types = ('Note', 'Rest', 'Chord')
+# Columns of the notation flags recorded by _get_m21_objs()
+_flag_columns = ('nrc', 'fermata', 'tie', 'grace', 'articulations')
 _default_interval_setts = {'quality':True, 'directed':True, 'simple or compound':'compound', 'horiz_attach_before': False}
+# Settings of the intervals that the dissonance indexer needs
+_dissonance_horiz_setts = {'quality': False, 'simple or compound': 'compound', 'horiz_attach_before': False}
+_dissonance_vert_setts = {'quality': True, 'simple or compound': 'simple', 'directed': True}
 
 def login_edb(username, password):
     """Return csrf and session tokens for a login."""
@@ -162,26 +170,18 @@ def _get_offsets(event, part):
         if y[0] is part:
             return y[1]
 
-def _eliminate_ties(event):
-    """Gets rid of the notes and rests that have non-start ties. This is used internally for 
-    noterest and beatstrength indexing."""
-    if hasattr(event, 'tie') and event.tie is not None and event.tie.type != 'start':
-        return float('nan')
-    return event
-
-def _type_func_noterest(event):
-    """Used internally by _get_m21_nrc_objs() to filter for just the 'Note', 'Rest', and 'Chord' 
-    objects in a piece."""
-    if any([typ in event.classes for typ in _noterest_types]):
-        return event
-    return float('nan')
-
-
-def _type_func_gracenote(event):
-    """Find gracenotes and filter them from the Noterest dataframe"""
-    if hasattr(event, 'duration') and not event.duration.linked:
-        return float('nan')
-    return event
+def _notation_flags(event):
+    """Used internally by _get_m21_objs() to record, in the same pass that finds the offsets, the 
+    notation of an event that later analyses need. This is a tuple with whether the event is a 
+    note, rest, or chord, whether it has a fermata, its tie type (or None), whether it is a 
+    gracenote, and the class names of its articulations. Other objects only get the first flag."""
+    if not any([typ in event.classes for typ in _noterest_types]):
+        return (False, False, None, False, ())
+    tie = event.tie.type if hasattr(event, 'tie') and event.tie is not None else None
+    grace = hasattr(event, 'duration') and not event.duration.linked
+    fermata = any([isinstance(exp, expressions.Fermata) for exp in event.expressions])
+    articulations = tuple([art.__class__.__name__ for art in event.articulations])
+    return (True, fermata, tie, grace, articulations)
 
 def _type_func_measure(event):
     """Used internally by _get_m21_measure_objs() to filter for just the 'Measure' objects in a 
@@ -241,6 +241,25 @@ def _combine_voices(ser, part):
     # only the rest will be lost even after calling _reinsert_rests().
     return res.apply(_reinsert_rests)
 
+def _combine_flags(flags, index):
+    """Used internally by _get_m21_nrc_objs() to find the notation flags of the chords made by 
+    _combine_voices(), at the offsets in ``index``. An offset with one event keeps its flags. The 
+    flags of the events at the same offset are merged: the chord has a fermata if any of them has 
+    one, keeps their tie type if they all have the same one, and has all their articulations."""
+    at_offset = OrderedDict()
+    for offset, row in zip(flags.index, flags.itertuples(index=False)):
+        at_offset.setdefault(offset, []).append(tuple(row))
+    post = []
+    for offset in index:
+        rows = at_offset.get(offset, [])
+        if len(rows) == 1:
+            post.append(rows[0])
+            continue
+        ties = set([row[2] for row in rows])
+        post.append((True, any([row[1] for row in rows]), ties.pop() if len(ties) == 1 else None,
+                     False, tuple(sorted(set([art for row in rows for art in row[4]])))))
+    return pandas.DataFrame(post, index=index, columns=_flag_columns)
+
 def _attach_before(df):
     """Used internally by _get_horizontal_interval() to change the index values of the cached 
     results of the interval.HorizontalIntervalIndexer so that they start on 0.0 instead of whatever 
@@ -253,6 +272,120 @@ def _attach_before(df):
         re_indexed.append(ser)
     return pandas.concat(re_indexed, axis=1)
 
+def _categorical(results, settings):
+    """Used internally by the methods that cache the results of indexers without settings to honour 
+    the 'categorical' setting of Indexer.make_return(), the only setting they accept. The cached 
+    results are not changed. Raises TypeError for any other setting, like the indexers would."""
+    if settings is None:
+        return results
+    if any([key != 'categorical' for key in settings]):
+        raise TypeError('unexpected settings')
+    if 'categorical' not in settings or len(results.columns) == 0:
+        return results
+    if settings['categorical']:
+        return _categorize(results, results.columns.get_level_values(0)[0])
+    post = results.copy()
+    for label in post.columns:
+        if str(post[label].dtype) == 'category':
+            post[label] = post[label].astype(object)
+    return post
+
+def _fingerprint(data):
+    """
+    Used internally by get_data() to identify the contents of its ``data`` argument for the result 
+    cache. Results of get_data() are identified by their provenance (see provenance()) without 
+    looking at their contents. Other dataframes and series of numbers and strings, and lists and 
+    tuples of them, get the md5 digest of their index, labels, and values; categorical columns are 
+    digested by their categories and codes. Anything else, like 
+    music21 objects, returns None because it cannot be identified cheaply, and results computed 
+    from it are not cached.
+    """
+    if data is None:
+        return 'piece'
+    if isinstance(data, (list, tuple)):
+        parts = [_fingerprint(each) for each in data]
+        return None if None in parts else 'seq:' + ','.join(parts)
+    if provenance(data) is not None:
+        return 'prov:' + provenance(data)
+    if isinstance(data, pandas.Series):
+        data = data.to_frame()
+    if not isinstance(data, pandas.DataFrame):
+        return None
+    digest = hashlib.md5()
+    for axis in (data.index, data.columns):
+        digest.update(repr(axis.tolist()).encode('utf-8'))
+    for i in range(len(data.columns)):
+        values = data.iloc[:, i].values
+        if isinstance(values, pandas.Categorical):  # identified by its categories and codes
+            digest.update(b'category')
+            codes, uniques = values.codes, values.categories.values
+        elif values.dtype != object:
+            digest.update(str(values.dtype).encode('utf-8'))
+            digest.update(numpy.ascontiguousarray(values).view(numpy.uint8))
+            continue
+        else:
+            try:
+                codes, uniques = pandas.factorize(values)
+            except TypeError:  # unhashable objects like lists
+                return None
+        if uniques.dtype == object and not all([isinstance(val, six.string_types + (float,)) for val in uniques]):
+            return None
+        digest.update(repr(uniques.tolist()).encode('utf-8'))
+        digest.update(codes.astype(numpy.int64).view(numpy.uint8))
+    return digest.hexdigest()
+
+def provenance(result):
+    """
+    Find the provenance of a result of :meth:`IndexedPiece.get_data`. This is a fingerprint of the 
+    piece, the analyzer, its settings, and the provenance or contents of its input data, so equal 
+    provenances mean the results were computed in the same way from the same piece. When a result 
+    is passed back to :meth:`~IndexedPiece.get_data` in the ``data`` argument, its provenance 
+    identifies it for the result cache, so chained analyses (like intervals, then n-grams, then 
+    frequencies) are cached without looking at the contents of the intermediate results.
+
+    Only the dataframes and series returned by :meth:`~IndexedPiece.get_data` (or held in a list 
+    it returns) have a provenance; copies and other results derived from them do not, so their 
+    contents are fingerprinted instead. Results modified in place keep their provenance, so do not 
+    modify them if you pass them back to :meth:`~IndexedPiece.get_data`.
+
+    :param result: A result of :meth:`IndexedPiece.get_data`.
+    :type result: :class:`pandas.DataFrame` or :class:`pandas.Series`
+    :returns: The provenance, or None if ``result`` does not have one.
+    :rtype: str or None
+    """
+    if isinstance(result, (pandas.DataFrame, pandas.Series)):
+        return result.__dict__.get('_vis_provenance')
+
+def _set_provenance(results, prov):
+    """Used internally by get_data() to attach a provenance to its results. Each dataframe or 
+    series in a list of results gets its own provenance, derived from that of the list."""
+    if isinstance(results, (pandas.DataFrame, pandas.Series)):
+        # bypass pandas' own __setattr__(), which would look for a column with this name
+        object.__setattr__(results, '_vis_provenance', prov)
+    elif isinstance(results, list):
+        for i, each in enumerate(results):
+            _set_provenance(each, hashlib.md5('{}[{}]'.format(prov, i).encode('utf-8')).hexdigest())
+
+def _canonical(settings):
+    """
+    Used internally by get_data() to make a hashable version of a settings dict for the result 
+    cache, where the order of the keys does not matter. Dataframes among the settings are 
+    identified with _fingerprint(). Returns None if a setting cannot be identified.
+    """
+    if isinstance(settings, dict):
+        items = [(key, _canonical(val)) for key, val in sorted(settings.items())]
+        return None if any([val is None and settings[key] is not None for key, val in items]) else ('dict', tuple(items))
+    if isinstance(settings, (list, tuple)):
+        items = tuple([_canonical(val) for val in settings])
+        return None if any([canon is None and val is not None for canon, val in zip(items, settings)]) else items
+    if isinstance(settings, (pandas.DataFrame, pandas.Series)):
+        return _fingerprint(settings)
+    try:
+        hash(settings)
+    except TypeError:
+        return None
+    return settings
+
 def _find_piece_range(the_score):
 
     p = analysis.discrete.Ambitus()
@@ -293,7 +426,7 @@ def _import_file(pathname, metafile=None):
     score = score.stream
     if isinstance(score, stream.Opus):
         # make an AggregatedPieces object containing IndexedPiece objects of each movement of the opus.
-        score = [IndexedPiece(pathname, opus_id=i) for i in xrange(len(score))]
+        score = [IndexedPiece(pathname, opus_id=i, score=each) for i, each in enumerate(score.scores)]
     elif isinstance(score, stream.Score):
         score = (IndexedPiece(pathname, score=score),)
     for ip in score:
@@ -434,6 +567,38 @@ are not encoded in midi files so VIS currently cannot detect measures in midi fi
     # When metadata()'s "field" is not a string
     _META_INVALID_TYPE = "metadata(): parameter 'field' must be of type 'string'"
 
+    # The analyses that IndexedPiece caches, with the cached analyses each one needs as input. Each 
+    # name is also the key of its results in _analyses, and the analysis is computed by the 
+    # _get_<name>() method. get_data() uses this graph to plan and compute the inputs of a request.
+    _graph = {'part_streams': (),
+              'm21_objs': ('part_streams',),
+              'm21_nrc_objs': ('m21_objs',),
+              'm21_nrc_objs_no_tied': ('m21_nrc_objs',),
+              'm21_measure_objs': ('m21_objs',),
+              'time_signature': ('m21_objs',),
+              'noterest': ('m21_nrc_objs_no_tied',),
+              'multistop': ('m21_nrc_objs_no_tied',),
+              'beat_strength': ('m21_nrc_objs_no_tied',),
+              'fermata': ('m21_nrc_objs_no_tied',),
+              'measure': ('m21_measure_objs',),
+              'duration': ('noterest', 'part_streams'),
+              'active_voices': ('noterest',),
+              'vertical_interval': ('noterest',),
+              'horizontal_interval': ('noterest',),
+              'dissonance_horizontal_interval': ('horizontal_interval',),
+              'dissonance_vertical_interval': ('vertical_interval',),
+              'dissonance': ('beat_strength', 'duration', 'dissonance_horizontal_interval',
+                             'dissonance_vertical_interval'),
+              'offset': ('dissonance', 'duration', 'beat_strength', 'noterest', 'time_signature')}
+
+    # The most analyses computed at the same time when they do not depend on each other. Analyses 
+    # are computed one after the other by default; set this higher to compute them in threads.
+    _threads = 1
+
+    # Analyzers whose results get_data() never keeps in its result cache, because running them 
+    # has effects other than their results (like the files written by the bar chart).
+    _uncached = ('bar_chart', 'matplotlib_bar_chart')
+
     _MISSING_USERNAME = ('You must enter a username to access the elvis database')
     _MISSING_PASSWORD = ('You must enter a password to access the elvis database')
     def __init__(self, pathname='', opus_id=None, score=None, metafile=None, username=None, password=None):
@@ -458,7 +623,8 @@ are not encoded in midi files so VIS currently cannot detect measures in midi fi
 
         super(IndexedPiece, self).__init__()
         self._imported = False
-        self._analyses = {}
+        self._analyses = AnalysisStore(pathname)  # cached analyses, within a memory budget
+        self._cache = {}  # the _analyses key of the results of get_data() by (analyzer, settings, data)
         self._score = score
         self._pathname = pathname
         self._metadata = {}
@@ -488,6 +654,7 @@ are not encoded in midi files so VIS currently cannot detect measures in midi fi
                         # Experimenters (in alphabetical order of their long-format strings):
                         ('aggregator', 'aggregator.ColumnAggregator', aggregator.ColumnAggregator): aggregator.ColumnAggregator,
                         ('bar_chart', 'barchart.RBarChart', barchart.RBarChart): barchart.RBarChart,
+                        ('matplotlib_bar_chart', 'barchart.MatplotlibBarChart', barchart.MatplotlibBarChart): barchart.MatplotlibBarChart,
                         # The dendrogram experimenter should only be used by an AggregatedPieces object
                         ('frequency', 'frequency.FrequencyExperimenter', frequency.FrequencyExperimenter): frequency.FrequencyExperimenter
 						})
@@ -607,38 +774,82 @@ are not encoded in midi files so VIS currently cannot detect measures in midi fi
         if 'm21_objs' not in self._analyses:
             # save the results as a list of series in the indexed_piece attributes
             sers = []
+            flags = []
             for i, p in enumerate(self._get_part_streams()):
                 # NB: since we don't use ActiveSites, not restoring them is a minor speed-up. Also, 
                 # skipSelf will soon change its default to True in music21.
-                ser = pandas.Series(p.recurse(restoreActiveSites=False, skipSelf=True),
-                                    name=self.metadata('parts')[i])
-                ser.index = ser.apply(_get_offsets, args=(p,))
+                events = list(p.recurse(restoreActiveSites=False, skipSelf=True))
+                # find the offsets and the notation flags in the same pass over the events
+                offsets = [_get_offsets(event, p) for event in events]
+                ser = pandas.Series(events, name=self.metadata('parts')[i])
+                ser.index = offsets
                 sers.append(ser)
+                flags.append(pandas.DataFrame([_notation_flags(event) for event in events],
+                                              index=offsets, columns=_flag_columns))
             self._analyses['m21_objs'] = sers
+            self._analyses['m21_flags'] = flags
         return self._analyses['m21_objs']
 
+    def _get_m21_flags(self):
+        """
+        Return the notation flags of every object in the piece, recorded when the objects are 
+        found by _get_m21_objs(). This is a list with one pandas.DataFrame per part, with the same 
+        index as the part's series in _get_m21_objs(), and the columns 'nrc' (whether the object 
+        is a note, rest, or chord), 'fermata', 'tie' (the tie type or None), 'grace', and 
+        'articulations' (a tuple of class names).
+
+        :returns: The notation flags of the objects in each part.
+        :rtype: list of :class:`pandas.DataFrame`
+        """
+        if 'm21_flags' not in self._analyses:
+            self._analyses.pop('m21_objs', None)
+            self._get_m21_objs()
+        return self._analyses['m21_flags']
+
     def _get_m21_nrc_objs(self):
         """
         This method takes a list of pandas.Series of music21 objects in each part in a piece and
         filters them to reveal just the 'Note', 'Rest', and 'Chord' objects. It then aligns these
         events with their offsets, and returns a pandas dataframe where each column has the events 
-        of a single part.
+        of a single part. The notation flags of these events are kept in the same shape in 
+        _analyses['m21_nrc_flags'].
 
         :returns: The note, rest, and chord music21 objects in each part of a piece, aligned with 
             their offsets.
         :rtype: A pandas.DataFrame of music21 note, rest, and chord objects.
         """
         if 'm21_nrc_objs' not in self._analyses:
-            # get rid of all m21 objects that aren't notes, rests, or chords in each part series
-            sers = [s.apply(_type_func_noterest).dropna() for s in self._get_m21_objs()]
-            # get rid of gracenotes because their duration offsets conflict with pandas indexes
-            sers = [s.apply(_type_func_gracenote).dropna() for s in sers]
-            for i, ser in enumerate(sers): # and index  the offsets
-                if not ser.index.is_unique: # the index is often not unique if there is an embedded voice
-                    sers[i] = _combine_voices(ser, self._get_m21_objs()[i])
+            sers = []
+            flags = []
+            for ser, flag in zip(self._get_m21_objs(), self._get_m21_flags()):
+                # keep the notes, rests, and chords, but not the gracenotes because their duration 
+                # offsets conflict with pandas indexes
+                keep = (flag['nrc'] & ~flag['grace']).values
+                ser = ser[keep]
+                flag = flag[keep]
+                if len(ser) == 0: # parts without notes, rests, or chords are empty float columns
+                    ser = ser.astype('float64')
+                elif not ser.index.is_unique: # the index is often not unique if there is an embedded voice
+                    combined = _combine_voices(ser, self._get_m21_objs()[len(sers)])
+                    if combined is not ser: # parts without voices are left as they are
+                        flag = _combine_flags(flag, combined.index)
+                    ser = combined
+                sers.append(ser)
+                flags.append(flag)
             self._analyses['m21_nrc_objs'] = pandas.concat(sers, axis=1)
+            self._analyses['m21_nrc_flags'] = {col: pandas.concat([f[col].rename(s.name) for s, f in zip(sers, flags)], axis=1)
+                                               for col in _flag_columns[1:]}
         return self._analyses['m21_nrc_objs']
 
+    def _get_m21_nrc_flags(self, flag):
+        """Used internally to look up one of the notation flags ('fermata', 'tie', 'grace', or 
+        'articulations') of the note, rest, and chord objects. The result has the same shape as 
+        the dataframe from _get_m21_nrc_objs()."""
+        if 'm21_nrc_flags' not in self._analyses:
+            self._analyses.pop('m21_nrc_objs', None)
+            self._get_m21_nrc_objs()
+        return self._analyses['m21_nrc_flags'][flag]
+
     def _get_m21_nrc_objs_no_tied(self):
         """Used internally by _get_noterest() and _get_multistop(). Returns a pandas dataframe where 
         each column corresponds to one part in the score. Each part has the note, rest, and chord 
@@ -649,15 +860,17 @@ are not encoded in midi files so VIS currently cannot detect measures in midi fi
             if len(self._get_m21_nrc_objs()) == 0: # If parts have no note, rest, or chord events in them
                 self._analyses['m21_nrc_objs_no_tied'] = self._get_m21_nrc_objs()
             else: # This is the normal case.
-                self._analyses['m21_nrc_objs_no_tied'] = self._get_m21_nrc_objs().applymap(_eliminate_ties).dropna(how='all')
+                ties = self._get_m21_nrc_flags('tie')
+                tied = (ties.notnull() & (ties != 'start')).values
+                self._analyses['m21_nrc_objs_no_tied'] = self._get_m21_nrc_objs().mask(tied).dropna(how='all')
         return self._analyses['m21_nrc_objs_no_tied']
 
-    def _get_noterest(self):
+    def _get_noterest(self, settings=None):
         """Used internally by get_data() to cache and retrieve results from the 
-        noterest.NoteRestIndexer."""
+        noterest.NoteRestIndexer. The only setting is 'categorical'."""
         if 'noterest' not in self._analyses:
             self._analyses['noterest'] = noterest.NoteRestIndexer(self._get_m21_nrc_objs_no_tied()).run()
-        return self._analyses['noterest']
+        return _categorical(self._analyses['noterest'], settings)
 
     def _get_multistop(self):
         """Used internally by get_data() to cache and retrieve results from the 
@@ -666,13 +879,16 @@ are not encoded in midi files so VIS currently cannot detect measures in midi fi
             self._analyses['multistop'] = noterest.MultiStopIndexer(self._get_m21_nrc_objs_no_tied()).run()
         return self._analyses['multistop']
 
-    def _get_duration(self, data=None):
+    def _get_duration(self, data=None, settings=None):
         """Used internally by get_data() to cache and retrieve results from the 
         meter.DurationIndexer. The `data` argument should be a 2-tuple where the first element is 
         a dataframe of results with one column per voice (like the noterest indexer) and the second 
-        element is a list of the part streams, one per part."""
+        element is a list of the part streams, one per part. Only the results with the default 
+        settings are cached."""
         if data is not None:
-            return meter.DurationIndexer(data[0], data[1]).run()
+            return meter.DurationIndexer(data[0], data[1], settings).run()
+        elif settings is not None and settings != meter.DurationIndexer.default_settings:
+            return meter.DurationIndexer(self._get_noterest(), self._get_part_streams(), settings).run()
         elif 'duration' not in self._analyses:
             self._analyses['duration'] = meter.DurationIndexer(self._get_noterest(), self._get_part_streams()).run()
         return self._analyses['duration']
@@ -695,12 +911,18 @@ are not encoded in midi files so VIS currently cannot detect measures in midi fi
             self._analyses['beat_strength'] = meter.NoteBeatStrengthIndexer(self._get_m21_nrc_objs_no_tied()).run()
         return self._analyses['beat_strength']
 
-    def _get_fermata(self):
+    def _get_fermata(self, settings=None):
         """Used internally by get_data() to cache and retrieve results from the 
-        fermata.FermataIndexer."""
+        fermata.FermataIndexer. The only setting is 'categorical'."""
         if 'fermata' not in self._analyses:
-            self._analyses['fermata'] = fermata.FermataIndexer(self._get_m21_nrc_objs_no_tied()).run()
-        return self._analyses['fermata']
+            events = self._get_m21_nrc_objs_no_tied()
+            if len(events) == 0:
+                self._analyses['fermata'] = fermata.FermataIndexer(events).run()
+            else: # look up the fermatas recorded with the notation flags
+                flags = self._get_m21_nrc_flags('fermata').loc[events.index]
+                flags = (flags == True) & events.notnull()
+                self._analyses['fermata'] = fermata.FermataIndexer(flags).run()
+        return _categorical(self._analyses['fermata'], settings)
 
     def _get_vertical_interval(self, settings=None):
         """Used internally by get_data() to cache and retrieve results from the 
@@ -741,18 +963,31 @@ are not encoded in midi files so VIS currently cannot detect measures in midi fi
             return post
         return self._analyses['horizontal_interval']
 
-    def _get_dissonance(self):
+    def _get_dissonance_horizontal_interval(self):
+        """Used internally by _get_dissonance() to cache the horizontal intervals that the 
+        dissonance.DissonanceIndexer needs, reindexed from the cached horizontal intervals."""
+        if 'dissonance_horizontal_interval' not in self._analyses:
+            self._analyses['dissonance_horizontal_interval'] = self._get_horizontal_interval(_dissonance_horiz_setts)
+        return self._analyses['dissonance_horizontal_interval']
+
+    def _get_dissonance_vertical_interval(self):
+        """Used internally by _get_dissonance() to cache the vertical intervals that the 
+        dissonance.DissonanceIndexer needs, reindexed from the cached vertical intervals."""
+        if 'dissonance_vertical_interval' not in self._analyses:
+            self._analyses['dissonance_vertical_interval'] = self._get_vertical_interval(_dissonance_vert_setts)
+        return self._analyses['dissonance_vertical_interval']
+
+    def _get_dissonance(self, settings=None):
         """Used internally by get_data() to cache and retrieve results from the 
         dissonance.DissonanceIndexer. This method automatically supplies the input dataframes from 
         the indexed_piece that is the self argument. If you want to call this with indexer results 
-        other than those associated with self, you can call the indexer directly."""
+        other than those associated with self, you can call the indexer directly. The only setting 
+        is 'categorical'."""
         if 'dissonance' not in self._analyses:
-            h_setts = {'quality': False, 'simple or compound': 'compound', 'horiz_attach_before': False}
-            v_setts = setts = {'quality': True, 'simple or compound': 'simple', 'directed': True}
             in_dfs = [self._get_beat_strength(), self._get_duration(),
-                      self._get_horizontal_interval(h_setts), self._get_vertical_interval(v_setts)]
+                      self._get_dissonance_horizontal_interval(), self._get_dissonance_vertical_interval()]
             self._analyses['dissonance'] = dissonance.DissonanceIndexer(in_dfs).run()
-        return self._analyses['dissonance']
+        return _categorical(self._analyses['dissonance'], settings)
 
     def _get_approach(self, data=[], settings=None):
         """Used internally by get_data() as a convenience method to simplify getting results from 
@@ -803,6 +1038,95 @@ are not encoded in midi files so VIS currently cannot detect measures in midi fi
         return self._analyses['time_signature']
 
 
+    def _short_name(self, analyzer_cls):
+        """Used internally to find the short-format string of an analyzer in the _mkd table."""
+        for key in self._mkd.keys():
+            if analyzer_cls in key:
+                return key[0]
+
+    def _plan(self, names):
+        """
+        Used internally to plan the computation of the analyses in ``names``. Analyses that are 
+        cached are not computed again, so neither are the inputs that only they need.
+
+        :param names: The analyses to compute, as keys of :attr:`_graph`.
+        :type names: iterable of str
+        :returns: The analyses to compute in stages. Every analysis depends only on analyses that 
+            are cached or that are in an earlier stage, so those in the same stage can be computed 
+            at the same time.
+        :rtype: list of list of str
+        """
+        stages = {}
+        def stage_of(name):
+            if name in self._analyses:
+                return -1
+            if name not in stages:
+                stages[name] = 1 + max([stage_of(dep) for dep in IndexedPiece._graph[name]] + [-1])
+            return stages[name]
+        for name in names:
+            stage_of(name)
+        post = [[] for _ in range(max(list(stages.values()) + [-1]) + 1)]
+        for name in sorted(stages):
+            post[stages[name]].append(name)
+        return post
+
+    def _compute(self, names):
+        """
+        Used internally to compute and cache the analyses in ``names`` and everything they need, 
+        following the plan from :meth:`_plan`. An input that several analyses share is computed 
+        only once. Analyses are computed one after the other unless :attr:`_threads` is more than 
+        one, in which case those that do not depend on each other are computed at the same time.
+        """
+        for stage in self._plan(names):
+            if len(stage) > 1 and IndexedPiece._threads > 1:
+                pool = ThreadPool(min(len(stage), IndexedPiece._threads))
+                try:
+                    pool.map(lambda name: getattr(self, '_get_' + name)(), stage)
+                finally:
+                    pool.close()
+                    pool.join()
+            else:
+                for name in stage:
+                    getattr(self, '_get_' + name)()
+
+    def explain(self, analyzer_cls):
+        """
+        Show how :meth:`get_data` would get the inputs of an analyzer on this piece, without 
+        computing anything. Analyzers that are not in the analysis graph (those that always need 
+        a ``data`` argument, like the :class:`~vis.analyzers.indexers.ngram.NGramIndexer`) have 
+        no inputs of their own to explain.
+
+        :param analyzer_cls: The analyzer, as for :meth:`get_data`.
+        :type analyzer_cls: str or VIS Indexer or Experimenter class.
+        :returns: One row per analysis involved, in the order they would be computed. The 
+            ``'Stage'`` column gives the stage in which an analysis would be computed (analyses of 
+            the same stage do not depend on each other, so they are computed at the same time when 
+            :attr:`_threads` is more than one) or NaN if it is served from the cache, 
+            the ``'Cached'`` column says whether it is cached, and ``'Inputs'`` lists the analyses 
+            it needs.
+        :rtype: :class:`pandas.DataFrame`
+        :raises: :exc:`KeyError` if the ``analyzer_cls`` is invalid or cannot be found.
+        """
+        if analyzer_cls not in self._mkd:
+            raise KeyError(IndexedPiece._NOT_AN_ANALYZER.format(analyzer_cls, sorted([k[0] for k in self._mkd.keys()])))
+        name = self._short_name(analyzer_cls)
+        if name not in IndexedPiece._graph:
+            return pandas.DataFrame(columns=['Stage', 'Cached', 'Inputs'])
+        involved = []
+        def visit(node):
+            if node not in involved:
+                for dep in IndexedPiece._graph[node]:
+                    if node not in self._analyses:
+                        visit(dep)
+                involved.append(node)
+        visit(name)
+        stages = {node: i for i, stage in enumerate(self._plan([name])) for node in stage}
+        post = pandas.DataFrame({'Stage': [stages.get(node, numpy.nan) for node in involved],
+                                 'Cached': [node in self._analyses for node in involved],
+                                 'Inputs': [', '.join(IndexedPiece._graph[node]) for node in involved]},
+                                index=involved, columns=['Stage', 'Cached', 'Inputs'])
+        return post.sort_values('Stage', kind='mergesort', na_position='first')
+
     def get_data(self, analyzer_cls, data=None, settings=None):
         """
         Get the results of an Experimenter or Indexer run on this :class:`IndexedPiece`.
@@ -813,8 +1137,10 @@ are not encoded in midi files so VIS currently cannot detect measures in midi fi
         :type settings: dict
         :param data: Input data for the analyzer to run. If this is provided for an indexer that 
             normally caches its results (such as the NoteRestIndexer, the DurationIndexer, etc.), 
-            the results will not be cached since it is uncertain if the input passed in the ``data`` 
-            argument was calculated on this indexed_piece.
+            the results will not be stored with the analyses of this piece since it is uncertain if 
+            the input passed in the ``data`` argument was calculated on this indexed_piece. Results 
+            of :meth:`get_data` passed back in ``data`` are recognized by their :func:`provenance`, 
+            so the results computed from them are still kept in the result cache.
         :type data: Depends on the requirement of the analyzer designated by the ``analyzer_cls`` 
             argument. Usually a :class:`pandas.DataFrame` or a list of :class:`pandas.Series`.
         :returns: Results of the analyzer.
@@ -822,6 +1148,15 @@ are not encoded in midi files so VIS currently cannot detect measures in midi fi
         :raises: :exc:`RuntimeWarning` if the ``analyzer_cls`` is invalid or cannot be found.
         :raises: :exc:`RuntimeError` if the first analyzer class in ``analyzer_cls`` does not use
             :class:`~music21.stream.Score` objects, and ``data`` is ``None``.
+
+        .. note:: Results are also kept in a cache keyed by the analyzer, its settings, and the 
+            contents of ``data``, so asking again for the same analysis is free, whatever the 
+            settings. The results are held with the analyses of this piece, so they count against 
+            the memory budget shared by all pieces, and the results of all pieces are also kept 
+            within :attr:`~vis.models.analysis_store.AnalysisStore.results_budget`. Results 
+            computed from inputs that cannot be identified cheaply, like music21 objects, are not 
+            kept. The same object may be returned again, so do not modify results in place; 
+            modify a copy instead.
         """
         if analyzer_cls not in self._mkd: # Make sure the analyzer requested exists.
             raise KeyError(IndexedPiece._NOT_AN_ANALYZER.format(analyzer_cls, sorted([k[0] for k in self._mkd.keys()])))
@@ -830,6 +1165,23 @@ are not encoded in midi files so VIS currently cannot detect measures in midi fi
         if settings is not None:
             args_dict['settings'] = settings
 
+        name = self._short_name(analyzer_cls)
+        key = self._cache_key(name, data, settings)
+        if key in self._cache:
+            if self._cache[key] in self._analyses:
+                results = self._analyses[self._cache[key]]
+                _set_provenance(results, self._provenance(key)) # lost if it was spilled to disk
+                AnalysisStore.enforce_budget()
+                return results
+            del self._cache[key] # it was evicted
+
+        # Compute the cached inputs of the analyzer first, following the analysis graph.
+        if name == 'offset': # only the dynamic setting of the offset indexer needs other analyses
+            if settings is not None and settings.get('quarterLength') == 'dynamic':
+                self._compute(IndexedPiece._graph[name])
+        elif name in IndexedPiece._graph and data is None:
+            self._compute(IndexedPiece._graph[name])
+
         try: # Fetch or calculate the actual results requested.
             if data is None:
                 results = self._mkd[analyzer_cls](**args_dict)
@@ -844,8 +1196,54 @@ are not encoded in midi files so VIS currently cannot detect measures in midi fi
                     break
             raise RuntimeWarning(IndexedPiece._SUPERFLUOUS_OR_INSUFFICIENT_ARGUMENTS.format(analyzer_name))
 
+        if key is not None:
+            _set_provenance(results, self._provenance(key))
+            self._cache_result(key, results)
+        AnalysisStore.enforce_budget()
         return results
 
+    def memory_usage(self):
+        """
+        Report the analyses cached for this piece and the memory they use. Refer to 
+        :mod:`vis.models.analysis_store` for the memory budget shared by all pieces.
+
+        :returns: One row per analysis, with its size in bytes (``'Bytes'``), whether it is held 
+            in ``'memory'`` or was spilled to ``'disk'`` (``'Location'``), and how costly it is to 
+            compute again (``'Cost'``).
+        :rtype: :class:`pandas.DataFrame`
+        """
+        return self._analyses.memory_usage()
+
+    def _cache_key(self, name, data, settings):
+        """Used internally by get_data() to make the result cache key of an analysis, or None if 
+        it should not be cached."""
+        if name in IndexedPiece._uncached:
+            return None
+        data_key = _fingerprint(data)
+        settings_key = _canonical(settings)
+        if data_key is None or (settings_key is None and settings is not None):
+            return None
+        return (name, settings_key, data_key)
+
+    def _provenance(self, key):
+        """Used internally by get_data() to make the provenance of the results with a result cache 
+        key."""
+        identity = (self.metadata('pathname'), self._opus_id) if self.metadata('pathname') else id(self)
+        return hashlib.md5(repr((identity, key)).encode('utf-8')).hexdigest()
+
+    def _cache_result(self, key, results):
+        """Used internally by get_data() to keep results in the result cache. The cache only holds 
+        the key of the results in _analyses, so results that are already stored there are not 
+        kept twice, and the others are stored there as results, within the results budget of 
+        the AnalysisStore."""
+        for stored, cached in six.iteritems(self._analyses.resident()):
+            if results is cached:
+                self._cache[key] = stored
+                return
+        stored = 'result:' + self._provenance(key)
+        if self._analyses.set_result(stored, results):
+            self._cache[key] = stored
+
     def measure_index(self, dataframe):
         """Multi-indexes the index of the passed dataframe by adding the measures to the offsets. 
         The passed dataframe should be of an indexer's results, not an experimenters. Also adds 
@@ -83,11 +83,11 @@ class TestActiveVoicesIndexer(TestCase):
     def test_init1(self):
         """tests that __init__() works with no settings given"""
         actual = active_voices.ActiveVoicesIndexer(self.NOTES)
-        self.assertEqual(actual._settings, {'attacked': False, 'show_all': False})
+        self.assertEqual(actual._settings, {'attacked': False, 'show_all': False, 'bitmask': False})
 
     def test_init2(self):
         """test that __init__() works with all settings given"""
-        settings = {'attacked': True, 'show_all': True}
+        settings = {'attacked': True, 'show_all': True, 'bitmask': True}
         actual = active_voices.ActiveVoicesIndexer(self.NOTES, settings)
         self.assertEqual(actual._settings, settings)
 
@@ -122,5 +122,27 @@ class TestActiveVoicesIndexer(TestCase):
         actual = ip.get_data('active_voices', settings=settings)
         self.assertTrue(actual.equals(self.SHOW_EXPECTED))
 
+    def test_bitmask(self):
+        """tests the ``bitmask`` setting"""
+        notes = pandas.DataFrame({'0': ['C4', None, 'Rest', 'D4'],
+                                  '1': ['Rest', 'E4', None, 'Rest'],
+                                  '2': [None, 'G4', 'Rest', 'G4']},
+                                 index=[0.0, 1.0, 2.0, 3.0])
+        setts = {'bitmask': True, 'show_all': True}
+        actual = active_voices.ActiveVoicesIndexer(notes, setts).run()
+        self.assertEqual([1, 3, 1, 2], actual.iloc[:, 0].tolist())
+        self.assertEqual([1, 7, 2, 5], actual.iloc[:, 1].tolist())
+        self.assertEqual(['Active Voices', 'Voice Mask'], actual.columns.get_level_values(1).tolist())
+        # without show_all, offsets where the voices change but their number doesn't are kept
+        actual = active_voices.ActiveVoicesIndexer(notes, {'bitmask': True}).run()
+        self.assertEqual([0.0, 1.0, 2.0, 3.0], actual.index.tolist())
+
+    def test_voice_mask(self):
+        """tests that voice_mask() finds the sounding voices"""
+        actual = active_voices.voice_mask(self.NOTES, attacked=True)
+        self.assertEqual(actual.shape, self.NOTES.shape)
+        self.assertEqual(self.ATT_EXPECTED.iloc[:, 0].tolist(),
+                         actual.sum(axis=1)[self.ATT_EXPECTED.index].tolist())
+
 
 ACTIVE_VOICES_INDEXER_SUITE = TestLoader().loadTestsFromTestCase(TestActiveVoicesIndexer)
@@ -30,6 +30,7 @@
 
 
 import unittest
+import numpy
 import pandas
 from vis.analyzers.experimenters.aggregator import ColumnAggregator
 
@@ -111,6 +112,26 @@ class TestColumnAggregator(unittest.TestCase):
         self.assertEqual(len(expected), len(actual))
         self.assertSequenceEqual(list(expected), list(actual))
 
+    def test_column_agg_5(self):
+        """ColumnAggregator: that pieces with different labels sum like the concatenated columns,
+        also when the stacked columns are summed in several steps"""
+        dframes = [pandas.DataFrame({'0,1': pandas.Series([i, 2, numpy.nan], index=['m3', 'P{}'.format(i), 'M3']),
+                                     '1,2': pandas.Series([1.0], index=['P{}'.format(i + 1)])})
+                   for i in range(6)]
+        expected = pandas.concat(dframes, axis=1).sum(axis=1, skipna=True)
+        buffer_size = ColumnAggregator._BUFFER_SIZE
+        for size in (buffer_size, 4):
+            try:
+                ColumnAggregator._BUFFER_SIZE = size
+                actual = ColumnAggregator(dframes).run()['aggregator.ColumnAggregator']
+            finally:
+                ColumnAggregator._BUFFER_SIZE = buffer_size
+            self.assertSequenceEqual(list(expected.index), list(actual.index))
+            self.assertEqual(15.0, actual['m3'])
+            self.assertEqual(3.0, actual['P1'])
+            self.assertTrue(numpy.isnan(actual['M3']))
+            self.assertSequenceEqual(list(expected.fillna(-1)), list(actual.fillna(-1)))
+
 
 #--------------------------------------------------------------------------------------------------#
 # Definitions                                                                                      #
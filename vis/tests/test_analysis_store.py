@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#--------------------------------------------------------------------------------------------------
+# Program Name:           vis
+# Program Description:    Helps analyze music with computers.
+#
+# Filename:               controllers_tests/test_analysis_store.py
+# Purpose:                Tests for the memory budget of cached analyses.
+#
+# Copyright (C) 2016 Alexander Morgan
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#--------------------------------------------------------------------------------------------------
+"""Tests for the AnalysisStore and its shared memory budget."""
+
+# pylint: disable=too-many-public-methods
+
+import gc
+import os
+import shutil
+import tempfile
+import pickle
+import weakref
+from unittest import TestCase, TestLoader
+import pandas
+from vis.models.analysis_store import AnalysisStore, usage
+from vis.models.indexed_piece import Importer
+import vis
+VIS_PATH = vis.__path__[0]
+
+
+class TestAnalysisStore(TestCase):
+
+    def setUp(self):
+        self.budget = AnalysisStore.budget
+        self.results_budget = AnalysisStore.results_budget
+        self.spill_dir = AnalysisStore.spill_dir
+        self.stores = AnalysisStore._stores
+        AnalysisStore.spill_dir = tempfile.mkdtemp()
+        AnalysisStore._stores = weakref.WeakSet()  # ignore the pieces of other tests
+        self.strings = pandas.DataFrame({'a': ['C4', 'D4', 'Rest'] * 100, 'b': ['E4'] * 300})
+        self.objects = pandas.DataFrame({'a': [object()] * 300})
+
+    def tearDown(self):
+        shutil.rmtree(AnalysisStore.spill_dir)
+        AnalysisStore.budget = self.budget
+        AnalysisStore.results_budget = self.results_budget
+        AnalysisStore.spill_dir = self.spill_dir
+        AnalysisStore._stores = self.stores
+
+    def test_dict(self):
+        # without a budget, the store behaves like a dict
+        store = AnalysisStore('test')
+        store['noterest'] = self.strings
+        self.assertTrue('noterest' in store)
+        self.assertTrue(store['noterest'] is self.strings)
+        self.assertEqual(['noterest'], list(store))
+        self.assertTrue(store.pop('noterest') is self.strings)
+        self.assertFalse('noterest' in store)
+        self.assertRaises(KeyError, store.__getitem__, 'noterest')
+
+    def test_evict(self):
+        # the cheapest analyses are evicted first, then the least recently used
+        store = AnalysisStore('test')
+        store['dissonance'] = self.strings.copy()
+        store['noterest'] = self.strings.copy()
+        store['fermata'] = self.strings.copy()
+        store['part_streams'] = self.objects
+        store['noterest']  # used more recently than fermata
+        size = store.memory_usage()['Bytes']['noterest']
+        AnalysisStore.budget = AnalysisStore.total() - size
+        AnalysisStore.enforce_budget()
+        actual = store.memory_usage()['Location']
+        self.assertEqual('disk', actual['fermata'])
+        self.assertEqual('memory', actual['noterest'])
+        self.assertEqual('memory', actual['dissonance'])
+        self.assertEqual('memory', actual['part_streams'])  # pinned
+        # spilled analyses are read back when needed
+        self.assertTrue(store['fermata'].equals(self.strings))
+        self.assertEqual('memory', store.memory_usage()['Location']['fermata'])
+        self.assertEqual([], os.listdir(AnalysisStore.spill_dir))
+
+    def test_drop(self):
+        # analyses that cannot be spilled are dropped
+        store = AnalysisStore('test')
+        store['m21_nrc_objs'] = self.objects
+        AnalysisStore.budget = AnalysisStore.total() - 1
+        AnalysisStore.enforce_budget()
+        self.assertFalse('m21_nrc_objs' in store)
+
+    def test_results(self):
+        # the least recently used results are dropped within their own budget
+        store = AnalysisStore('test')
+        store['noterest'] = self.strings.copy()
+        store.set_result('result:1', self.strings.copy())
+        store.set_result('result:2', self.strings.copy())
+        store['result:1']  # used more recently than result:2
+        AnalysisStore.results_budget = store.memory_usage()['Bytes']['result:1']
+        AnalysisStore.enforce_budget()
+        self.assertSequenceEqual(['noterest', 'result:1'], sorted(store))
+        self.assertFalse(store.set_result('result:3', pandas.concat([self.strings] * 2)))
+        self.assertFalse('result:3' in store)
+        # a result spilled to disk is still a result when it is read back
+        AnalysisStore.budget = 0
+        AnalysisStore.enforce_budget()
+        AnalysisStore.budget = None
+        self.assertTrue(store['result:1'].equals(self.strings))
+        AnalysisStore.results_budget = 0
+        AnalysisStore.enforce_budget()
+        self.assertSequenceEqual(['noterest'], list(store))
+
+    def test_pickle(self):
+        # a pickled store holds its spilled analyses
+        store = AnalysisStore('test')
+        store['noterest'] = self.strings
+        AnalysisStore.budget = 0
+        AnalysisStore.enforce_budget()
+        AnalysisStore.budget = None
+        actual = pickle.loads(pickle.dumps(store))
+        self.assertTrue(actual['noterest'].equals(self.strings))
+
+    def test_indexed_piece(self):
+        # a piece computes again what was dropped, and reports its usage
+        ind_piece = Importer(os.path.join(VIS_PATH, 'tests', 'corpus', 'bwv603.xml'))
+        expected = ind_piece.get_data('dissonance')
+        AnalysisStore.budget = 0
+        ind_piece.get_data('noterest')
+        actual = ind_piece.memory_usage()
+        self.assertSequenceEqual(['Bytes', 'Location', 'Cost'], list(actual.columns))
+        self.assertEqual('disk', actual['Location']['dissonance'])
+        self.assertFalse('m21_objs' in actual.index)
+        self.assertTrue(ind_piece.get_data('dissonance').equals(expected))
+        self.assertTrue(ind_piece.get_data('fermata') is not None)
+        AnalysisStore.budget = None
+        self.assertTrue(any(['bwv603.xml' in path for path in usage().index.get_level_values('Piece')]))
+
+    def test_indexed_piece_results(self):
+        # the results of get_data() are freed when they are evicted, and read back when spilled
+        ind_piece = Importer(os.path.join(VIS_PATH, 'tests', 'corpus', 'bwv603.xml'))
+        setts = {'quality': 'chromatic', 'simple or compound': 'simple'}
+        dropped = weakref.ref(ind_piece.get_data('horizontal_interval', settings=setts))
+        AnalysisStore.results_budget = 0
+        AnalysisStore.enforce_budget()
+        gc.collect()  # dataframes may be in reference cycles
+        self.assertIsNone(dropped())
+        AnalysisStore.results_budget = self.results_budget
+        expected = ind_piece.get_data('vertical_interval', settings=setts)
+        spilled = weakref.ref(expected)
+        del expected
+        AnalysisStore.budget = 0
+        AnalysisStore.enforce_budget()
+        AnalysisStore.budget = None
+        gc.collect()
+        self.assertIsNone(spilled())
+        self.assertEqual('disk', ind_piece.memory_usage()['Location'][ind_piece._cache[
+            ind_piece._cache_key('vertical_interval', None, setts)]])
+        actual = ind_piece.get_data('vertical_interval', settings=setts)
+        self.assertTrue(actual.equals(ind_piece.get_data('vertical_interval', settings=setts)))
+
+
+#-------------------------------------------------------------------------------------------------#
+# Definitions                                                                                     #
+#-------------------------------------------------------------------------------------------------#
+ANALYSIS_STORE_SUITE = TestLoader().loadTestsFromTestCase(TestAnalysisStore)
@@ -26,6 +26,8 @@
 from unittest import TestCase, TestLoader
 import pandas
 from vis.analyzers.indexers import approach
+from vis.models.aggregated_pieces import AggregatedPieces
+from vis.models.indexed_piece import IndexedPiece
 
 
 def make_dataframe(labels, indices, name):
@@ -123,6 +125,29 @@ class TestApproachIndexer(TestCase):
         actual = approach.ApproachIndexer(lyst, settings).run()
         self.assertTrue(actual.equals(APPROACH))
 
+    def test_approach3(self):
+        """tests that an approach longer than the music before its fermata starts at the beginning"""
+        settings = {'length': 5}
+        actual = approach.ApproachIndexer(lyst, settings).run()
+        self.assertEqual([1.0, 3.0, 6.5], actual.index.tolist())
+        self.assertEqual(4, len(actual.iloc[0, 0]))
+        self.assertEqual(5, len(actual.iloc[1, 0]))
+
+    def test_aggregated(self):
+        """tests that the approaches of many pieces can be found with the same settings"""
+        pieces = []
+        for x in range(3):
+            ip = IndexedPiece()
+            ip._analyses['fermata'] = FERMS
+            pieces.append(ip)
+        settings = {'length': 2}
+        actual = AggregatedPieces(pieces=pieces).get_data('approach', data=[[EXPECTED]] * 3,
+                                                          settings=settings)
+        self.assertEqual(3, len(actual))
+        for df in actual:
+            self.assertTrue(df.equals(APPROACH))
+        self.assertEqual({'length': 2}, settings)
+
 #--------------------------------------------------------------------------------------------------#
 # Definitions                                                                                      #
 #--------------------------------------------------------------------------------------------------#
@@ -29,7 +29,9 @@
 # pylint: disable=protected-access
 
 import os
+import shutil
 import subprocess
+import tempfile
 import unittest
 import six
 if six.PY3:
@@ -174,7 +176,79 @@ class TestRBarChart(unittest.TestCase):
         mock_subpro.assert_called_once_with(expected_call)
 
 
+class TestMatplotlibBarChart(unittest.TestCase):
+    """Tests for the barchart.MatplotlibBarChart experimenter."""
+
+    def setUp(self):
+        """make a directory for the charts"""
+        self.directory = tempfile.mkdtemp()
+        self.freqs = pandas.DataFrame({'freq': pandas.Series([3, 12, 7], index=['P5', 'M3', 'm3']),
+                                       'other': pandas.Series([1, 2, 3], index=['P5', 'M3', 'm3'])})
+
+    def tearDown(self):
+        """remove the charts"""
+        shutil.rmtree(self.directory)
+
+    def test_init_1(self):
+        """That __init__() raises RuntimeError without 'pathname' or with an invalid 'type'."""
+        self.assertRaises(RuntimeError, barchart.MatplotlibBarChart, self.freqs, {'type': 'png'})
+        self.assertRaises(RuntimeError, barchart.MatplotlibBarChart, self.freqs,
+                          {'pathname': 'chart', 'type': 'tiff'})
+        actual = barchart.MatplotlibBarChart(self.freqs, {'pathname': 'chart', 'nr_pieces': 2})
+        self.assertEqual('2', actual._settings['nr_pieces'])
+        self.assertEqual('png', actual._settings['type'])
+
+    def test_labels(self):
+        """That the axis label and title are those of the R script."""
+        self.assertEqual(('Objects', 'Object Frequency'), barchart._labels('objects', None))
+        self.assertEqual(('Intervals', 'Interval Frequency for One Piece'), barchart._labels('interval', '1'))
+        self.assertEqual(('3-Grams', '3-Gram Frequency for 12 Pieces'), barchart._labels('3-gram', '12'))
+
+    def test_run_1(self):
+        """That run() writes the chart of the 'freq' column, without calling Rscript."""
+        setts = {'pathname': os.path.join(self.directory, 'chart'), 'token': 'interval'}
+        with mock.patch('vis.analyzers.experimenters.barchart.subprocess.check_output') as mock_subpro:
+            actual = barchart.MatplotlibBarChart(self.freqs, setts).run()
+        self.assertEqual(0, mock_subpro.call_count)
+        self.assertEqual(setts['pathname'] + '.png', actual)
+        with open(actual, 'rb') as chart:
+            self.assertEqual(b'\x89PNG', chart.read(4))
+
+    def test_run_2(self):
+        """That run() uses the 'column' and 'type' settings."""
+        setts = {'pathname': os.path.join(self.directory, 'chart'), 'column': 'other', 'type': 'svg'}
+        actual = barchart.MatplotlibBarChart(self.freqs, setts).run()
+        self.assertEqual(setts['pathname'] + '.svg', actual)
+        with open(actual) as chart:
+            contents = chart.read()
+        self.assertTrue('<svg' in contents)
+        self.assertTrue('Object Frequency' in contents)
+
+    def test_batch_1(self):
+        """That batch() writes one chart per inputted DataFrame."""
+        setts = {'pathname': os.path.join(self.directory, 'piece'), 'type': 'pdf'}
+        actual = barchart.MatplotlibBarChart.batch([self.freqs, self.freqs * 2], setts)
+        self.assertEqual([setts['pathname'] + '-0.pdf', setts['pathname'] + '-1.pdf'], actual)
+        for each in actual:
+            with open(each, 'rb') as chart:
+                self.assertEqual(b'%PDF', chart.read(4))
+
+    def test_batch_2(self):
+        """That batch() writes one chart per column of a DataFrame, named with the column's
+        label, or with the given keys."""
+        freqs = self.freqs.copy()
+        freqs.columns = pandas.MultiIndex.from_tuples([('frequency.FrequencyExperimenter', '0,1'),
+                                                       ('frequency.FrequencyExperimenter', '1,2')])
+        setts = {'pathname': os.path.join(self.directory, 'pair')}
+        actual = barchart.MatplotlibBarChart.batch(freqs, setts)
+        self.assertEqual([setts['pathname'] + '-0,1.png', setts['pathname'] + '-1,2.png'], actual)
+        self.assertTrue(all([os.path.exists(each) for each in actual]))
+        actual = barchart.MatplotlibBarChart.batch(freqs, setts, keys=['low', 'high'])
+        self.assertEqual([setts['pathname'] + '-low.png', setts['pathname'] + '-high.png'], actual)
+
+
 #--------------------------------------------------------------------------------------------------#
 # Definitions                                                                                      #
 #--------------------------------------------------------------------------------------------------#
 R_BAR_CHART_SUITE = unittest.TestLoader().loadTestsFromTestCase(TestRBarChart)
+MATPLOTLIB_BAR_CHART_SUITE = unittest.TestLoader().loadTestsFromTestCase(TestMatplotlibBarChart)
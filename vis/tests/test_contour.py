@@ -26,9 +26,16 @@
 
 # pylint: disable=too-many-public-methods
 
+import os
 from unittest import TestCase, TestLoader
 import pandas
 from vis.analyzers.indexers import contour
+from vis.models.aggregated_pieces import AggregatedPieces
+from vis.models.indexed_piece import Importer
+
+# find the pathname of the 'vis' directory
+import vis
+VIS_PATH = vis.__path__[0]
 
 
 def make_dataframe(labels, indices, name):
@@ -115,5 +122,69 @@ class TestContourIndexer(TestCase):
         comparison = contour.compare(matrix1, matrix2)
         self.assertEqual(0.8, comparison)
 
+    def test_cseg_array(self):
+        """tests that every window's contour is computed at once"""
+        heights = contour.pitch_heights(['D5', 'E5', 'E5', 'D5', 'B3'])
+        actual = contour.cseg_array(heights, 3)
+        self.assertEqual([[0, 1, 1], [1, 1, 0], [2, 1, 0]], actual.tolist())
+        self.assertEqual((0, 6), contour.cseg_array(heights, 6).shape)
+
+    def test_enharmonic_heights(self):
+        """tests that enharmonic spellings have the same height"""
+        self.assertEqual('[1, 0, 0]', contour.getContour(['D4', 'C4', 'B#3']))
+
+    def test_com_array(self):
+        """tests that COM_array() matches COM_matrix()"""
+        signs = {'0': 0, '-': -1, '+': 1}
+        expected = [[signs[x] for x in row] for row in matrix1]
+        self.assertEqual(expected, contour.COM_array([4, 0, 1, 3, 2]).tolist())
+
+    def test_compare_arrays(self):
+        """tests that compare_arrays() matches compare(), also for stacked matrices"""
+        com1 = contour.COM_array([4, 0, 1, 3, 2])
+        com2 = contour.COM_array([4, 1, 2, 3, 0])
+        self.assertAlmostEqual(0.8, contour.compare_arrays(com1, com2))
+        both = contour.COM_array([[4, 0, 1, 3, 2], [4, 1, 2, 3, 0]])
+        self.assertEqual([0.8, 1.0], contour.compare_arrays(both, com2).round(6).tolist())
+
+
+class TestContourIndex(TestCase):
+
+    def test_query(self):
+        """tests that the most similar passages come first"""
+        index = contour.ContourIndex()
+        index.add('a', EXPECTED)
+        self.assertEqual(7, len(index))
+        actual = index.query([5, 9, 9], n=None)
+        self.assertEqual(7, len(actual))
+        self.assertEqual('[0, 1, 1]', actual['Contour'][0])
+        self.assertEqual(1.0, actual['Similarity'][0])
+        self.assertEqual(('a', '0', 1.0), tuple(actual.iloc[0][['Piece', 'Part', 'Offset']]))
+        self.assertTrue(actual['Similarity'][1] < 1.0)
+        self.assertEqual(sorted(actual['Similarity'], reverse=True), actual['Similarity'].tolist())
+
+    def test_query_limits(self):
+        """tests the n and threshold arguments"""
+        index = contour.ContourIndex()
+        index.add('a', EXPECTED)
+        self.assertEqual(3, len(index.query('[1, 1, 0]', n=3)))
+        actual = index.query('[1, 1, 0]', n=None, threshold=1.0)
+        self.assertEqual(['[1, 1, 0]'] * 2, actual['Contour'].tolist())
+
+    def test_from_pieces(self):
+        """tests that an index can be built from an AggregatedPieces"""
+        pieces = AggregatedPieces(pieces=[Importer(os.path.join(VIS_PATH, 'tests', 'corpus', 'bwv77.mxl'))])
+        index = contour.ContourIndex.from_pieces(pieces, 4)
+        actual = index.query('[0, 1, 3, 2]', n=None, threshold=1.0)
+        self.assertTrue(len(actual) > 0)
+        self.assertEqual({0}, set(actual['Piece']))
+
+    def test_wrong_length(self):
+        """tests that contours of another length are refused"""
+        index = contour.ContourIndex()
+        index.add('a', EXPECTED)
+        self.assertRaises(RuntimeError, index.query, [0, 1])
+
 
 CONTOUR_INDEXER_SUITE = TestLoader().loadTestsFromTestCase(TestContourIndexer)
+CONTOUR_INDEX_SUITE = TestLoader().loadTestsFromTestCase(TestContourIndex)
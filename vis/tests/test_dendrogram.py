@@ -28,8 +28,18 @@
 Tests for the "dendrogram" experimenters.
 """
 
+import os
+import shutil
+import tempfile
 import unittest
+import six
+if six.PY3:
+    from unittest import mock
+else:
+    import mock
+import numpy
 import pandas
+from scipy import sparse
 from vis.analyzers.experimenters import dendrogram
 
 list_of_3_series_a = [pandas.Series([1, 1, 1], index=['A', 'B', 'C']),
@@ -189,7 +199,131 @@ class TestHierarchicalClusterer(unittest.TestCase):
                     'icoord': [[15.0, 15.0, 25.0, 25.0], [5.0, 5.0, 20.0, 20.0]]}
         self.assertEqual(expected, actual)
 
+
+class TestPairCompare(unittest.TestCase):
+    """Tests for HierarchicalClusterer.pair_compare() with the settings dictionary."""
+
+    def test_pair_compare_1(self):
+        """That pair_compare() gives the same dissimilarities with one metric."""
+        actual = dendrogram.HierarchicalClusterer([list_of_3_series_a]).pair_compare()
+        expected = [16.666666666666675, 16.666666666666675, 33.333333333333336]
+        self.assertIsInstance(actual, list)
+        for exp, act in zip(expected, actual):
+            self.assertAlmostEqual(exp, act)
+
+    def test_pair_compare_2(self):
+        """That pair_compare() fills in the observations missing from some of the analyses."""
+        actual = dendrogram.HierarchicalClusterer([list_of_3_series_b]).pair_compare()
+        expected = [50.0, 83.333333333333343, 83.333333333333343]
+        for exp, act in zip(expected, actual):
+            self.assertAlmostEqual(exp, act)
+
+    def test_pair_compare_3(self):
+        """That pair_compare() combines two metrics according to their weights."""
+        setts = {'weights': (.8, .2)}
+        actual = dendrogram.HierarchicalClusterer([list_of_3_series_a, list_of_3_series_b], setts).pair_compare()
+        expected = [23.333333333333339, 30.000000000000007, 43.333333333333343]
+        for exp, act in zip(expected, actual):
+            self.assertAlmostEqual(exp, act)
+
+    def test_pair_compare_4(self):
+        """That pair_compare() gives the same dissimilarities as comparing the pieces one pair at a
+        time when the pieces share only some of their observations."""
+        sers = [pandas.Series([i % 3 + 1, i % 5 + 1, i % 7 + 1], index=['A', 'B', str(i)]) for i in range(7)]
+        expected = []
+        for j in range(7):
+            for k in range(j + 1, 7):
+                pair = pandas.concat([sers[j], sers[k]], axis=1).fillna(0)
+                pair = pair / pair.sum()
+                expected.append((1 - pair.min(axis=1).sum()) * 100)
+        actual = dendrogram.HierarchicalClusterer([sers]).pair_compare()
+        self.assertEqual(21, len(actual))
+        for exp, act in zip(expected, actual):
+            self.assertAlmostEqual(exp, act)
+
+    def test_profiles(self):
+        """That _profiles() makes a sparse matrix over the vocabulary shared by the pieces."""
+        actual = dendrogram.HierarchicalClusterer([list_of_3_series_b])._profiles(0)
+        self.assertTrue(sparse.isspmatrix_csr(actual))
+        self.assertEqual((3, 6), actual.shape)
+        self.assertEqual(9, actual.nnz)
+        for row in range(3):
+            self.assertAlmostEqual(1.0, actual[row].sum())
+
+class TestClusteringAndRendering(unittest.TestCase):
+    """Tests for the HierarchicalClusterer methods that cluster and render separately."""
+
+    def setUp(self):
+        """make a directory for the dendrograms"""
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """remove the dendrograms"""
+        shutil.rmtree(self.directory)
+
+    def test_import(self):
+        """That importing the dendrogram module doesn't import pyplot."""
+        self.assertFalse(hasattr(dendrogram, 'plt'))
+
+    def test_distances(self):
+        """That distances() compares the pieces only once, and that pair_compare() weights them."""
+        clusterer = dendrogram.HierarchicalClusterer([list_of_3_series_a, list_of_3_series_b],
+                                                     {'weights': (.8, .2)})
+        with mock.patch('vis.analyzers.experimenters.dendrogram._condensed_overlap',
+                        wraps=dendrogram._condensed_overlap) as mock_overlap:
+            first = clusterer.distances()
+            clusterer.pair_compare()
+            clusterer.linkages([(.5, .5), (1.0, 0.0)])
+        self.assertEqual(2, mock_overlap.call_count)
+        self.assertEqual(2, len(first))
+        for exp, act in zip([16.666666666666675, 16.666666666666675, 33.333333333333336], first[0] * 100):
+            self.assertAlmostEqual(exp, act)
+
+    def test_linkages(self):
+        """That linkages() gives the linkage matrix of every combination of weights and types."""
+        sers = [list_of_3_series_a, list_of_3_series_b]
+        clusterer = dendrogram.HierarchicalClusterer(sers, {'weights': (.8, .2)})
+        actual = clusterer.linkages([(.8, .2), (1.0, 0.0)], ['average', 'single'])
+        self.assertEqual([((.8, .2), 'average'), ((.8, .2), 'single'), ((1.0, 0.0), 'average'),
+                          ((1.0, 0.0), 'single')], list(actual.keys()))
+        numpy.testing.assert_array_almost_equal(clusterer.linkage_matrix(), actual[((.8, .2), 'average')])
+        expected = dendrogram.HierarchicalClusterer([list_of_3_series_a]).linkage_matrix()
+        numpy.testing.assert_array_almost_equal(expected, actual[((1.0, 0.0), 'average')])
+        self.assertRaises(RuntimeWarning, clusterer.linkages, [(.5, .2)])
+
+    def test_run_1(self):
+        """That run() returns the dendrogram data without drawing."""
+        setts = {'graph_settings': {'return_data': True, 'interactive_dendrogram': False}}
+        actual = dendrogram.HierarchicalClusterer([list_of_3_series_a], setts).run()
+        self.assertEqual(['3', '1', '2'], actual['ivl'])
+        self.assertAlmostEqual(25.0, actual['dcoord'][1][1])
+
+    def test_run_2(self):
+        """That run() saves a dendrogram without pyplot when it isn't interactive."""
+        filename = os.path.join(self.directory, 'dendro.png')
+        setts = {'graph_settings': {'interactive_dendrogram': False, 'filename_and_type': filename}}
+        with mock.patch('matplotlib.pyplot.figure') as mock_figure:
+            dendrogram.HierarchicalClusterer([list_of_3_series_a], setts).run()
+        self.assertEqual(0, mock_figure.call_count)
+        with open(filename, 'rb') as dendro:
+            self.assertEqual(b'\x89PNG', dendro.read(4))
+
+    def test_render_batch(self):
+        """That render_batch() saves every dendrogram and returns their data."""
+        clusterer = dendrogram.HierarchicalClusterer([list_of_3_series_a, list_of_3_series_b],
+                                                     {'weights': (.8, .2)})
+        linkages = clusterer.linkages([(.8, .2), (0.0, 1.0)])
+        filenames = [os.path.join(self.directory, 'one.pdf'), os.path.join(self.directory, 'two')]
+        actual = clusterer.render_batch(list(linkages.values()), filenames)
+        self.assertEqual(2, len(actual))
+        self.assertEqual(3, len(actual[0]['ivl']))
+        with open(filenames[0], 'rb') as dendro:
+            self.assertEqual(b'%PDF', dendro.read(4))
+        self.assertTrue(os.path.exists(filenames[1] + '.png'))
+
 #--------------------------------------------------------------------------------------------------#
 # Definitions                                                                                      #
 #--------------------------------------------------------------------------------------------------#
 DENDROGRAM_SUITE = unittest.TestLoader().loadTestsFromTestCase(TestHierarchicalClusterer)
+DENDROGRAM_PAIR_COMPARE_SUITE = unittest.TestLoader().loadTestsFromTestCase(TestPairCompare)
+DENDROGRAM_RENDERING_SUITE = unittest.TestLoader().loadTestsFromTestCase(TestClusteringAndRendering)
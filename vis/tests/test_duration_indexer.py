@@ -30,6 +30,7 @@
 
 import os
 import unittest
+from fractions import Fraction
 import six
 import pandas
 from music21 import converter, stream, clef, bar, note
@@ -167,6 +168,51 @@ class TestDurationIndexer(unittest.TestCase):
         actual = ip.get_data('duration').iloc[:, [0, 3]].dropna(how='all')
         self.assertTrue(actual.equals(expected))
 
+    def test_duration_indexer_7(self):
+        # float32 results hold the same values as the default float64 results
+        ip = Importer(os.path.join(VIS_PATH, 'tests', 'corpus/bwv603.xml'))
+        expected = ip.get_data('duration')
+        actual = ip.get_data('duration', settings={'dtype': 'float32'})
+        self.assertTrue((actual.dtypes == 'float32').all())
+        self.assertTrue(actual.astype('float64').equals(expected))
+
+    def test_duration_indexer_8(self):
+        # Exact fractions, including a triplet, and a part whose last event ends before the others
+        test_parts = [stream.Part(), stream.Part()]
+        for i in range(3):
+            test_parts[0].append(note.Note('C4', quarterLength=Fraction(1, 3)))
+        test_parts[0].append(note.Note('D4', quarterLength=1.0))
+        test_parts[1].append(note.Note('E4', quarterLength=1.0))
+        in_df = pandas.DataFrame({'0': pandas.Series(['C4', 'C4', 'C4', 'D4'],
+                                                     index=[0.0, Fraction(1, 3), Fraction(2, 3), 1.0]),
+                                  '1': pandas.Series(['E4'], index=[0.0])})
+        in_df.columns = pandas.MultiIndex.from_product([('noterest.NoteRestIndexer',), ('0', '1')])
+        actual = meter.DurationIndexer(in_df, test_parts, {'dtype': 'fraction'}).run()
+        self.assertEqual([Fraction(1, 3)] * 3 + [Fraction(1)], actual.iloc[:, 0].tolist())
+        self.assertEqual(Fraction(1), actual.iloc[0, 1])
+        self.assertTrue(actual.iloc[1:, 1].isnull().all())
+
+    def test_duration_indexer_9(self):
+        # Invalid dtype setting
+        self.assertRaises(RuntimeError, meter.DurationIndexer, pandas.DataFrame(), [],
+                          {'dtype': 'int8'})
+        # Non-default settings are not cached
+        ip = Importer(os.path.join(VIS_PATH, 'tests', 'corpus/bwv603.xml'))
+        ip.get_data('duration', settings={'dtype': 'float32'})
+        self.assertTrue('duration' not in ip._analyses.keys())
+
+    def test_duration_indexer_10(self):
+        # Exact fractions of float offsets, like those of triplets in a score
+        test_parts = [stream.Part()]
+        for i in range(3):
+            test_parts[0].append(note.Note('C4', quarterLength=Fraction(1, 3)))
+        test_parts[0].append(note.Note('D4', quarterLength=1.0))
+        in_df = pandas.DataFrame({'0': pandas.Series(['C4', 'C4', 'C4', 'D4'],
+                                                     index=[0.0, 1.0 / 3, 2.0 / 3, 1.0])})
+        in_df.columns = pandas.MultiIndex.from_product([('noterest.NoteRestIndexer',), ('0',)])
+        actual = meter.DurationIndexer(in_df, test_parts, {'dtype': 'fraction'}).run()
+        self.assertEqual([Fraction(1, 3)] * 3 + [Fraction(1)], actual.iloc[:, 0].tolist())
+
 
 #--------------------------------------------------------------------------------------------------#
 # Definitions                                                                                      #
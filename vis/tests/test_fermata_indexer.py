@@ -66,6 +66,15 @@ class AllVoiceFermatas(TestCase):
         actual = ind_piece._get_fermata()
         self.assertTrue(actual['fermata.FermataIndexer'].equals(expected))
 
+    def test_fermata_indexer_3(self):
+        """flags input; the same result as with the music21 objects"""
+        ind_piece = Importer(os.path.join(VIS_PATH, 'tests', 'corpus', 'test_fermata_rest.xml'))
+        events = ind_piece._get_m21_nrc_objs_no_tied()
+        expected = fermata.FermataIndexer(events).run()
+        flags = ind_piece._get_m21_nrc_flags('fermata').loc[events.index] == True
+        actual = fermata.FermataIndexer(flags).run()
+        self.assertTrue(actual.equals(expected))
+
 #-------------------------------------------------------------------------------------------------#
 # Definitions                                                                                     #
 #-------------------------------------------------------------------------------------------------#
@@ -28,11 +28,15 @@
 # pylint: disable=too-many-instance-attributes
 
 
+import os
+import subprocess
+import sys
 import unittest
 import six
 import numpy
 import pandas
-from vis.analyzers.experimenters.frequency import FrequencyExperimenter
+import vis
+from vis.analyzers.experimenters.frequency import FrequencyExperimenter, SpaceSaving, CountMin
 
 
 class TestFrequency(unittest.TestCase):
@@ -120,7 +124,113 @@ class TestFrequency(unittest.TestCase):
             else:
                 self.assertEqual(self.freq_d[each], right_df['d'][each])
 
+    def test_run_4(self):
+        """categorical columns count the same as strings, without unused categories"""
+        in_a = self.in_a.astype(str)
+        in_cat = pandas.Series(pandas.Categorical(in_a, categories=[str(x) for x in range(9)]))
+        expected = FrequencyExperimenter(pandas.DataFrame({'a': in_a})).run()[0]
+        actual = FrequencyExperimenter(pandas.DataFrame({'a': in_cat})).run()[0]
+        expected = expected['frequency.FrequencyExperimenter']['a']
+        actual = actual['frequency.FrequencyExperimenter']['a']
+        self.assertEqual(7, len(actual))
+        for each in expected.index:
+            self.assertEqual(expected[each], actual[each])
+
+    def test_run_5(self):
+        """'threshold' then 'top_x' keep only the most common objects of each column"""
+        in_df = pandas.DataFrame({'a': self.in_a, 'b': self.in_b})
+        actual = FrequencyExperimenter(in_df, {'threshold': 2, 'top_x': 2}).run()[0]
+        actual = actual['frequency.FrequencyExperimenter']
+        self.assertEqual(2, len(actual['a'].dropna()))
+        self.assertEqual(5, actual['a'][5])  # the second is either 4 or 2, which both occur 4 times
+        self.assertEqual([3, 4], sorted(actual['b'].dropna().index))
+        self.assertEqual([5, 5], list(actual['b'].dropna().values))
+        actual = FrequencyExperimenter(in_df, {'threshold': 4}).run()[0]
+        self.assertEqual([5], list(actual['frequency.FrequencyExperimenter']['a'].dropna().index))
+        self.assertRaises(RuntimeError, FrequencyExperimenter, in_df, {'top_x': 0})
+
+    def test_run_6(self):
+        """'merge' counts the same column of every DataFrame together, in chunks or not"""
+        in_df = [pandas.DataFrame({'a': self.in_a, 'b': self.in_b}),
+                 pandas.DataFrame({'a': self.in_c, 'c': self.in_d})]
+        expected = pandas.concat([self.in_a, self.in_c]).value_counts()
+        for chunk_size in (None, 3):
+            actual = FrequencyExperimenter(in_df, {'merge': True, 'chunk_size': chunk_size}).run()
+            self.assertEqual(1, len(actual))
+            actual = actual[0]['frequency.FrequencyExperimenter']
+            self.assertEqual(['a', 'b', 'c'], list(actual.columns))
+            for each in expected.index:
+                self.assertEqual(expected[each], actual['a'][each])
+            self.assertEqual(self.freq_b[4], actual['b'][4])
+
+    def test_run_7(self):
+        """'approximate' finds the same most common objects as exact counting of skewed data"""
+        state = numpy.random.RandomState(2)
+        in_df = [pandas.DataFrame({'a': pandas.Series(state.zipf(1.5, 5000)).astype(str)}) for _ in range(3)]
+        setts = {'merge': True, 'top_x': 5, 'chunk_size': 1000}
+        expected = FrequencyExperimenter(in_df, setts).run()[0]['frequency.FrequencyExperimenter']['a']
+        setts.update({'approximate': True, 'sketch_size': 50})
+        actual = FrequencyExperimenter(in_df, setts).run()[0]['frequency.FrequencyExperimenter']['a']
+        self.assertEqual(list(expected.sort_values(ascending=False).index),
+                         list(actual.sort_values(ascending=False).index))
+        for each in expected.index:
+            self.assertGreaterEqual(actual[each], expected[each])
+
+
+class TestSketches(unittest.TestCase):
+    """Tests for the SpaceSaving and CountMin sketches."""
+    def setUp(self):
+        """a stream of 2000 occurrences of 200 objects, with a few common ones"""
+        state = numpy.random.RandomState(5)
+        self.stream = pandas.Series(state.zipf(1.8, 2000) % 200)
+        self.truth = self.stream.value_counts()
+
+    def test_space_saving(self):
+        """the counters are at most the true counts, and the estimates at least, even when merged"""
+        half = len(self.stream) // 2
+        summary = SpaceSaving(20)
+        for start in range(0, half, 100):
+            summary.update(self.stream.iloc[start:start + 100].value_counts())
+        other = SpaceSaving(20)
+        other.update(self.stream.iloc[half:].value_counts())
+        summary.merge(other)
+        self.assertLessEqual(len(summary.counts), 20)
+        for each in self.truth.index:
+            counter = summary.counts.get(each, 0)
+            self.assertLessEqual(counter, self.truth[each])
+            self.assertGreaterEqual(counter + summary.floor, self.truth[each])
+        # anything occurring more than total / (capacity + 1) times keeps its counter
+        for each in self.truth[self.truth > len(self.stream) / 21.0].index:
+            self.assertTrue(each in summary.counts.index)
+
+    def test_count_min(self):
+        """the estimates are never less than the true counts, and merging adds the counts"""
+        sketch = CountMin(64, seed=1)
+        sketch.update(self.stream.iloc[:1000].value_counts())
+        other = CountMin(64, seed=1)
+        other.update(self.stream.iloc[1000:].value_counts())
+        sketch.merge(other)
+        self.assertEqual(4 * len(self.stream), sketch.table.sum())
+        actual = sketch.estimates(self.truth.index)
+        self.assertTrue((actual >= self.truth).all())
+        self.assertEqual(self.truth.iloc[0], actual.iloc[0])  # the most common object is exact here
+        self.assertEqual(0, len(sketch.estimates([])))
+
+    def test_count_min_processes(self):
+        """sketches of strings made in processes with different hash salts are the same"""
+        script = ('import pandas\n'
+                  'from vis.analyzers.experimenters.frequency import CountMin\n'
+                  'sketch = CountMin(64, seed=1)\n'
+                  'sketch.update(pandas.Series([3, 2, 1], index=["M3", "P5", "-m2"]))\n'
+                  'print(sketch.table.tolist())\n')
+        tables = []
+        for salt in ('1', '2'):
+            env = dict(os.environ, PYTHONHASHSEED=salt, PYTHONPATH=os.path.dirname(vis.__path__[0]))
+            tables.append(subprocess.check_output([sys.executable, '-c', script], env=env))
+        self.assertEqual(tables[0], tables[1])
+
 #--------------------------------------------------------------------------------------------------#
 # Definitions                                                                                      #
 #--------------------------------------------------------------------------------------------------#
 FREQUENCY_SUITE = unittest.TestLoader().loadTestsFromTestCase(TestFrequency)
+FREQUENCY_SKETCHES_SUITE = unittest.TestLoader().loadTestsFromTestCase(TestSketches)
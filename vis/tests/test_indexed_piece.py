@@ -27,6 +27,7 @@ Tests for :py:class:`~vis.models.indexed_piece.IndexedPiece`.
 """
 
 import os
+import weakref
 from unittest import TestCase, TestLoader
 import six
 if six.PY3:
@@ -35,13 +36,15 @@ if six.PY3:
 else:
     import mock
     from mock import call, patch, MagicMock, Mock
+import numpy
 import pandas
 import music21
 from music21 import converter
+from vis.models.analysis_store import AnalysisStore
 from vis.analyzers.indexer import Indexer
 from vis.analyzers.indexers import noterest
 from vis.analyzers.experimenter import Experimenter
-from vis.models.indexed_piece import Importer, IndexedPiece, _find_piece_title, _find_part_names, _find_piece_range, _find_part_ranges, login_edb, auth_get
+from vis.models.indexed_piece import Importer, IndexedPiece, _find_piece_title, _find_part_names, _find_piece_range, _find_part_ranges, _fingerprint, provenance, login_edb, auth_get
 # find pathname to the 'vis' directory
 import vis
 VIS_PATH = vis.__path__[0]
@@ -202,6 +205,56 @@ class TestPartsAndTitles(TestCase):
         actual_range = _find_part_ranges(score)
         self.assertEqual(expected_range, actual_range)
 
+    def test_notation_flags(self):
+        # the flags are found with the objects and line up with them
+        ind_piece = Importer(os.path.join(VIS_PATH, 'tests', 'corpus', 'bwv603.xml'))
+        objs = ind_piece._get_m21_objs()
+        flags = ind_piece._get_m21_flags()
+        self.assertEqual(len(objs), len(flags))
+        for ser, flag in zip(objs, flags):
+            self.assertTrue(ser.index.equals(flag.index))
+            self.assertSequenceEqual(['nrc', 'fermata', 'tie', 'grace', 'articulations'], list(flag.columns))
+        self.assertEqual(8, sum([flag['fermata'].sum() for flag in flags]))
+        ties = ind_piece._get_m21_nrc_flags('tie')['Bass'].dropna()
+        self.assertSequenceEqual([33.0, 34.0], list(ties.index))
+        self.assertSequenceEqual(['start', 'stop'], list(ties))
+        # the non-start tie is dropped from the untied objects
+        self.assertTrue(33.0 in ind_piece._get_m21_nrc_objs_no_tied()['Bass'].dropna().index)
+        self.assertFalse(34.0 in ind_piece._get_m21_nrc_objs_no_tied()['Bass'].dropna().index)
+
+    def test_notation_flags_2(self):
+        # a part without voices keeps its flags; a chord made of voices gets them merged
+        plain = music21.stream.Part()
+        first = music21.note.Note('C4', quarterLength=1.0)
+        first.tie = music21.tie.Tie('start')
+        first.expressions.append(music21.expressions.Fermata())
+        plain.insert(0.0, first)
+        plain.insert(0.0, music21.note.Note('E4', quarterLength=1.0))
+        second = music21.note.Note('C4', quarterLength=1.0)
+        second.tie = music21.tie.Tie('stop')
+        plain.insert(1.0, second)
+        upper = music21.stream.Voice()
+        lower = music21.stream.Voice()
+        top = music21.note.Note('G4', quarterLength=2.0)
+        top.expressions.append(music21.expressions.Fermata())
+        upper.append(top)
+        lower.append(music21.note.Note('B3', quarterLength=2.0))
+        measure = music21.stream.Measure()
+        measure.insert(0.0, upper)
+        measure.insert(0.0, lower)
+        voiced = music21.stream.Part()
+        voiced.append(measure)
+        score = music21.stream.Score()
+        score.insert(0, plain)
+        score.insert(0, voiced)
+        ind_piece = IndexedPiece(score=score)
+        ind_piece._metadata['parts'] = ['Plain', 'Voiced']
+        fermatas = ind_piece._get_m21_nrc_flags('fermata')
+        self.assertSequenceEqual([True, False, False], list(fermatas.iloc[:, 0]))
+        self.assertTrue(fermatas.iloc[0, 1])
+        ties = ind_piece._get_m21_nrc_flags('tie').iloc[:, 0]
+        self.assertSequenceEqual(['start', None, 'stop'], list(ties))
+
 class TestIndexedPieceC(TestCase):
 
     def test_meta(self):
@@ -244,9 +297,191 @@ class TestIndexedPieceC(TestCase):
             self.assertEqual(IndexedPiece._MISSING_PASSWORD, run_err.args[0])
 
 
+class TestAnalysisGraph(TestCase):
+    """Tests for the planning and computation of analyses with IndexedPiece._graph."""
+
+    def setUp(self):
+        self.ind_piece = Importer(os.path.join(VIS_PATH, 'tests', 'corpus', 'bwv603.xml'))
+
+    def test_graph(self):
+        # every input is itself an analysis with a _get_ method
+        for name, deps in six.iteritems(IndexedPiece._graph):
+            self.assertTrue(hasattr(IndexedPiece, '_get_' + name))
+            for dep in deps:
+                self.assertTrue(dep in IndexedPiece._graph)
+
+    def test_plan(self):
+        self.ind_piece._analyses.pop('part_streams', None)
+        expected = [['part_streams'], ['m21_objs'], ['m21_nrc_objs'], ['m21_nrc_objs_no_tied'],
+                    ['beat_strength', 'noterest'], ['duration', 'horizontal_interval', 'vertical_interval'],
+                    ['dissonance_horizontal_interval', 'dissonance_vertical_interval']]
+        self.assertEqual(expected, self.ind_piece._plan(IndexedPiece._graph['dissonance']))
+        # cached analyses, and the inputs only they need, are not computed again
+        self.ind_piece._get_noterest()
+        self.assertEqual([['beat_strength', 'duration', 'vertical_interval']],
+                         self.ind_piece._plan(['duration', 'beat_strength', 'vertical_interval']))
+
+    def test_explain(self):
+        actual = self.ind_piece.explain('dissonance')
+        self.assertSequenceEqual(['Stage', 'Cached', 'Inputs'], list(actual.columns))
+        self.assertEqual('dissonance', actual.index[-1])
+        self.assertFalse(actual['Cached']['noterest'])
+        # the intervals with the settings of the dissonance indexer are inputs of their own
+        self.assertEqual('beat_strength, duration, dissonance_horizontal_interval, dissonance_vertical_interval',
+                         actual['Inputs']['dissonance'])
+        self.assertEqual('vertical_interval', actual['Inputs']['dissonance_vertical_interval'])
+        self.ind_piece.get_data('dissonance')
+        actual = self.ind_piece.explain('dissonance')
+        self.assertSequenceEqual(['dissonance'], list(actual.index))
+        self.assertTrue(actual['Cached']['dissonance'])
+        self.assertTrue(numpy.isnan(actual['Stage']['dissonance']))
+        # analyzers that always need data have nothing to explain
+        self.assertEqual(0, len(self.ind_piece.explain('ngram')))
+        self.assertRaises(KeyError, self.ind_piece.explain, 'not an analyzer')
+
+    def test_compute(self):
+        # the computation is serial by default, and the threaded one gives the same results
+        self.assertEqual(1, IndexedPiece._threads)
+        expected = self.ind_piece.get_data('dissonance')
+        IndexedPiece._threads = 4
+        try:
+            threaded = Importer(os.path.join(VIS_PATH, 'tests', 'corpus', 'bwv603.xml'))
+            actual = threaded.get_data('dissonance')
+        finally:
+            IndexedPiece._threads = 1
+        self.assertTrue(actual.equals(expected))
+        for name in IndexedPiece._graph['dissonance']:
+            self.assertTrue(name in self.ind_piece._analyses)
+        setts = {'quality': True, 'simple or compound': 'simple', 'directed': True}
+        self.assertTrue(self.ind_piece.get_data('vertical_interval', settings=setts).equals(
+            self.ind_piece._analyses['dissonance_vertical_interval']))
+
+class TestResultCache(TestCase):
+    """Tests for the result cache of IndexedPiece.get_data()."""
+
+    def setUp(self):
+        self.ind_piece = Importer(os.path.join(VIS_PATH, 'tests', 'corpus', 'bwv603.xml'))
+        self.ngram_setts = {'n': 2, 'vertical': [('Soprano,Alto',)]}
+
+    def test_settings(self):
+        # non-default settings are cached too, whatever the order of their keys
+        setts_1 = {'quality': 'chromatic', 'directed': False, 'simple or compound': 'simple'}
+        setts_2 = {'simple or compound': 'simple', 'directed': False, 'quality': 'chromatic'}
+        actual = self.ind_piece.get_data('vertical_interval', settings=setts_1)
+        self.assertTrue(actual is self.ind_piece.get_data('vertical_interval', settings=setts_2))
+        other = self.ind_piece.get_data('vertical_interval', settings={'quality': 'chromatic'})
+        self.assertFalse(actual is other)
+
+    def test_data(self):
+        # results computed from a data argument are cached by its contents
+        intervals = self.ind_piece.get_data('vertical_interval').copy()
+        actual = self.ind_piece.get_data('ngram', data=[intervals], settings=self.ngram_setts)
+        again = self.ind_piece.get_data('ngram', data=[intervals.copy()], settings=self.ngram_setts)
+        self.assertTrue(actual is again)
+        changed = intervals.copy()
+        changed.iloc[0, 0] = 'P8'
+        other = self.ind_piece.get_data('ngram', data=[changed], settings=self.ngram_setts)
+        self.assertFalse(actual is other)
+
+    def test_categorical(self):
+        # categorical data are cached by their categories and codes
+        intervals = self.ind_piece.get_data('vertical_interval').copy()
+        categorical = intervals.apply(lambda col: col.astype('category'))
+        self.assertIsNotNone(_fingerprint(categorical))
+        self.assertNotEqual(_fingerprint(intervals), _fingerprint(categorical))
+        actual = self.ind_piece.get_data('ngram', data=[categorical], settings=self.ngram_setts)
+        again = self.ind_piece.get_data('ngram', data=[categorical.copy()], settings=self.ngram_setts)
+        self.assertTrue(actual is again)
+        changed = categorical.copy()
+        changed.iloc[:, 0] = categorical.iloc[:, 0].shift(1)
+        self.assertNotEqual(_fingerprint(categorical), _fingerprint(changed))
+
+    def test_categorical_setting(self):
+        # indexers cached without settings still accept the "categorical" setting
+        for name in ('noterest', 'dissonance', 'fermata'):
+            default = self.ind_piece.get_data(name)
+            actual = self.ind_piece.get_data(name, settings={'categorical': True})
+            self.assertEqual(default.shape, actual.shape)
+            if name != 'fermata':  # the fermata results are not strings
+                self.assertEqual('category', str(actual.iloc[:, 0].dtype))
+            for i in range(len(default.columns)):
+                self.assertSequenceEqual(list(default.iloc[:, i].fillna('x')),
+                                         list(actual.iloc[:, i].astype(object).fillna('x')))
+            self.assertFalse(self.ind_piece.get_data(name) is actual)  # the cached results are kept
+        plain = self.ind_piece.get_data('noterest', settings={'categorical': False})
+        self.assertEqual(object, plain.iloc[:, 0].dtype)
+        self.assertRaises(RuntimeWarning, self.ind_piece.get_data, 'noterest', settings={'n': 2})
+
+    def test_budget(self):
+        # the least recently used results of all the pieces are dropped first
+        def results_size():
+            usage = self.ind_piece.memory_usage()
+            return usage['Bytes'][[name.startswith('result:') for name in usage.index]].sum()
+        intervals = self.ind_piece.get_data('vertical_interval')
+        budget = AnalysisStore.results_budget
+        stores = AnalysisStore._stores
+        AnalysisStore._stores = weakref.WeakSet([self.ind_piece._analyses])  # ignore other pieces
+        try:
+            first = self.ind_piece.get_data('ngram', data=[intervals], settings=self.ngram_setts)
+            self.ind_piece.get_data('ngram', data=[intervals], settings={'n': 3, 'vertical': [('Soprano,Alto',)]})
+            AnalysisStore.results_budget = results_size() - 1
+            AnalysisStore.enforce_budget()
+            self.assertTrue(results_size() <= AnalysisStore.results_budget)
+            again = self.ind_piece.get_data('ngram', data=[intervals], settings=self.ngram_setts)
+            self.assertFalse(first is again)
+            self.assertTrue(first.equals(again))
+        finally:
+            AnalysisStore.results_budget = budget
+            AnalysisStore._stores = stores
+
+    def test_uncacheable(self):
+        # music21 objects, and analyzers with side effects, are not cached
+        self.assertIsNone(_fingerprint(self.ind_piece._get_m21_nrc_objs()))
+        self.assertIsNone(self.ind_piece._cache_key('noterest', self.ind_piece._get_m21_nrc_objs(), None))
+        self.assertIsNone(self.ind_piece._cache_key('bar_chart', None, None))
+        self.assertIsNotNone(self.ind_piece._cache_key('noterest', None, None))
+
+class TestProvenance(TestCase):
+    """Tests for the provenance of the results of IndexedPiece.get_data()."""
+
+    def setUp(self):
+        self.path = os.path.join(VIS_PATH, 'tests', 'corpus', 'bwv603.xml')
+        self.ind_piece = Importer(self.path)
+        self.ngram_setts = {'n': 2, 'vertical': [('Soprano,Alto',)]}
+
+    def test_provenance_1(self):
+        # results get a provenance, which depends on the piece, analyzer, and settings
+        intervals = self.ind_piece.get_data('vertical_interval', settings={'quality': 'chromatic'})
+        self.assertIsNotNone(provenance(intervals))
+        other = self.ind_piece.get_data('vertical_interval', settings={'quality': False})
+        self.assertNotEqual(provenance(intervals), provenance(other))
+        notes = self.ind_piece.get_data('noterest')
+        self.assertNotEqual(provenance(intervals), provenance(notes))
+        # the same analysis of another copy of the piece has the same provenance
+        same = Importer(self.path).get_data('vertical_interval', settings={'quality': 'chromatic'})
+        self.assertEqual(provenance(intervals), provenance(same))
+        # copies and untouched inputs have no provenance
+        self.assertIsNone(provenance(intervals.copy()))
+        self.assertIsNone(provenance(self.ind_piece._get_m21_nrc_objs()))
+
+    def test_provenance_2(self):
+        # results passed back in are recognized without looking at their contents
+        intervals = self.ind_piece.get_data('vertical_interval')
+        self.assertEqual('prov:' + provenance(intervals), _fingerprint(intervals))
+        ngrams = self.ind_piece.get_data('ngram', data=[intervals], settings=self.ngram_setts)
+        self.assertIsNotNone(provenance(ngrams))
+        freqs = self.ind_piece.get_data('frequency', data=ngrams)
+        self.assertTrue(freqs is self.ind_piece.get_data('frequency', data=ngrams))
+        # every dataframe in a list of results has its own provenance
+        self.assertIsNotNone(provenance(freqs[0]))
+        self.assertNotEqual(provenance(ngrams), provenance(freqs[0]))
+
 #-------------------------------------------------------------------------------------------------#
 # Definitions                                                                                     #
 #-------------------------------------------------------------------------------------------------#
 INDEXED_PIECE_SUITE_A = TestLoader().loadTestsFromTestCase(TestIndexedPieceA)
 INDEXED_PIECE_PARTS_TITLES = TestLoader().loadTestsFromTestCase(TestPartsAndTitles)
 INDEXED_PIECE_SUITE_C = TestLoader().loadTestsFromTestCase(TestIndexedPieceC)
+INDEXED_PIECE_GRAPH = TestLoader().loadTestsFromTestCase(TestAnalysisGraph)
+INDEXED_PIECE_CACHE = TestLoader().loadTestsFromTestCase(TestResultCache)
+INDEXED_PIECE_PROVENANCE = TestLoader().loadTestsFromTestCase(TestProvenance)
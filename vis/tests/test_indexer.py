@@ -429,6 +429,75 @@ class TestMakeReturn(unittest.TestCase):
         except IndexError as inderr:
             self.assertEqual(indexer.Indexer._MAKE_RETURN_INDEX_ERR, inderr.message)
 
+    def test_make_return_4(self):
+        # 4: categorical columns share one vocabulary for the indexer class
+        class ChoirIndexer(indexer.Indexer):
+            required_score_type = 'pandas.Series'
+            categorical = True
+        first = [pandas.Series(['C4', 'D4', 'Rest']), pandas.Series([1.0, 2.0, 3.0])]
+        second = [pandas.Series(['E4', float('nan'), 'C4']), pandas.Series(['D4', 'D4', 'F4'])]
+        actual_1 = ChoirIndexer(first).make_return(['S', 'A'], first)
+        actual_2 = ChoirIndexer(second).make_return(['S', 'A'], second)
+        self.assertEqual('category', str(actual_1.iloc[:, 0].dtype))
+        self.assertEqual('float64', str(actual_1.iloc[:, 1].dtype))  # not strings
+        self.assertSequenceEqual(['C4', 'D4', 'Rest'], list(actual_1.iloc[:, 0]))
+        self.assertSequenceEqual(['C4', 'D4', 'Rest', 'E4', 'F4'],
+                                 list(actual_2.iloc[:, 0].cat.categories))
+        self.assertTrue(pandas.isnull(actual_2.iloc[1, 0]))
+        self.assertSequenceEqual(['D4', 'D4', 'F4'], list(actual_2.iloc[:, 1]))
+        # the earlier results catch up with the vocabulary
+        updated = indexer.shared_categories(actual_1)
+        self.assertSequenceEqual(list(actual_2.iloc[:, 0].cat.categories),
+                                 list(updated.iloc[:, 0].cat.categories))
+        self.assertSequenceEqual(['C4', 'D4', 'Rest'], list(updated.iloc[:, 0]))
+
+    def test_make_return_5(self):
+        # 5: the "categorical" setting takes precedence over the class attribute
+        parts = [pandas.Series(['C4', 'D4'])]
+        class SoloIndexer(indexer.Indexer):
+            required_score_type = 'pandas.Series'
+        test_ind = SoloIndexer(parts)
+        self.assertEqual(object, test_ind.make_return(['S'], parts).iloc[:, 0].dtype)
+        test_ind._settings['categorical'] = True
+        self.assertEqual('category', str(test_ind.make_return(['S'], parts).iloc[:, 0].dtype))
+
+    def test_make_return_6(self):
+        # 6: a vocabulary starts over past the limit, and all of them can be cleared
+        class TrioIndexer(indexer.Indexer):
+            required_score_type = 'pandas.Series'
+            categorical = True
+        first = [pandas.Series(['C4', 'D4'])]
+        second = [pandas.Series(['E4', 'F4'])]
+        actual_1 = TrioIndexer(first).make_return(['S'], first)
+        with mock.patch.object(indexer.Indexer, 'vocabulary_limit', 3):
+            actual_2 = TrioIndexer(second).make_return(['S'], second)
+        self.assertSequenceEqual(['E4', 'F4'], list(actual_2.iloc[:, 0].cat.categories))
+        self.assertSequenceEqual(['E4', 'F4'], list(actual_2.iloc[:, 0]))
+        # results of the old vocabulary keep their categories
+        updated = indexer.shared_categories(actual_1)
+        self.assertSequenceEqual(['E4', 'F4', 'C4', 'D4'], list(updated.iloc[:, 0].cat.categories))
+        self.assertSequenceEqual(['C4', 'D4'], list(updated.iloc[:, 0]))
+        indexer.Indexer.clear_vocabularies()
+        self.assertEqual({}, indexer.Indexer._vocabularies)
+        actual_3 = TrioIndexer(first).make_return(['S'], first)
+        self.assertSequenceEqual(['C4', 'D4'], list(actual_3.iloc[:, 0].cat.categories))
+
+
+class TestBatch(unittest.TestCase):
+    def test_batch(self):
+        # indexers without their own batching run on every piece in turn
+        class CopyIndexer(indexer.Indexer):
+            required_score_type = 'pandas.Series'
+            def run(self):
+                return self.make_return([str(x) for x in range(len(self._score))], self._score)
+        pieces = [[pandas.Series([1, 2])], [pandas.Series([3]), pandas.Series([4, 5, 6])]]
+        actual = CopyIndexer.batch(pieces)
+        self.assertEqual(2, len(actual))
+        for piece, result in zip(pieces, actual):
+            self.assertTrue(result.equals(CopyIndexer(piece).run()))
+        stacked = CopyIndexer.batch(pieces, stacked=True)
+        self.assertSequenceEqual([(0, 0), (0, 1), (1, 0), (1, 1), (1, 2)], list(stacked.index))
+
 
 #--------------------------------------------------------------------------------------------------#
 # Definitions                                                                                      #
@@ -438,3 +507,4 @@ INDEXER_MULTI_EVENT_SUITE = unittest.TestLoader().loadTestsFromTestCase(TestInde
 # UNIQUE_OFFSETS_SUITE = unittest.TestLoader().loadTestsFromTestCase(TestMpiUniqueOffsets)
 INDEXER_INIT_SUITE = unittest.TestLoader().loadTestsFromTestCase(TestIndexerInit)
 MAKE_RETURN_SUITE = unittest.TestLoader().loadTestsFromTestCase(TestMakeReturn)
+BATCH_SUITE = unittest.TestLoader().loadTestsFromTestCase(TestBatch)
@@ -34,7 +34,7 @@ import unittest
 import six
 import pandas
 from music21 import interval, note
-from vis.analyzers.indexers.interval import IntervalIndexer, HorizontalIntervalIndexer, real_indexer_func, indexer_funcs
+from vis.analyzers.indexers.interval import IntervalIndexer, HorizontalIntervalIndexer, IntervalReindexer, real_indexer_func, indexer_funcs
 from vis.tests.test_note_rest_indexer import TestNoteRestIndexer
 
 # find the pathname of the 'vis' directory
@@ -449,6 +449,18 @@ class TestIntervalIndexerIndexer(unittest.TestCase):
                 func_results.append(func(pair))
             self.assertSequenceEqual(expecteds[i], func_results)
 
+    def test_reindexer_1(self):
+        """the reindexed results keep the name of the reindexed indexer, and its categories"""
+        full = pandas.DataFrame({('interval.IntervalIndexer', '0,1'): ['P8', 'M10']})
+        full.columns.names = ('Indexer', 'Parts')
+        setts = {'quality': False, 'simple or compound': 'simple', 'categorical': True}
+        actual = IntervalReindexer(full, setts).run()
+        self.assertSequenceEqual(list(full.columns), list(actual.columns))
+        self.assertSequenceEqual(['8', '3'], list(actual.iloc[:, 0]))
+        self.assertEqual('category', str(actual.iloc[:, 0].dtype))
+        del setts['categorical']
+        self.assertEqual(object, IntervalReindexer(full, setts).run().iloc[:, 0].dtype)
+
 
 class TestHorizIntervalIndexerLong(unittest.TestCase):
     # data_interval_indexer_1.csv
@@ -518,6 +530,37 @@ class TestHorizIntervalIndexerLong(unittest.TestCase):
         actual = HorizontalIntervalIndexer(test_parts, setts).run()
         self.assertTrue(actual.equals(expected))
 
+    def test_batch_1(self):
+        """vertical and horizontal intervals of several pieces at once are those of run()"""
+        soprano = make_series(TestNoteRestIndexer.bwv77_soprano)
+        bass = make_series(TestNoteRestIndexer.bwv77_bass)
+        pieces = [pandas.concat([soprano, bass], axis=1),
+                  pandas.concat([bass, soprano, bass], axis=1),
+                  pandas.concat([soprano.iloc[:10], bass.iloc[:5]], axis=1)]
+        for i, piece in enumerate(pieces):
+            piece.columns = pandas.MultiIndex.from_product([('noterest.NoteRestIndexer',),
+                                                            [str(x) for x in range(len(piece.columns))]])
+        for cls, setts in ((IntervalIndexer, {'quality': True, 'simple or compound': 'simple'}),
+                           (HorizontalIntervalIndexer, {'quality': 'chromatic', 'horiz_attach_before': True}),
+                           (HorizontalIntervalIndexer, {'directed': False})):
+            expected = [cls(piece, setts).run() for piece in pieces]
+            actual = cls.batch(pieces, setts)
+            self.assertEqual(len(expected), len(actual))
+            for exp, act in zip(expected, actual):
+                self.assertTrue(act.equals(exp))
+
+    def test_batch_2(self):
+        """stacked results are indexed by piece, then offset"""
+        soprano = make_series(TestNoteRestIndexer.bwv77_soprano)
+        bass = make_series(TestNoteRestIndexer.bwv77_bass)
+        piece = pandas.concat([soprano, bass], axis=1)
+        piece.columns = pandas.MultiIndex.from_product([('noterest.NoteRestIndexer',), ('0', '1')])
+        actual = IntervalIndexer.batch([piece, piece], keys=['a', 'b'], stacked=True)
+        expected = IntervalIndexer(piece).run()
+        self.assertSequenceEqual(['Piece', 'Offset'], list(actual.index.names))
+        self.assertTrue(actual.loc['b'].equals(expected))
+        self.assertEqual(2 * len(expected), len(actual))
+
 
 #-------------------------------------------------------------------------------------------------#
 # Definitions                                                                                     #
@@ -136,6 +136,34 @@ class TestOverBassIndexer(TestCase):
         except RuntimeError as run_err:
             self.assertEqual(over_bass.OverBassIndexer._WRONG_TYPE, run_err.args[0])
 
+    def test_columns(self):
+        """that the 'columns' output has one categorical column per interval"""
+
+        setts = {'type': 'notes', 'output': 'columns'}
+        actual = over_bass.OverBassIndexer([NOTES, VERT], setts).run()
+        self.assertEqual(['3', '0,3', '1,3', '2,3'], list(actual.columns.get_level_values(1)))
+        self.assertTrue(all(str(dt) == 'category' for dt in actual.dtypes))
+        self.assertEqual(for_notes, [actual.iloc[:, x].astype(str).tolist() for x in range(4)])
+
+    def test_combined_key(self):
+        """that the combined key is the same for the same row and differs otherwise"""
+
+        setts = {'type': 'notes', 'output': 'columns', 'combined key': True}
+        actual = over_bass.OverBassIndexer([NOTES, VERT], setts).run()
+        keys = actual.iloc[:, -1]
+        self.assertEqual('Key', actual.columns[-1][1])
+        self.assertEqual('int64', str(keys.dtype))
+        strings = EXPECTED_NOTES.iloc[:, 0]
+        for i in range(len(keys)):
+            for j in range(len(keys)):
+                self.assertEqual(strings.iloc[i] == strings.iloc[j], keys.iloc[i] == keys.iloc[j])
+
+    def test_init6(self):
+        """that __init__() fails when the output setting is not valid"""
+
+        setts = {'output': 'tuples'}
+        self.assertRaises(RuntimeError, over_bass.OverBassIndexer, [NOTES, VERT], setts)
+
 #--------------------------------------------------------------------------------------------------#
 # Definitions                                                                                      #
 #--------------------------------------------------------------------------------------------------#
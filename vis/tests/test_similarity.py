@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#--------------------------------------------------------------------------------------------------
+# Program Name:           vis
+# Program Description:    Helps analyze music with computers.
+#
+# Filename:               vis/tests/test_similarity.py
+# Purpose:                Tests for the "similarity" experimenter module.
+#
+# Copyright (C) 2016 Alexander Morgan
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#--------------------------------------------------------------------------------------------------
+"""
+.. codeauthor:: Alexander Morgan
+
+Tests for the SimilarityIndex.
+"""
+
+import unittest
+import numpy
+import pandas
+from vis.analyzers.experimenters import similarity
+
+PROFILES = [pandas.Series([1, 1, 1], index=['A', 'B', 'C']),
+            pandas.Series([1, 2, 3], index=['A', 'B', 'C']),
+            pandas.Series([3, 2, 1], index=['A', 'B', 'C'])]
+
+
+def _corpus(num=60, seed=3):
+    """Make pieces in a few families, each drawing most of its observations from its own pool."""
+    state = numpy.random.RandomState(seed)
+    post = []
+    for i in range(num):
+        family = i % 4
+        labels = ['f{}_{}'.format(family, x) for x in state.choice(30, 20, replace=False)]
+        labels += ['shared_{}'.format(x) for x in state.choice(100, 5, replace=False)]
+        post.append(pandas.Series(state.randint(1, 10, len(labels)), index=labels))
+    return post
+
+
+class TestSimilarityIndex(unittest.TestCase):
+    """Tests for similarity.SimilarityIndex."""
+
+    def test_overlap(self):
+        """That overlap() agrees with the dissimilarities of HierarchicalClusterer.pair_compare()."""
+        self.assertAlmostEqual(1 - 16.666666666666675 / 100, similarity.overlap(PROFILES[0], PROFILES[1]))
+        self.assertAlmostEqual(1 - 33.333333333333336 / 100, similarity.overlap(PROFILES[1], PROFILES[2]))
+
+    def test_init(self):
+        """That the constructor rejects a number of bands that doesn't divide the hashes."""
+        self.assertRaises(RuntimeError, similarity.SimilarityIndex, 64, 10)
+        self.assertRaises(RuntimeError, similarity.SimilarityIndex, 64, 0)
+
+    def test_add(self):
+        """That add() keeps the pieces, and rejects duplicate pieces and empty profiles."""
+        index = similarity.SimilarityIndex.from_profiles(PROFILES, keys=['a', 'b', 'c'])
+        self.assertEqual(3, len(index))
+        self.assertTrue('b' in index)
+        self.assertRaises(RuntimeError, index.add, 'b', PROFILES[0])
+        self.assertRaises(RuntimeError, index.add, 'd', pandas.Series([0, numpy.nan], index=['A', 'B']))
+        self.assertEqual(3, len(index))
+
+    def test_query_1(self):
+        """That a piece's identical copy is found with a similarity of 1."""
+        index = similarity.SimilarityIndex.from_profiles(_corpus())
+        actual = index.query(_corpus()[5] * 2, k=1)
+        self.assertEqual(['Similarity', 'Piece'], list(actual.columns))
+        self.assertEqual([5], list(actual['Piece']))
+        self.assertAlmostEqual(1.0, actual['Similarity'].iloc[0])
+
+    def test_query_2(self):
+        """That the results are the most similar candidates in order, with exact similarities, and
+        that the piece queried by its key is left out."""
+        corpus = _corpus()
+        index = similarity.SimilarityIndex.from_profiles(corpus)
+        actual = index.query(8, k=5)
+        self.assertEqual(5, len(actual))
+        self.assertFalse(8 in list(actual['Piece']))
+        sims = list(actual['Similarity'])
+        self.assertEqual(sorted(sims, reverse=True), sims)
+        for piece, sim in zip(actual['Piece'], sims):
+            self.assertAlmostEqual(similarity.overlap(corpus[8], corpus[piece]), sim)
+            self.assertEqual(0, piece % 4)  # pieces from the same family
+
+    def test_query_3(self):
+        """That the best candidates found include the exact nearest neighbours of a piece."""
+        corpus = _corpus()
+        index = similarity.SimilarityIndex.from_profiles(corpus)
+        exact = sorted([(similarity.overlap(corpus[13], corpus[i]), i) for i in range(len(corpus)) if i != 13],
+                       reverse=True)
+        actual = index.query(13, k=3)
+        self.assertEqual([i for _, i in exact[:3]], list(actual['Piece']))
+
+    def test_query_4(self):
+        """That pieces added later are found, and the results don't depend on the order pieces
+        were added in."""
+        corpus = _corpus()
+        index = similarity.SimilarityIndex.from_profiles(corpus[:30])
+        for i in range(30, 60):
+            index.add(i, corpus[i])
+        whole = similarity.SimilarityIndex.from_profiles(corpus)
+        pandas.util.testing.assert_frame_equal(whole.query(45, k=None), index.query(45, k=None))
+        reverse = similarity.SimilarityIndex.from_profiles(corpus[::-1], keys=list(range(59, -1, -1)))
+        self.assertEqual(set(whole.query(45, k=None)['Piece']), set(reverse.query(45, k=None)['Piece']))
+
+    def test_query_5(self):
+        """That querying for a piece not in the index raises, and that a query that shares no
+        bucket with any piece gives an empty DataFrame."""
+        index = similarity.SimilarityIndex.from_profiles(PROFILES)
+        self.assertRaises(RuntimeError, index.query, 'nothing')
+        actual = index.query(pandas.Series([4, 5], index=['X', 'Y']))
+        self.assertEqual(0, len(actual))
+        self.assertEqual(['Similarity', 'Piece'], list(actual.columns))
+
+    def test_query_6(self):
+        """That querying doesn't add the query's new observations to the index, and that they
+        still count in the similarity."""
+        index = similarity.SimilarityIndex.from_profiles(PROFILES)
+        vocabulary = dict(index._vocabulary)
+        query = pandas.Series([1, 1, 1, 3], index=['A', 'B', 'C', 'Z'])
+        actual = index.query(query, k=1)
+        self.assertEqual(vocabulary, index._vocabulary)
+        self.assertEqual(len(vocabulary), len(index._randoms))
+        self.assertEqual([0], list(actual['Piece']))
+        self.assertAlmostEqual(similarity.overlap(query, PROFILES[0]), actual['Similarity'].iloc[0])
+
+
+#--------------------------------------------------------------------------------------------------#
+# Definitions                                                                                      #
+#--------------------------------------------------------------------------------------------------#
+SIMILARITY_INDEX_SUITE = unittest.TestLoader().loadTestsFromTestCase(TestSimilarityIndex)
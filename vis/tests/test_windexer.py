@@ -27,7 +27,7 @@
 import os
 from unittest import TestCase, TestLoader
 import pandas
-from vis.analyzers.indexers import windexer
+from vis.analyzers.indexers import windexer, active_voices
 import vis
 
 
@@ -76,6 +76,39 @@ class TestWindexer(TestCase):
         actual = windexer.Windexer(NOTES, {'window_size': 3}).run()
         self.assertTrue(actual.equals(WINDOW3))
 
+    def test_run_multiindex(self):
+        actual = windexer.Windexer(NOTES, {'window_size': 3, 'mode': 'multiindex'}).run()
+        self.assertEqual([0, 0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3],
+                         actual.index.get_level_values(0).tolist())
+        actual.index = actual.index.droplevel(0)
+        self.assertTrue(actual.equals(WINDOW3))
+
+    def test_run_lazy(self):
+        windows = windexer.Windexer(NOTES, {'window_size': 3, 'mode': 'lazy'}).run()
+        self.assertEqual(4, len(windows))
+        self.assertEqual([1.0, 1.5, 2.0, 2.5], windows.index.tolist())
+        self.assertTrue(windows[1].equals(NOTES.iloc[1:4]))
+        self.assertEqual((4, 3, 1), windows.values.shape)
+        self.assertEqual(['E5', 'E5', 'D5'], windows.values[1, :, 0].tolist())
+        self.assertTrue(pandas.concat(list(windows)).equals(WINDOW3))
+
+    def test_lazy_aggregations(self):
+        notes = pandas.DataFrame({'0': ['C4', None, 'Rest', None, 'D4'],
+                                  '1': ['E4', 'Rest', None, None, None]},
+                                 index=[0.0, 1.0, 2.0, 3.0, 4.0])
+        windows = windexer.Windows(notes, 2)
+        self.assertEqual([[1, 2], [1, 1], [1, 0], [1, 0]], windows.counts().values.tolist())
+        self.assertEqual([2, 1, 0, 1], windows.active_voices().tolist())
+        self.assertEqual([2, 0, 0, 1], windows.active_voices(attacked=True).tolist())
+        # windows of one row count what the ActiveVoicesIndexer counts at each offset
+        for attacked in (False, True):
+            expected = active_voices.ActiveVoicesIndexer(notes, {'attacked': attacked, 'show_all': True}).run()
+            self.assertEqual(expected.iloc[:, 0].tolist(),
+                             windexer.Windows(notes, 1).active_voices(attacked).tolist())
+
+    def test_init5(self):
+        self.assertRaises(RuntimeError, windexer.Windexer, NOTES, {'mode': 'rolling'})
+
     def test_init4(self):
 
         setts = {'window_size': 465}
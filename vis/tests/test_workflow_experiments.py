@@ -26,6 +26,9 @@
 Tests for the WorkflowManager
 """
 
+import os
+import shutil
+import tempfile
 from unittest import TestCase, TestLoader
 import six
 if six.PY3:
@@ -36,7 +39,10 @@ from mock import MagicMock
 import pandas
 from vis.workflow import WorkflowManager
 from vis.models.indexed_piece import IndexedPiece
+from vis.models.analysis_store import AnalysisStore
 from vis.analyzers.indexers import interval, noterest
+import vis
+VIS_PATH = vis.__path__[0]
 
 
 class Intervals(TestCase):
@@ -165,7 +171,93 @@ class Intervals(TestCase):
             self.assertEqual(exp_err_msg, run_err.args[0])
 
 
+def _fake_ngrams(which):
+    """Make a side_effect for a mocked per-piece n-gram method, whose result shows its arguments."""
+    return lambda index: pandas.DataFrame({('ngram.NGramIndexer', '0,1'): ['{} {}'.format(which, index)]})
+
+
+class IntervalNGrams(TestCase):
+    """Tests for the WorkflowManager._interval_ngrams() experiment."""
+
+    def check_interval_ngrams(self, cores):
+        """Run _interval_ngrams() on four pieces, one of each kind of voice combination, with the
+        given number of cores."""
+        test_wm = WorkflowManager(['one', 'two', 'three', 'four', 'five'])
+        test_wm.settings(0, 'voice combinations', 'all')
+        test_wm.settings(1, 'voice combinations', 'all pairs')
+        test_wm.settings(2, 'voice combinations', '[[0, 1]]')
+        test_wm.settings(4, 'voice combinations', 'all pairs')
+        with mock.patch('vis.workflow.mp.cpu_count', return_value=cores), \
+                mock.patch.object(WorkflowManager, '_all_part_modules', side_effect=_fake_ngrams('all')), \
+                mock.patch.object(WorkflowManager, '_two_part_modules', side_effect=_fake_ngrams('pairs')), \
+                mock.patch.object(WorkflowManager, '_variable_part_modules', side_effect=_fake_ngrams('some')), \
+                mock.patch.object(WorkflowManager, '_run_freq_agg') as mock_rfa:
+            actual = test_wm._interval_ngrams()  # pylint: disable=protected-access
+            mock_rfa.assert_called_once_with('ngram.NGramIndexer')
+        self.assertEqual(['all 0', 'pairs 1', 'some 2', 'some 3', 'pairs 4'],
+                         [piece.iloc[0, 0] for piece in actual])
+        self.assertTrue(actual is test_wm._result)  # pylint: disable=protected-access
+
+    def test_interval_ngrams_1(self):
+        """in this process"""
+        self.check_interval_ngrams(1)
+
+    def test_interval_ngrams_2(self):
+        """in worker processes; the results are in the order of the pieces"""
+        self.check_interval_ngrams(3)
+
+    def test_interval_ngrams_3(self):
+        """run() on real pieces, in this process and in worker processes"""
+        pathname = os.path.join(VIS_PATH, 'tests', 'corpus', 'bwv603.xml')
+        test_wm = WorkflowManager([pathname] * 3)
+        test_wm.load()
+        test_wm.settings(0, 'voice combinations', 'all')
+        test_wm.settings(1, 'voice combinations', 'all pairs')
+        test_wm.settings(2, 'voice combinations', '[[0, 3], [1, 2, 3]]')
+        test_wm.settings(None, 'count frequency', False)
+        with mock.patch('vis.workflow.mp.cpu_count', return_value=1):
+            expected = test_wm.run('interval n-grams')
+        self.assertEqual(['Soprano,Bass Alto,Bass Tenor,Bass : Bass'],
+                         list(expected[0].columns.get_level_values(1)))
+        self.assertEqual(6, len(expected[1].columns))
+        self.assertEqual(['Alto,Bass Tenor,Bass : Bass', 'Soprano,Bass : Bass'],
+                         list(expected[2].columns.get_level_values(1)))
+        self.assertEqual('[15 12 10] (8) [8 5 3]', expected[0].iloc[0, 0])
+        with mock.patch('vis.workflow.mp.cpu_count', return_value=3):
+            actual = test_wm.run('interval n-grams')
+        for exp, act in zip(expected, actual):
+            self.assertTrue(exp.equals(act))
+        test_wm.settings(None, 'count frequency', True)
+        counts = test_wm.run('interval n-grams')
+        self.assertEqual(['aggregator.ColumnAggregator'], list(counts.columns))
+        self.assertEqual(11, counts.iloc[0, 0])
+
+    def test_interval_ngrams_4(self):
+        """worker processes leave the analyses spilled by this process"""
+        pathname = os.path.join(VIS_PATH, 'tests', 'corpus', 'bwv603.xml')
+        test_wm = WorkflowManager([pathname] * 2)
+        test_wm.load()
+        test_wm.settings(None, 'count frequency', False)
+        for i in range(2):
+            test_wm.settings(i, 'voice combinations', 'all')
+        budget, spill_dir = AnalysisStore.budget, AnalysisStore.spill_dir
+        AnalysisStore.spill_dir = tempfile.mkdtemp()
+        try:
+            AnalysisStore.budget = 1
+            AnalysisStore.enforce_budget()
+            self.assertEqual('disk', test_wm[0].memory_usage()['Location']['noterest'])
+            with mock.patch('vis.workflow.mp.cpu_count', return_value=2):
+                test_wm.run('interval n-grams')
+            AnalysisStore.budget = None
+            self.assertEqual(4, len(test_wm[0].get_data('noterest').columns))
+            self.assertEqual(4, len(test_wm[1].get_data('noterest').columns))
+        finally:
+            shutil.rmtree(AnalysisStore.spill_dir)
+            AnalysisStore.budget, AnalysisStore.spill_dir = budget, spill_dir
+
+
 #-------------------------------------------------------------------------------------------------#
 # Definitions                                                                                     #
 #-------------------------------------------------------------------------------------------------#
 INTERVALS = TestLoader().loadTestsFromTestCase(Intervals)
+INTERVAL_NGRAMS = TestLoader().loadTestsFromTestCase(IntervalNGrams)
@@ -27,9 +27,21 @@ Integration tests for the WorkflowManager
 """
 
 import os
-from unittest import TestCase, TestLoader
+import shutil
+import tempfile
+from unittest import TestCase, TestLoader, skipIf
+import six
+if six.PY3:
+    from unittest import mock
+else:
+    import mock
 import pandas
+try:
+    import tables  # pylint: disable=unused-import
+except ImportError:
+    tables = None
 from vis.workflow import WorkflowManager
+from vis.models import indexed_piece
 from vis.models.indexed_piece import IndexedPiece
 from vis.analyzers.indexers import noterest, interval
 
@@ -230,7 +242,132 @@ class IntervalsTests(TestCase):
         self.assertDataFramesEqual(expected, actual)
 
 
+class LoadTests(TestCase):
+    """Integration tests for load('pieces')."""
+
+    PATHNAMES = [os.path.join(VIS_PATH, 'tests', 'corpus', 'bwv77.mxl'),
+                 os.path.join(VIS_PATH, 'tests', 'corpus', 'try_opus.krn'),
+                 os.path.join(VIS_PATH, 'tests', 'corpus', 'bwv603.xml')]
+
+    def check_load(self):
+        """Load the pieces and check the IndexedPieces are kept, and the opus expanded in place."""
+        test_wm = WorkflowManager(LoadTests.PATHNAMES)
+        test_wm.settings(1, 'voice combinations', '[[0, 1]]')
+        first, last = test_wm[0], test_wm[2]
+        test_wm.load('pieces')
+        self.assertEqual(5, len(test_wm))
+        self.assertTrue(first is test_wm[0])
+        self.assertTrue(last is test_wm[4])
+        self.assertEqual([None, 0, 1, 2, None], [piece._opus_id for piece in test_wm])
+        self.assertEqual(LoadTests.PATHNAMES[1], test_wm[3].metadata('pathname'))
+        self.assertEqual(['Soprano', 'Alto', 'Tenor', 'Bass'], first.metadata('parts'))
+        self.assertEqual([None, '[[0, 1]]', '[[0, 1]]', '[[0, 1]]', None],
+                         [test_wm.settings(i, 'voice combinations') for i in range(5)])
+        for piece in test_wm:
+            self.assertTrue('noterest' in piece._analyses)
+            self.assertEqual(len(piece._score.parts), len(piece.get_data('noterest').columns))
+        return test_wm
+
+    def test_load_1(self):
+        """in this process"""
+        with mock.patch('vis.workflow.mp.cpu_count', return_value=1):
+            self.check_load()
+
+    def test_load_2(self):
+        """in worker processes; the results are the same as in this process"""
+        with mock.patch('vis.workflow.mp.cpu_count', return_value=2):
+            test_wm = self.check_load()
+        expected = indexed_piece._import_file(LoadTests.PATHNAMES[0])[0]
+        # the scores frozen by the workers are thawed here
+        self.assertEqual(len(expected._score.flat.notesAndRests), len(test_wm[0]._score.flat.notesAndRests))
+        pandas.util.testing.assert_frame_equal(expected.get_data('noterest'), test_wm[0].get_data('noterest'))
+        pandas.util.testing.assert_frame_equal(expected.get_data('vertical_interval'),
+                                               test_wm[0].get_data('vertical_interval'))
+
+
+class LoadResultsTests(TestCase):
+    """Integration tests for load() with the results written by output()."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.test_wm = WorkflowManager(['one', 'two', 'three'])
+        ngrams = [pandas.DataFrame([['3 1 3', '5 -2 6'], ['6 2 5', float('nan')]], index=[0.0, 1.5]),
+                  pandas.DataFrame([['8 -2 6', '3 +2 3']], index=[4.0]),
+                  pandas.DataFrame([['1 1 1', '5 1 5']], index=[0.0])]
+        for each in ngrams:
+            each.columns = pandas.MultiIndex.from_tuples([('ngram.NGramIndexer', '0,1'),
+                                                          ('ngram.NGramIndexer', '0,2')])
+        self.ngrams = ngrams
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_load_results_1(self):
+        """pickle, with all the pieces"""
+        self.test_wm._result = self.ngrams
+        self.test_wm.settings(None, 'count frequency', False)
+        pathname = self.test_wm.output('pickle', os.path.join(self.directory, 'ngrams'))
+        self.assertEqual(os.path.join(self.directory, 'ngrams.pickle'), pathname)
+        other_wm = WorkflowManager(['one', 'two', 'three'])
+        other_wm.load('pickle', pathname)
+        self.assertFalse(other_wm.settings(None, 'count frequency'))
+        self.assertFalse(other_wm._loaded)
+        self.assertEqual(3, len(other_wm._result))
+        for expected, actual in zip(self.ngrams, other_wm._result):
+            pandas.util.testing.assert_frame_equal(expected, actual)
+
+    def test_load_results_2(self):
+        """pickle, with some of the pieces and voice pairs"""
+        self.test_wm._result = self.ngrams
+        pathname = self.test_wm.output('pickle', os.path.join(self.directory, 'ngrams.pickle'))
+        self.test_wm.load('pickle', pathname, pieces=[2, 0], columns=['0,2'])
+        self.assertEqual(2, len(self.test_wm._result))
+        pandas.util.testing.assert_frame_equal(self.ngrams[2][[('ngram.NGramIndexer', '0,2')]],
+                                               self.test_wm._result[0])
+        pandas.util.testing.assert_frame_equal(self.ngrams[0][[('ngram.NGramIndexer', '0,2')]],
+                                               self.test_wm._result[1])
+        self.assertRaises(RuntimeError, self.test_wm.load, 'pickle', pathname, pieces=[3])
+
+    def test_load_results_3(self):
+        """Stata, with frequency counts"""
+        self.test_wm._result = pandas.DataFrame({'aggregator.ColumnAggregator': [4, 3, 1]},
+                                                index=['3 1 3', '5 -2 6', '6 2 5'])
+        self.test_wm._previous_exp = 'interval n-grams'
+        pathname = self.test_wm.output('Stata', os.path.join(self.directory, 'freqs'), threshold=2)
+        other_wm = WorkflowManager(['one', 'two', 'three'])
+        other_wm.settings(None, 'count frequency', False)
+        other_wm.load('stata', pathname)
+        self.assertTrue(other_wm.settings(None, 'count frequency'))
+        expected = pandas.DataFrame({'Interval_N_Gram_Frequency': [4, 3]}, index=['3 1 3', '5 -2 6'])
+        pandas.util.testing.assert_frame_equal(expected, other_wm._result, check_dtype=False)
+        self.assertRaises(RuntimeError, other_wm.load, 'stata', pathname, pieces=[0])
+
+    @skipIf(tables is None, 'PyTables is not installed')
+    def test_load_results_4(self):
+        """HDF5, with some of the pieces and voice pairs, and with frequency counts"""
+        self.test_wm._result = self.ngrams
+        pathname = self.test_wm.output('HDF5', os.path.join(self.directory, 'ngrams'))
+        self.assertEqual(os.path.join(self.directory, 'ngrams.h5'), pathname)
+        self.test_wm.load('hdf5', pathname, pieces=[2, 0], columns=['0,2'])
+        self.assertFalse(self.test_wm.settings(None, 'count frequency'))
+        self.assertEqual(2, len(self.test_wm._result))
+        for i, j in ((0, 2), (1, 0)):
+            pandas.util.testing.assert_frame_equal(self.ngrams[j][[('ngram.NGramIndexer', '0,2')]],
+                                                   self.test_wm._result[i], check_names=False)
+        self.assertRaises(RuntimeError, self.test_wm.load, 'hdf5', pathname, pieces=[3])
+        counts = pandas.DataFrame({'aggregator.ColumnAggregator': [4, 3, 1]},
+                                  index=['3 1 3', '5 -2 6', '6 2 5'])
+        self.test_wm._result = counts
+        pathname = self.test_wm.output('HDF5', os.path.join(self.directory, 'freqs'))
+        self.test_wm.load('hdf5', pathname)
+        self.assertTrue(self.test_wm.settings(None, 'count frequency'))
+        pandas.util.testing.assert_frame_equal(counts, self.test_wm._result)
+        self.assertRaises(RuntimeError, self.test_wm.load, 'hdf5', pathname, columns=['0,2'])
+
+
 #-------------------------------------------------------------------------------------------------#
 # Definitions                                                                                     #
 #-------------------------------------------------------------------------------------------------#
 INTERVALS_TESTS = TestLoader().loadTestsFromTestCase(IntervalsTests)
+LOAD_TESTS = TestLoader().loadTestsFromTestCase(LoadTests)
+LOAD_RESULTS_TESTS = TestLoader().loadTestsFromTestCase(LoadResultsTests)
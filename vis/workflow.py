@@ -36,8 +36,10 @@ analysis patterns for counterpoint. The :class:`TemplateWorkflow` class is a tem
 new ``WorkflowManager`` classes.
 """
 
+import os
 from os import path
 from ast import literal_eval
+import multiprocessing as mp
 import six
 from six.moves import range, xrange  # pylint: disable=import-error,redefined-builtin
 import pandas
@@ -46,6 +48,79 @@ from vis.models import indexed_piece
 from vis.models.aggregated_pieces import AggregatedPieces
 from vis.analyzers.indexers import noterest, interval, offset, repeat
 from vis.analyzers.experimenters import frequency, aggregator, barchart
+from music21 import freezeThaw, stream
+
+def _import_piece(pathname, freeze=True):
+    """
+    Used internally by :meth:`WorkflowManager.load` to import a file and run the
+    :class:`~vis.analyzers.indexers.noterest.NoteRestIndexer`, usually in a worker process. Since
+    music21 streams cannot be pickled as they are, each score is frozen by music21's
+    :class:`~music21.freezeThaw.StreamFreezer` to be handed back.
+
+    :param str pathname: The file to import.
+    :param bool freeze: Whether to freeze the scores. Defaults to ``True``.
+    :returns: For each score in the file, in order, its opus index, the (frozen) score, the
+        metadata, and the noterest results.
+    :rtype: list of 4-tuple
+    """
+    post = []
+    for piece in indexed_piece._import_file(pathname):
+        notes = piece.get_data('noterest')
+        score = piece._score
+        if freeze:  # the score is dropped here, so it needn't be copied first
+            score = freezeThaw.StreamFreezer(score, fastButUnsafe=True).writeStr()
+        post.append((piece._opus_id, score, piece._metadata, notes))
+    return post
+
+
+def _thaw_piece(piece, imported):
+    """
+    Used internally by :meth:`WorkflowManager.load` to put a score imported by
+    :func:`_import_piece` into an :class:`IndexedPiece`, along with its metadata and its noterest
+    results, without replacing the :class:`IndexedPiece` itself.
+    """
+    opus_id, score, metadata, notes = imported
+    if not isinstance(score, stream.Stream):
+        thawer = freezeThaw.StreamThawer()
+        thawer.openStr(score)
+        score = thawer.stream
+    piece._score = score
+    piece._opus_id = opus_id
+    piece._metadata.update(metadata)
+    piece._analyses['noterest'] = notes
+    piece._imported = True
+
+
+# In a worker process, the WorkflowManager whose pieces are analyzed by _piece_ngrams().
+_worker_manager = None
+
+def _init_worker(manager):
+    """
+    Used internally to start the worker processes of :meth:`WorkflowManager._interval_ngrams`
+    with the :class:`WorkflowManager` whose pieces they analyze. The workers are forked, so the
+    manager is inherited from the parent process rather than pickled.
+    """
+    global _worker_manager  # pylint: disable=global-statement
+    _worker_manager = manager
+
+
+def _piece_ngrams(index):
+    """
+    Used internally by :meth:`WorkflowManager._interval_ngrams` to find the interval n-grams of
+    one piece in a worker process started by :func:`_init_worker`, so the music21 scores are
+    never pickled; only the results are.
+    """
+    return _worker_manager._piece_ngrams(index)
+
+
+def _fork_pool(processes, initializer=None, initargs=()):
+    """
+    Used internally to make a pool of worker processes that are forked from this one, since
+    :func:`_init_worker` hands them objects that cannot be pickled.
+    """
+    if hasattr(mp, 'get_context'):
+        return mp.get_context('fork').Pool(processes, initializer, initargs)
+    return mp.Pool(processes, initializer, initargs)
 
 def split_part_combo(key):
     """
@@ -113,6 +188,9 @@ class WorkflowManager(object):
     # NOTE: do not re-order these, or run() will break
     _experiments_list = ['intervals', 'interval n-grams', 'basic']
 
+    _processes = 16
+    "The most worker processes :meth:`load` and :meth:`run` use for the pieces."
+
     # Error message when users call output() with LilyPond, but they probably called run() with
     # ``count frequency`` set to True.
     _COUNT_FREQUENCY_MESSAGE = 'LilyPond output is not possible after you call run() with ' + \
@@ -124,6 +202,12 @@ class WorkflowManager(object):
     # The error when someone calls output() but there are no results to output.
     _NO_RESULTS_ERROR = 'Please call run() before you call output().'
 
+    # The error when load() is asked for a piece that has no results in the file
+    _NO_SUCH_PIECE = 'There are no results for piece {} in "{}".'
+
+    # The error when load() is asked for some pieces or columns of frequency counts
+    _NOT_BY_PIECE = 'The results in "{}" are frequency counts, so pieces and columns cannot be chosen.'
+
     # The error when an ``instruction`` arg is invalid
     _UNRECOGNIZED_INSTRUCTION = 'Unrecognized instruction: "{}"'
 
@@ -184,51 +268,158 @@ class WorkflowManager(object):
         """
         return self._data[index]
 
-    def load(self, instruction='pieces', pathname=None):
+    def load(self, instruction='pieces', pathname=None, pieces=None, columns=None):
         """
         Import analysis data from long-term storage on a filesystem. This should primarily be \
         used for the ``'pieces'`` instruction, to control when the initial music21 import \
         happens.
 
         Use :meth:`load` with an instruction other than ``'pieces'`` to load results from a
-        previous analysis run by :meth:`run`.
+        previous analysis run by :meth:`run`, as written by :meth:`output`. They replace the
+        results of the most recent call to :meth:`run`, and the ``'count frequency'`` setting is
+        changed to match them.
 
         .. note:: If one of the files imports as a :class:`music21.stream.Opus`, the number of
-            pieces and their order *will* change.
+            pieces *will* change. The opus is replaced by one :class:`IndexedPiece` for each of its
+            scores, in order and in its place, and they all get the settings of the opus.
+
+        The ``'pieces'`` instruction imports the files and runs the :class:`NoteRestIndexer` in
+        several processes. The :class:`IndexedPiece` objects already held by this
+        ``WorkflowManager`` are kept, and given the results, so references to them stay valid.
 
         :parameter str instruction: The type of data to load. Defaults to ``'pieces'``.
         :parameter str pathname: The pathname of the data to import; not required for the \
             ``'pieces'`` instruction.
+        :parameter pieces: The indices of the pieces whose results to load, when ``'count
+            frequency'`` was ``False``. The default, ``None``, loads all the pieces.
+        :type pieces: list of int
+        :parameter columns: The voice pairs whose results to load, as they appear in the lower
+            level of the columns (for example, ``['0,1', '0,3']``), when ``'count frequency'``
+            was ``False``. The default, ``None``, loads all the voice pairs.
+        :type columns: list of str
 
         :raises: :exc:`RuntimeError` if the ``instruction`` is not recognized.
+        :raises: :exc:`RuntimeError` if one of the ``pieces`` has no results in the file.
+        :raises: :exc:`RuntimeError` if ``pieces`` or ``columns`` are given for frequency counts.
 
         **Instructions**
 
-        .. note:: only ``'pieces'`` is implemented at this time.
-
         * ``'pieces'``, to import all pieces, collect metadata, and run :class:`NoteRestIndexer`
-        * ``'hdf5'`` to load data from a previous :meth:`output`.
-        * ``'stata'`` to load data from a previous :meth:`output`.
-        * ``'pickle'`` to load data from a previous :meth:`output`.
+        * ``'hdf5'`` to load data from a previous :meth:`output` with the ``'HDF5'`` instruction. \
+            Only the requested ``pieces`` and ``columns`` are read from the file.
+        * ``'stata'`` to load data from a previous :meth:`output` with the ``'Stata'`` \
+            instruction. Only frequency counts can be loaded this way, and without the results \
+            that were left out by the ``top_x`` and ``threshold`` filters. The column keeps the \
+            name it has in the file, which Stata may have changed (for example, to \
+            ``'Interval_N_Gram_Frequency'``).
+        * ``'pickle'`` to load data from a previous :meth:`output` with the ``'pickle'`` \
+            instruction.
         """
-        # TODO: rewrite this with multiprocessing
-        # NOTE: you may want to have the worker process create a new IndexedPiece object, import it
-        #       and run the NoteRestIndexer, then pickle it and send that to a callback method
-        #       that will somehow unpickle it and replace the *data in* the IndexedPieces here, but
-        #       not actually replace the IndexedPieces, since that would inadvertently cancel the
-        #       client's pointer to the IndexedPieces, if they have one
         if 'pieces' == instruction:
-            for i, piece in enumerate(self._data):
-                try:
-                    piece.get_data([noterest.NoteRestIndexer])
-                except indexed_piece.OpusWarning:
-                    new_ips = piece.get_data([noterest.NoteRestIndexer], known_opus=True)
-                    self._data = self._data[:i] + self._data[i + 1:] + new_ips
+            self._load_pieces()
+            self._loaded = True
         elif 'hdf5' == instruction or 'stata' == instruction or 'pickle' == instruction:
-            raise NotImplementedError('The ' + instruction + ' instruction does\'t work yet!')
+            self._result = self._load_result(instruction, pathname, pieces, columns)
+            self.settings(None, 'count frequency', isinstance(self._result, pandas.DataFrame))
         else:
             raise RuntimeError('Unrecognized load() instruction: "' + six.u(instruction) + '"')
-        self._loaded = True
+
+    def _load_result(self, instruction, pathname, pieces, columns):
+        """
+        Used internally by :meth:`load` to read results written by :meth:`output`. Arguments as
+        per :meth:`load`.
+
+        :returns: The results, like those returned by :meth:`run`.
+        :rtype: :class:`pandas.DataFrame` or list of :class:`pandas.DataFrame`
+        """
+        if 'stata' == instruction:
+            post = pandas.read_stata(pathname)
+            post = post.set_index(post.columns[0])  # the index is written as the first column
+            post.index.name = None
+            return WorkflowManager._select_result(post, pathname, pieces, columns)
+        elif 'pickle' == instruction:
+            return WorkflowManager._select_result(pandas.read_pickle(pathname), pathname, pieces, columns)
+
+        store = pandas.HDFStore(pathname, mode='r')
+        try:
+            if '/result' in store.keys():
+                return WorkflowManager._select_result(store['result'], pathname, pieces, columns)
+            contents = store['contents']
+            num_pieces = store.get_storer('contents').attrs.pieces
+            if pieces is None:
+                pieces = range(num_pieces)
+            post = []
+            for i in pieces:
+                if not 0 <= i < num_pieces:
+                    raise RuntimeError(WorkflowManager._NO_SUCH_PIECE.format(i, pathname))
+                wanted = contents[contents['Piece'] == i]
+                if columns is not None:
+                    wanted = wanted[wanted['Parts'].isin(columns)]
+                if 0 == len(wanted):
+                    post.append(pandas.DataFrame())
+                    continue
+                piece = pandas.concat([store[key] for key in wanted['Key']], axis=1)
+                piece.columns = pandas.MultiIndex.from_tuples(list(zip(wanted['Indexer'], wanted['Parts'])))
+                post.append(piece)
+            return post
+        finally:
+            store.close()
+
+    @staticmethod
+    def _select_result(result, pathname, pieces, columns):
+        """
+        Used internally by :meth:`load` to keep the requested ``pieces`` and ``columns`` of a
+        result that was loaded whole. Frequency counts are returned as they are, since they
+        cannot be split by piece or voice pair.
+        """
+        if isinstance(result, pandas.DataFrame):
+            if pieces is not None or columns is not None:
+                raise RuntimeError(WorkflowManager._NOT_BY_PIECE.format(pathname))
+            return result
+        if pieces is not None:
+            for i in pieces:
+                if not 0 <= i < len(result):
+                    raise RuntimeError(WorkflowManager._NO_SUCH_PIECE.format(i, pathname))
+            result = [result[i] for i in pieces]
+        if columns is not None:
+            result = [piece.loc[:, piece.columns.get_level_values(1).isin(columns)] for piece in result]
+        return result
+
+    def _load_pieces(self):
+        """
+        Used internally by :meth:`load` to import the pieces and run the :class:`NoteRestIndexer`.
+        Pieces that were not imported yet are imported by :func:`_import_piece` in up to
+        :attr:`_processes` worker processes, but no more than there are cores; pieces that already
+        hold a score are indexed here.
+        """
+        jobs = [i for i, piece in enumerate(self._data) if piece._score is None]
+        cores = min(len(jobs), WorkflowManager._processes, mp.cpu_count())
+        if cores > 1:
+            pool = mp.Pool(cores)
+            try:
+                imported = pool.map(_import_piece, [self._data[i].metadata('pathname') for i in jobs])
+            finally:
+                pool.close()
+        else:
+            imported = [_import_piece(self._data[i].metadata('pathname'), freeze=False) for i in jobs]
+        imported = dict(zip(jobs, imported))
+
+        data = []
+        settings = []
+        for i, piece in enumerate(self._data):
+            if i not in imported:
+                piece.get_data('noterest')
+                data.append(piece)
+                settings.append(self._settings[i])
+                continue
+            for j, each in enumerate(imported[i]):
+                if j > 0:  # the other scores of an opus
+                    piece = indexed_piece.IndexedPiece(self._data[i].metadata('pathname'))
+                _thaw_piece(piece, each)
+                data.append(piece)
+                settings.append(self._settings[i] if j == 0 else dict(self._settings[i]))
+        self._data = data
+        self._settings = settings
 
     def _get_unique_combos(self, index):
         """
@@ -341,16 +532,23 @@ class WorkflowManager(object):
 
         .. note:: To compute more than one value of ``n``, call :meth:`_interval_ngrams` once for
             each value of ``n``.
+
+        The pieces are analyzed in up to :attr:`_processes` worker processes, but no more than
+        there are cores, and their results are kept in the order of the pieces. The workers are
+        forked from this process, so the analyses they compute along the way are not cached in
+        the :class:`IndexedPiece` objects of this ``WorkflowManager``.
         """
-        self._result = []
-        # use helpers to fetch results for each piece
-        for i in xrange(len(self._data)):
-            if 'all' == self.settings(i, 'voice combinations'):
-                self._result.append(self._all_part_modules(i))
-            elif 'all pairs' == self.settings(i, 'voice combinations'):
-                self._result.append(self._two_part_modules(i))
-            else:
-                self._result.append(self._variable_part_modules(i))
+        # use helpers to fetch results for each piece, in worker processes if possible
+        cores = min(len(self._data), WorkflowManager._processes, mp.cpu_count())
+        if cores > 1 and hasattr(os, 'fork'):
+            pool = _fork_pool(cores, _init_worker, (self,))
+            try:
+                self._result = pool.map(_piece_ngrams, list(range(len(self._data))))
+            finally:
+                pool.terminate()
+                pool.join()
+        else:
+            self._result = [self._piece_ngrams(i) for i in xrange(len(self._data))]
         # aggregate results across all pieces
         if self.settings(None, 'count frequency'):
             self._run_freq_agg('ngram.NGramIndexer')
@@ -385,23 +583,20 @@ class WorkflowManager(object):
 
         # make settings for interval indexers
         # NB: we have to run the offset and repeat indexers on the notes/rests
-        notes = self._run_off_rep(index, piece.get_data([noterest.NoteRestIndexer]))
-        settings = {'quality': self.settings(index, 'interval quality'),
-                    'horiz_attach_later': True}
+        notes = self._run_off_rep(index, piece.get_data('noterest'))
+        settings = {'quality': self.settings(index, 'interval quality')}
         settings['simple or compound'] = ('simple' if self.settings(None, 'simple intervals')
                                           is True else 'compound')
-        vert_ints = piece.get_data([interval.IntervalIndexer], settings, notes)
-        horiz_ints = piece.get_data([interval.HorizontalIntervalIndexer], settings, notes)
-
-        # concatenate the vertical and horizontal DataFrames
-        all_ints = pandas.concat((vert_ints, horiz_ints), axis=1)
+        vert_ints = interval.IntervalIndexer(notes, settings).run()
+        horiz_ints = interval.HorizontalIntervalIndexer(notes, settings).run()
+        parts = piece.metadata('parts')
 
         # each key in vert_ints corresponds to a two-voice combination we should use
         post = []
         for combo in needed_combos:
             # make the list of part combinations
-            vert = [('interval.IntervalIndexer', '{},{}'.format(i, combo[-1])) for i in combo[:-1]]
-            horiz = [('interval.HorizontalIntervalIndexer', str(combo[-1]))]
+            vert = [tuple(['{},{}'.format(parts[i], parts[combo[-1]]) for i in combo[:-1]])]
+            horiz = [(parts[combo[-1]],)]
 
             # assemble settings
             setts = {'vertical': vert,
@@ -410,13 +605,32 @@ class WorkflowManager(object):
                      'continuer': self.settings(None, 'continuer'),
                      'n': self.settings(None, 'n')}
             if not self.settings(None, 'include rests'):
-                setts['terminator'] = 'Rest'
+                setts['terminator'] = ['Rest']
 
             # run NGramIndexer, then append the result to the corresponding index of the dict
-            post.append(piece.get_data([ngram.NGramIndexer], setts, all_ints))
+            post.append(piece.get_data('ngram', data=[vert_ints, horiz_ints], settings=setts))
 
         return pandas.concat(post, axis=1)
 
+    def _piece_ngrams(self, index):
+        """
+        Find the interval n-grams of one piece with :meth:`_all_part_modules`,
+        :meth:`_two_part_modules`, or :meth:`_variable_part_modules`, depending on its ``voice
+        combinations`` setting. Called by :meth:`_interval_ngrams`.
+
+        :param int index: The index of the IndexedPiece on which to the experiment, as stored in
+            ``self._data``.
+
+        :returns: The result of :class:`NGramIndexer` for a single piece.
+        :rtype: :class:`pandas.DataFrame`
+        """
+        if 'all' == self.settings(index, 'voice combinations'):
+            return self._all_part_modules(index)
+        elif 'all pairs' == self.settings(index, 'voice combinations'):
+            return self._two_part_modules(index)
+        else:
+            return self._variable_part_modules(index)
+
     def _two_part_modules(self, index):
         """
         Prepare a list of frequencies of two-part interval n-grams in a piece. This method is
@@ -444,23 +658,20 @@ class WorkflowManager(object):
 
         # make settings for interval indexers
         # NB: we have to run the offset and repeat indexers on the notes/rests
-        notes = self._run_off_rep(index, piece.get_data([noterest.NoteRestIndexer]))
-        settings = {'quality': self.settings(index, 'interval quality'),
-                    'horiz_attach_later': True}
+        notes = self._run_off_rep(index, piece.get_data('noterest'))
+        settings = {'quality': self.settings(index, 'interval quality')}
         settings['simple or compound'] = ('simple' if self.settings(None, 'simple intervals')
                                           is True else 'compound')
-        vert_ints = piece.get_data([interval.IntervalIndexer], settings, notes)
-        horiz_ints = piece.get_data([interval.HorizontalIntervalIndexer], settings, notes)
-
-        # concatenate the vertical and horizontal DataFrames
-        all_ints = pandas.concat((vert_ints, horiz_ints), axis=1)
+        vert_ints = interval.IntervalIndexer(notes, settings).run()
+        horiz_ints = interval.HorizontalIntervalIndexer(notes, settings).run()
+        parts = piece.metadata('parts')
 
         # each key in vert_ints corresponds to a two-voice combination we should use
         post = []
-        for combo in all_ints['interval.IntervalIndexer'].columns:
+        for combo in vert_ints.columns.get_level_values(1):
             # make the list of part cominations
-            vert = [('interval.IntervalIndexer', combo)]
-            horiz = [('interval.HorizontalIntervalIndexer', combo.split(',')[1])]
+            vert = [(combo,)]
+            horiz = [(combo.split(',')[1],)]
 
             # assemble settings
             setts = {'vertical': vert,
@@ -469,10 +680,10 @@ class WorkflowManager(object):
                      'continuer': self.settings(None, 'continuer'),
                      'n': self.settings(None, 'n')}
             if not self.settings(None, 'include rests'):
-                setts['terminator'] = 'Rest'
+                setts['terminator'] = ['Rest']
 
             # run NGramIndexer, then append the result to the corresponding index of the dict
-            post.append(piece.get_data([ngram.NGramIndexer], setts, all_ints))
+            post.append(piece.get_data('ngram', data=[vert_ints, horiz_ints], settings=setts))
 
         return pandas.concat(post, axis=1)
 
@@ -497,23 +708,17 @@ class WorkflowManager(object):
 
         # make settings for interval indexers
         # NB: we have to run the offset and repeat indexers on the notes/rests
-        notes = self._run_off_rep(index, piece.get_data([noterest.NoteRestIndexer]))
-        settings = {'quality': self.settings(index, 'interval quality'),
-                    'horiz_attach_later': True}
+        notes = self._run_off_rep(index, piece.get_data('noterest'))
+        settings = {'quality': self.settings(index, 'interval quality')}
         settings['simple or compound'] = ('simple' if self.settings(None, 'simple intervals')
                                           is True else 'compound')
-        vert_ints = piece.get_data([interval.IntervalIndexer], settings, notes)
-        horiz_ints = piece.get_data([interval.HorizontalIntervalIndexer], settings, notes)
-
-        # concatenate the vertical and horizontal DataFrames
-        all_ints = pandas.concat((vert_ints, horiz_ints), axis=1)
+        vert_ints = interval.IntervalIndexer(notes, settings).run()
+        horiz_ints = interval.HorizontalIntervalIndexer(notes, settings).run()
+        parts = piece.metadata('parts')
 
-        # find the index of the lowest part in the score
-        lowest_part = len(piece.metadata('parts')) - 1
-
-        # make the list of part cominations
-        vert = [('interval.IntervalIndexer', '{},{}'.format(x, lowest_part)) for x in xrange(lowest_part)]
-        horiz = [('interval.HorizontalIntervalIndexer', str(lowest_part))]
+        # make the list of part cominations, each against the lowest part in the score
+        vert = [tuple(['{},{}'.format(part, parts[-1]) for part in parts[:-1]])]
+        horiz = [(parts[-1],)]
 
         # assemble settings
         setts = {'vertical': vert,
@@ -522,10 +727,10 @@ class WorkflowManager(object):
                  'continuer': self.settings(None, 'continuer'),
                  'n': self.settings(None, 'n')}
         if not self.settings(None, 'include rests'):
-            setts['terminator'] = 'Rest'
+            setts['terminator'] = ['Rest']
 
         # run NGramIndexer, then append the result to the corresponding index of the dict
-        return piece.get_data([ngram.NGramIndexer], setts, all_ints)
+        return piece.get_data('ngram', data=[vert_ints, horiz_ints], settings=setts)
 
     def _intervs(self):
         """
@@ -670,9 +875,9 @@ class WorkflowManager(object):
             off_sets = {'quarterLength': self.settings(index, 'offset interval')}
             if is_horizontal:
                 off_sets['method'] = None
-            so_far = self._data[index].get_data([offset.FilterByOffsetIndexer], off_sets, so_far)
+            so_far = self._data[index].get_data('offset', data=so_far, settings=off_sets)
         if self.settings(index, 'filter repeats') is True:
-            so_far = self._data[index].get_data([repeat.FilterByRepeatIndexer], {}, so_far)
+            so_far = self._data[index].get_data('repeat', data=so_far)
         return so_far
 
     def _run_freq_agg(self, which_ind):
@@ -698,18 +903,13 @@ class WorkflowManager(object):
         #       IndexedPiece it never should, but from AggregatedPieces? This may require adjustment
         #       of the models.
         agg_p = AggregatedPieces(self._data)
-        self._result = agg_p.get_data([frequency.FrequencyExperimenter],
-                                      None,
-                                      {'column': which_ind},
-                                      self._result)
+        self._result = agg_p.get_data('frequency', None, {'column': which_ind}, self._result)
         self._result = [x[0] for x in self._result]
-        self._result = agg_p.get_data(None,
-                                      [aggregator.ColumnAggregator],
-                                      {'column': 'frequency.FrequencyExperimenter'},
+        self._result = agg_p.get_data(None, 'aggregator', {'column': 'frequency.FrequencyExperimenter'},
                                       self._result)
-        # "ascending" means highest values near the top; "columns" indicates which column to sort
+        # "ascending" means highest values near the top; "by" indicates which column to sort
         # with; otherwise sometimes pandas sorts by the index...
-        self._result = self._result.sort(ascending=False, columns='aggregator.ColumnAggregator')
+        self._result = self._result.sort_values(by='aggregator.ColumnAggregator', ascending=False)
         return self._result
 
     @staticmethod
@@ -836,6 +1036,10 @@ class WorkflowManager(object):
         * ``'Stata'``: output a Stata file for importing to R.
         * ``'Excel'``: output an Excel file for Peter Schubert.
         * ``'HTML'``: output an HTML table, as used by the VIS Counterpoint Web App.
+        * ``'HDF5'``: output the whole result to an HDF5 file, which :meth:`load` can read again \
+            one piece and one voice pair at a time. This requires PyTables.
+        * ``'pickle'``: output the whole result to a pickle file, which :meth:`load` can read \
+            again.
 
         .. note :: We try to prevent you from requesting LilyPond output if you called :meth:`run`
             with ``count frequency`` set to ``True`` by raising a :exc:`RuntimeError` if ``count
@@ -859,6 +1063,8 @@ class WorkflowManager(object):
                 return pathnames[0]
             else:
                 return pathnames  # TODO: test this
+        elif instruction in ('HDF5', 'pickle'):
+            return self._make_store(instruction, pathname)
         elif instruction == 'LilyPond':
             return self._make_lilypond(pathname)
         elif instruction == 'histogram' or instruction == 'R histogram':
@@ -986,8 +1192,8 @@ class WorkflowManager(object):
             pathnames.append('{}{}'.format(pathname, file_ext))
             getattr(export_me, output_meth)(pathnames[-1])
         else:
-            enum = True if (len(self._data) > 1 and not self.settings(None, 'count frequency')) else False
-            for i in xrange(len(self._data)):
+            enum = True if (len(self._result) > 1 and not self.settings(None, 'count frequency')) else False
+            for i in xrange(len(self._result)):
                 # append piece index to pathname, if there are many pieces
                 if enum:
                     pathnames.append('{}-{}{}'.format(pathname, i, file_ext))
@@ -1000,6 +1206,46 @@ class WorkflowManager(object):
 
         return pathnames
 
+    def _make_store(self, form, pathname):
+        """
+        Output the whole result so :meth:`load` can read it again. Called by :meth:`output`.
+
+        In an HDF5 file, frequency counts are stored with the key ``'result'``. Otherwise every
+        column of every piece is stored with its own key, listed in the ``'contents'`` table, so
+        :meth:`load` only needs to read the columns it is asked for.
+
+        :param str form: Either 'HDF5' or 'pickle', depending on the desired output format.
+        :param str pathname: As in :meth:`output`.
+
+        :returns: The pathname of the outputted file.
+        :rtype: str
+        """
+        file_ext = '.h5' if 'HDF5' == form else '.pickle'
+        if pathname.endswith(file_ext):
+            pathname = pathname[:(-1 * len(file_ext))]
+        pathname = '{}{}'.format(pathname, file_ext)
+
+        if 'pickle' == form:
+            pandas.to_pickle(self._result, pathname)
+            return pathname
+
+        store = pandas.HDFStore(pathname, mode='w')
+        try:
+            if isinstance(self._result, pandas.DataFrame):
+                store.put('result', self._result)
+            else:
+                contents = []
+                for i, piece in enumerate(self._result):
+                    for j, column in enumerate(piece.columns):
+                        key = 'piece_{}/column_{}'.format(i, j)
+                        store.put(key, piece.iloc[:, j])
+                        contents.append((i, column[0], column[1], key))
+                store.put('contents', pandas.DataFrame(contents, columns=['Piece', 'Indexer', 'Parts', 'Key']))
+                store.get_storer('contents').attrs.pieces = len(self._result)
+        finally:
+            store.close()
+        return pathname
+
     def metadata(self, index, field, value=None):
         """
         Get or set a metadata field. The valid field names are determined by :class:`IndexedPiece`